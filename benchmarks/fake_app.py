@@ -0,0 +1,20 @@
+"""
+main.app with Gemini, Google STT and gTTS replaced by the deterministic fakes,
+for benchmarks that run the real multi-process server:
+
+    python server.py --workers 4 --app benchmarks.fake_app:app
+
+FAKE_LLM_LATENCY / FAKE_LLM_JITTER set the fake model's per-call latency (seconds).
+"""
+
+import os
+
+import main
+from benchmarks.fakes import FakeGenerativeModel, install_fakes
+
+install_fakes(FakeGenerativeModel(
+    latency=float(os.getenv("FAKE_LLM_LATENCY", "0.05")),
+    jitter=float(os.getenv("FAKE_LLM_JITTER", "0.0")),
+))
+
+app = main.app
@@ -0,0 +1,256 @@
+"""
+Deterministic in-process fakes for the external services the app calls:
+
+  - FakeGenerativeModel → stands in for genai.GenerativeModel (generate_content,
+                          streaming, start_chat) with configurable latency and
+                          failure injection
+  - fake_speech_to_text / fake_text_to_speech → replace Google STT / gTTS
+  - FakeRedis           → the sorted-set and string subset of redis-py used by
+                          utils/leaderboard.py and utils/shared_state.py
+  - install_fakes()     → wire all of the above into the running app
+
+Responses are chosen by looking at the prompt, so every AI function in
+utils/ai_agent.py gets well-formed JSON of the shape it asks for.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from typing import List, Optional
+
+
+class ServiceUnavailable(Exception):
+    """Injected provider failure — named like google.api_core's 503 so it is retried."""
+    code = 503
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+
+class FakeResponse:
+    def __init__(self, text: str, prompt: str = ""):
+        self.text = text
+        self.usage_metadata = FakeUsage(len(prompt) // 4, len(text) // 4)
+
+
+class FakeChatSession:
+    def __init__(self, model: "FakeGenerativeModel", history: Optional[list] = None):
+        self._model = model
+        self.history = list(history or [])
+
+    def send_message(self, message: str):
+        self._model._simulate_call()
+        reply = f"Good question. Let's practise: explain '{message[:40]}' using the STAR method."
+        self.history += [{"role": "user", "parts": [message]}, {"role": "model", "parts": [reply]}]
+        return FakeResponse(reply, message)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel.
+
+    latency       — base seconds per call
+    jitter        — extra uniform random seconds per call
+    failure_rate  — probability a call raises ServiceUnavailable
+    seed          — makes latency and failures reproducible
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _simulate_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise ServiceUnavailable("injected failure")
+
+    # ── Canned JSON by prompt type ──────────────────────────────
+    @staticmethod
+    def _answer(prompt: str, call: int = 0) -> str:
+        if "HR analyst" in prompt:
+            return json.dumps({
+                "matched_skills": ["Python", "SQL", "Git"],
+                "missing_skills": ["Docker", "Kubernetes", "AWS"],
+                "match_percentage": 50.0,
+            })
+        if "mini-project" in prompt:
+            count = _first_int(r"Generate (\d+) unique", prompt, 2)
+            return json.dumps([
+                {"title": f"Project {i + 1}", "difficulty": "Medium",
+                 "description": "Build and deploy a small service.",
+                 "features": ["Containerise it", "Add CI", "Write tests"]}
+                for i in range(count)
+            ])
+        if "study block" in prompt:
+            skills = re.search(r"study block: (.+)", prompt).group(1).split(", ")
+            weeks = _first_int(r"(\d+)-week", prompt, 1)
+            return json.dumps([
+                {"week": w, "title": f"{skill} focus area", "skills": [skill],
+                 "notes": "Read the official docs, then build a small project. " * 5,
+                 "resources": [{"skill": skill, "url": "https://example.com/docs"}]}
+                for skill in skills for w in range(1, weeks + 1)
+            ])
+        if "roadmap" in prompt:
+            weeks = _requested_weeks(prompt)
+            return json.dumps([
+                {"week": w, "title": f"Week {w}: Focus area", "skills": ["Docker"],
+                 "notes": "Read the official docs, then build a small project. " * 5,
+                 "resources": [{"skill": "Docker", "url": "https://docs.docker.com/"}]}
+                for w in weeks
+            ])
+        if "multiple-choice" in prompt:
+            count = _first_int(r"EXACTLY (\d+)", prompt, 5)
+            return json.dumps([
+                {"question": f"Sample question {call}.{i + 1}?",
+                 "options": ["Alpha", "Beta", "Gamma", "Delta"],
+                 "correct_answer": "Alpha",
+                 "explanation": "Alpha is correct."}
+                for i in range(count)
+            ])
+        return json.dumps({})
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, stream=False, **kwargs):
+        self._simulate_call()
+        text = self._answer(prompt if isinstance(prompt, str) else str(prompt), self.calls)
+        if stream:
+            return _chunks(text, prompt)
+        return FakeResponse(text, prompt)
+
+    def start_chat(self, history: Optional[list] = None):
+        return FakeChatSession(self, history)
+
+
+def _first_int(pattern: str, text: str, default: int) -> int:
+    m = re.search(pattern, text)
+    return int(m.group(1)) if m else default
+
+
+def _requested_weeks(prompt: str) -> List[int]:
+    only = re.search(r"ONLY week\(s\) ([\d, ]+)", prompt)
+    if only:
+        return [int(n) for n in only.group(1).replace(" ", "").split(",") if n]
+    return list(range(1, _first_int(r"(\d+)-week", prompt, 4) + 1))
+
+
+def _chunks(text: str, prompt: str, size: int = 64):
+    for i in range(0, len(text), size):
+        yield FakeResponse(text[i:i + size], prompt if i == 0 else "")
+
+
+# ── Redis fake ────────────────────────────────────────────────
+class FakeRedis:
+    """In-process stand-in for redis.Redis: the sorted-set commands the leaderboard uses plus GET/SET/INCR."""
+
+    def __init__(self):
+        self._zsets = {}
+        self._strings = {}
+        self._lock = threading.RLock()
+
+    def exists(self, key) -> int:
+        return int(key in self._zsets or key in self._strings)
+
+    def delete(self, key) -> int:
+        return int(self._zsets.pop(key, None) is not None) + int(self._strings.pop(key, None) is not None)
+
+    def set(self, key, value, ex=None, nx=False) -> bool:
+        with self._lock:
+            if nx and key in self._strings:
+                return False
+            self._strings[key] = value if isinstance(value, bytes) else str(value).encode()
+            return True
+
+    def incr(self, key) -> int:
+        with self._lock:
+            value = int(self._strings.get(key, b"0")) + 1
+            self._strings[key] = str(value).encode()
+            return value
+
+    def get(self, key):
+        return self._strings.get(key)
+
+    def expire(self, key, seconds) -> bool:
+        return key in self._zsets or key in self._strings
+
+    def zadd(self, key, mapping) -> int:
+        with self._lock:
+            zset = self._zsets.setdefault(key, {})
+            added = sum(1 for m in mapping if m not in zset)
+            zset.update({m: float(s) for m, s in mapping.items()})
+            return added
+
+    def zincrby(self, key, amount, member) -> float:
+        member = str(member)
+        with self._lock:
+            zset = self._zsets.setdefault(key, {})
+            zset[member] = zset.get(member, 0.0) + amount
+            return zset[member]
+
+    def _desc(self, key):
+        # Same tie order as Redis ZREVRANGE: score desc, then member desc
+        return sorted(self._zsets.get(key, {}).items(), key=lambda kv: (kv[1], kv[0]), reverse=True)
+
+    def zrevrank(self, key, member):
+        for i, (m, _) in enumerate(self._desc(key)):
+            if m == member:
+                return i
+        return None
+
+    def zrevrange(self, key, start, stop, withscores=False):
+        rows = self._desc(key)[start:stop + 1]
+        return [(m.encode(), s) for m, s in rows] if withscores else [m.encode() for m, _ in rows]
+
+    def pipeline(self, transaction: bool = True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        with self._client._lock:  # MULTI/EXEC: nothing interleaves with the queued commands
+            return [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+# ── Voice fakes ───────────────────────────────────────────────
+def fake_speech_to_text(audio_bytes: bytes, content_type: str = "audio/wav") -> str:
+    return f"transcribed {len(audio_bytes)} bytes"
+
+
+def fake_text_to_speech(text: str, lang: str = "en") -> bytes:
+    # A few KB of "MP3" so response sizes are realistic
+    return b"ID3" + text.encode("utf-8")[:200] * 20
+
+
+def install_fakes(model: FakeGenerativeModel) -> None:
+    """Point the AI agent and voice routes at the fakes. Import after DATABASE_URL is set."""
+    from utils import ai_agent, voice_handler
+    import routes.voice_routes as voice_routes
+
+    ai_agent.set_model(model)
+    for module in (voice_handler, voice_routes):
+        module.speech_to_text = fake_speech_to_text
+        module.text_to_speech = fake_text_to_speech
@@ -0,0 +1,210 @@
+"""
+End-to-end load test — runs entirely offline.
+
+Boots main.app in-process against SQLite (default) or Postgres, swaps Gemini,
+Google STT and gTTS for the deterministic fakes in benchmarks/fakes.py, seeds
+users and drives the full user journey concurrently:
+
+    signup → login → upload resume → JD → skill-gap → roadmap
+           → test generate → test check → dashboard → voice chat
+
+Reports throughput and p50/p95/p99 latency per endpoint.
+
+Usage:
+    python -m benchmarks.load_test --users 20 --iterations 3 --llm-latency 0.2
+    python -m benchmarks.load_test --database-url postgresql://... --json bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+
+def make_pdf(text: str) -> bytes:
+    """Build a minimal one-page PDF containing `text` (enough for PyPDF2 to extract)."""
+    lines = [ln.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for ln in text.splitlines()]
+    body = "BT /F1 11 Tf 50 780 Td 14 TL " + " ".join(f"({ln}) '" for ln in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        f"<< /Length {len(body)} >>\nstream\n{body}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+RESUME_TEXT = """Jane Doe - Backend Engineer
+Skills: Python, SQL, Git, FastAPI, REST APIs
+Experience: Built data pipelines and internal tools at Acme Corp.
+Education: B.Tech Computer Science"""
+
+JD_TEXT = """We are hiring a Backend Engineer.
+Requirements: Python, SQL, Docker, Kubernetes, AWS, CI/CD.
+Acme is an equal opportunity employer."""
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client, name: str, method: str, url: str, expect=(200, 201), **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code not in expect:
+            self.errors[name] += 1
+        return response
+
+    def report(self, wall_seconds: float) -> dict:
+        endpoints = {}
+        for name, values in self.latencies.items():
+            values = sorted(values)
+            endpoints[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": len(values) / wall_seconds if wall_seconds else 0.0,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+        total = sum(e["count"] for e in endpoints.values())
+        return {
+            "wall_seconds": wall_seconds,
+            "total_requests": total,
+            "throughput_rps": total / wall_seconds if wall_seconds else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+async def seed_user(client, rec: Recorder, run_id: str, n: int) -> dict:
+    email = f"bench-{run_id}-{n}@example.com"
+    await rec.request(client, "POST /auth/signup", "POST", "/auth/signup",
+                      json={"name": f"Bench {n}", "email": email, "password": "bench-pass"})
+    r = await rec.request(client, "POST /auth/login", "POST", "/auth/login",
+                          json={"email": email, "password": "bench-pass"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def scenario(client, rec: Recorder, headers: dict, resume_pdf: bytes) -> None:
+    await rec.request(client, "POST /resume/upload", "POST", "/resume/upload", headers=headers,
+                      files={"file": ("resume.pdf", resume_pdf, "application/pdf")})
+    await rec.request(client, "POST /analysis/jd", "POST", "/analysis/jd", headers=headers,
+                      json={"company_name": "Acme", "jd_text": JD_TEXT})
+    await rec.request(client, "GET /analysis/skill-gap", "GET", "/analysis/skill-gap", headers=headers)
+    await rec.request(client, "GET /roadmap", "GET", "/roadmap/", headers=headers)
+    r = await rec.request(client, "POST /test/generate", "POST", "/test/generate", headers=headers,
+                          json={"skill_name": "Docker", "num_questions": 5})
+    if r.status_code == 200:
+        body = r.json()
+        answers = [{"question_id": q["id"], "selected_answer": q["options"][0]} for q in body["questions"]]
+        await rec.request(client, "POST /test/check", "POST", "/test/check", headers=headers,
+                          json={"test_id": body["test_id"], "skill_name": "Docker", "answers": answers})
+    await rec.request(client, "GET /dashboard", "GET", "/dashboard/", headers=headers)
+    await rec.request(client, "POST /voice/chat-text", "POST", "/voice/chat-text", headers=headers,
+                      json={"message": "Ask me a Docker question"})
+
+
+async def run(args) -> dict:
+    import httpx
+    import main
+    from migrate import migrate
+    from benchmarks.fakes import FakeGenerativeModel, install_fakes
+
+    migrate()
+    install_fakes(FakeGenerativeModel(latency=args.llm_latency, jitter=args.llm_jitter,
+                                      failure_rate=args.failure_rate, seed=args.seed))
+
+    rec = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    resume_pdf = make_pdf(RESUME_TEXT)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Seeding is not part of the measured window
+        seed_rec = Recorder()
+        users = await asyncio.gather(*(seed_user(client, seed_rec, run_id, n) for n in range(args.users)))
+
+        async def virtual_user(headers):
+            for _ in range(args.iterations):
+                await scenario(client, rec, headers, resume_pdf)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(h) for h in users))
+        wall = time.perf_counter() - start
+    return rec.report(wall)
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'endpoint':<26}{'count':>7}{'err':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, e in sorted(report["endpoints"].items()):
+        print(f"{name:<26}{e['count']:>7}{e['errors']:>5}{e['rps']:>9.1f}"
+              f"{e['p50_ms']:>10.1f}{e['p95_ms']:>10.1f}{e['p99_ms']:>10.1f}")
+    print(f"\n{report['total_requests']} requests in {report['wall_seconds']:.2f}s "
+          f"→ {report['throughput_rps']:.1f} req/s")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test with a fake Gemini backend")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=2, help="scenario runs per user")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake Gemini base latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.05, help="fake Gemini extra random latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake Gemini calls that fail")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show app log output")
+    args = parser.parse_args()
+
+    # Must be set before main/db are imported
+    os.environ["DATABASE_URL"] = args.database_url
+    # The fake has no quota — don't let the client-side limiter become the bottleneck
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_BURST", "100000")
+    os.environ.setdefault("LLM_BACKOFF_BASE_SECONDS", "0.01")
+    # Virtual users run the journey back to back, far above a real user's request rate
+    os.environ.setdefault("ADMISSION_USER_RATE_PER_MINUTE", "1000000")
+    os.environ.setdefault("ADMISSION_USER_BURST", "100000")
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main_cli()
@@ -0,0 +1,127 @@
+"""
+Overload test for admission control — runs entirely offline.
+
+A few "hammering" users loop on /test/generate (each call a slow fake Gemini
+request) while ordinary users keep checking tests and chatting with the coach.
+The run is repeated with admission control off and on. Reported per mode:
+latency of the interactive requests, and how many regenerations were served
+or refused with 429.
+
+Usage:
+    python -m benchmarks.overload --hammerers 40 --users 10 --duration 10 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+import uuid
+
+
+async def run(args) -> dict:
+    import httpx
+    import main
+    from migrate import migrate
+    from benchmarks.fakes import FakeGenerativeModel, install_fakes
+    from benchmarks.load_test import Recorder, seed_user
+    from utils import admission
+
+    migrate()
+    install_fakes(FakeGenerativeModel(latency=args.llm_latency, jitter=args.llm_latency / 5))
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for mode in ("off", "on"):
+            admission.ADMISSION_ENABLED = mode == "on"
+            admission._buckets.clear()
+            seed_rec, rec = Recorder(), Recorder()
+            run_id = uuid.uuid4().hex[:8]
+            hammerers = await asyncio.gather(*(seed_user(client, seed_rec, run_id, n) for n in range(args.hammerers)))
+            users = await asyncio.gather(*(seed_user(client, seed_rec, run_id, args.hammerers + n)
+                                           for n in range(args.users)))
+
+            # Interactive users generate their tests before the flood starts
+            tests = {}
+            for n, headers in enumerate(users):
+                tests[n] = []
+                for _ in range(args.tests_per_user):
+                    r = await client.post("/test/generate", headers=headers,
+                                          json={"skill_name": "Docker", "num_questions": 5})
+                    tests[n].append(r.json())
+            deadline = time.perf_counter() + args.duration
+
+            async def hammer(headers):
+                while time.perf_counter() < deadline:
+                    r = await rec.request(client, "POST /test/generate", "POST", "/test/generate",
+                                          expect=(200, 429), headers=headers,
+                                          json={"skill_name": "Docker", "num_questions": 5})
+                    if r.status_code == 429:
+                        rec.errors["generate 429"] += 1
+                        await asyncio.sleep(0.1)  # impatient client: retries well before Retry-After
+
+            async def interactive(n, headers):
+                while time.perf_counter() < deadline:
+                    await rec.request(client, "POST /voice/chat-text", "POST", "/voice/chat-text",
+                                      headers=headers, json={"message": "Ask me a Docker question"})
+                    if tests[n]:
+                        body = tests[n].pop()
+                        answers = [{"question_id": q["id"], "selected_answer": q["options"][0]}
+                                   for q in body["questions"]]
+                        await rec.request(client, "POST /test/check", "POST", "/test/check", headers=headers,
+                                          json={"test_id": body["test_id"], "skill_name": "Docker",
+                                                "answers": answers})
+                    await asyncio.sleep(args.think_time)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(hammer(h) for h in hammerers),
+                                 *(interactive(n, h) for n, h in enumerate(users)))
+            report = rec.report(time.perf_counter() - start)
+            generate = report["endpoints"].get("POST /test/generate", {"count": 0})
+            refused = rec.errors.get("generate 429", 0)
+            results[mode] = {
+                "generate_served": generate["count"] - refused,
+                "generate_429": refused,
+                **{f"{name} {key}": round(report["endpoints"][name][key], 1)
+                   for name in ("POST /test/check", "POST /voice/chat-text") if name in report["endpoints"]
+                   for key in ("p50_ms", "p95_ms", "errors")},
+            }
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Interactive latency under a regeneration flood, admission off vs on")
+    parser.add_argument("--hammerers", type=int, default=40, help="users looping on /test/generate")
+    parser.add_argument("--users", type=int, default=10, help="interactive users (checks + coach)")
+    parser.add_argument("--tests-per-user", type=int, default=5, help="tests each interactive user checks")
+    parser.add_argument("--think-time", type=float, default=0.2, help="pause between interactive requests (s)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load per mode")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake Gemini latency (s)")
+    parser.add_argument("--database-url", default="sqlite:///./bench_overload.db")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show app log output")
+    args = parser.parse_args()
+
+    # Must be set before main/db are imported; only admission control should refuse requests
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_BURST", "100000")
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        results = asyncio.run(run(args))
+
+    for mode, row in results.items():
+        print(f"\nadmission {mode}")
+        for key, value in row.items():
+            print(f"  {key:<32}{value:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,221 @@
+"""
+PDF extraction benchmark — throughput and quality per backend, serial and page-parallel.
+
+Builds a synthetic resume corpus with known text: one-column resumes, two-column
+"designer" layouts, and the same layouts with text blocks emitted out of reading
+order (as design tools often do), from 1 to --max-pages pages. Every installed
+backend in utils/pdf_backends.py extracts every document, serially and then
+across --workers processes. PDFs in --corpus are added for throughput (they
+have no reference text, so no quality score).
+
+Quality is scored against the reference text:
+  - recall → share of the reference words found (multiset), i.e. nothing dropped or mangled
+  - order  → difflib ratio of the word sequences, i.e. columns / blocks not interleaved
+
+Usage:
+    python -m benchmarks.pdf_extract --docs 24 --max-pages 40 --workers 4
+    python -m benchmarks.pdf_extract --corpus ~/resumes --json pdf.json
+"""
+
+import argparse
+import difflib
+import io
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+WORDS = ("python sql docker kubernetes aws terraform react typescript fastapi django postgres redis "
+         "kafka spark airflow pandas numpy pytorch git linux ci cd graphql rest microservices "
+         "designed built led migrated scaled reduced latency improved reliability mentored shipped "
+         "pipelines dashboards services platform team customers revenue analytics experiments "
+         "figma branding typography illustration motion ux research prototyping accessibility").split()
+
+Block = Tuple[float, float, List[str]]  # x, y of the first line, lines
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_document(pages: List[List[Block]]) -> bytes:
+    """A PDF whose pages draw the given text blocks, in list order, with Helvetica."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for blocks in pages:
+        body = " ".join(f"BT /F1 10 Tf {x} {y} Td 13 TL " + " ".join(f"({_escape(ln)}) '" for ln in lines) + " ET"
+                        for x, y, lines in blocks)
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _lines(rng: random.Random, count: int, width: int) -> List[str]:
+    return [" ".join(rng.choice(WORDS) for _ in range(width)) for _ in range(count)]
+
+
+def make_corpus(docs: int, max_pages: int, seed: int = 7) -> List[Dict]:
+    """Synthetic resumes: {"name", "layout", "pages", "pdf", "reference"}; reference is each page's text in reading order."""
+    rng = random.Random(seed)
+    sizes = [max(1, round(max_pages ** (i / max(docs - 1, 1)))) for i in range(docs)]  # 1 … max_pages, log-spaced
+    corpus = []
+    for i, size in enumerate(sizes):
+        layout = ("one-column", "two-column", "shuffled")[i % 3]
+        pages, reference = [], []
+        for _ in range(size):
+            if layout == "one-column":
+                blocks = [(50, 760 - 130 * b, _lines(rng, 8, 11)) for b in range(5)]
+            else:
+                # Sidebar (left) then main column (right), each a stack of sections
+                blocks = [(40, 760 - 180 * b, _lines(rng, 10, 4)) for b in range(4)]
+                blocks += [(230, 760 - 130 * b, _lines(rng, 8, 9)) for b in range(5)]
+            reference.append("\n".join(ln for _, _, lines in blocks for ln in lines))
+            if layout == "shuffled":
+                blocks = rng.sample(blocks, len(blocks))
+            pages.append(blocks)
+        corpus.append({"name": f"{layout}-{size}p-{i}", "layout": layout, "pages": size,
+                       "pdf": make_document(pages), "reference": reference})
+    return corpus
+
+
+def load_corpus(directory: str) -> List[Dict]:
+    from PyPDF2 import PdfReader
+
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(".pdf"):
+            with open(os.path.join(directory, name), "rb") as f:
+                data = f.read()
+            corpus.append({"name": name, "layout": "corpus", "pages": len(PdfReader(io.BytesIO(data)).pages),
+                           "pdf": data, "reference": None})
+    return corpus
+
+
+def score(pages: List[str], reference: List[str]) -> Tuple[float, float]:
+    """Mean recall and order over the pages (page by page keeps difflib fast on long documents)."""
+    recalls, orders = [], []
+    for text, expected in zip(pages, reference):
+        got, want = text.split(), expected.split()
+        recalls.append(sum((Counter(got) & Counter(want)).values()) / len(want))
+        orders.append(difflib.SequenceMatcher(None, got, want, autojunk=False).ratio())
+    return statistics.mean(recalls), statistics.mean(orders)
+
+
+def extract(pdf_backends, doc: Dict, name: str) -> List[str]:
+    return list(pdf_backends.iter_pages(io.BytesIO(doc["pdf"]), name))
+
+
+def measure(pdf_backends, corpus: List[Dict], name: str, workers: int, min_pages: int, repeat: int) -> Dict:
+    pdf_backends.shutdown()
+    pdf_backends.PDF_PROCESS_WORKERS = workers
+    pdf_backends.PDF_PARALLEL_MIN_PAGES = min_pages
+    extract(pdf_backends, max(corpus, key=lambda d: d["pages"]), name)  # library import + pool start-up
+
+    per_doc, texts = [], {}
+    for _ in range(repeat):
+        for doc in corpus:
+            start = time.perf_counter()
+            texts[doc["name"]] = extract(pdf_backends, doc, name)
+            per_doc.append((time.perf_counter() - start) * 1000)
+    elapsed = sum(per_doc) / 1000
+    pdf_backends.shutdown()
+    scores = [score(texts[d["name"]], d["reference"]) for d in corpus if d["reference"] is not None]
+
+    pages = sum(d["pages"] for d in corpus) * repeat
+    megabytes = sum(len(d["pdf"]) for d in corpus) * repeat / 1e6
+    return {
+        "backend": name,
+        "workers": workers,
+        "pages_per_s": pages / elapsed,
+        "mb_per_s": megabytes / elapsed,
+        "p50_ms": statistics.median(per_doc),
+        "max_ms": max(per_doc),
+        "recall": statistics.mean(r for r, _ in scores) if scores else None,
+        "order": statistics.mean(o for _, o in scores) if scores else None,
+        "texts": texts,
+    }
+
+
+def layout_quality(corpus: List[Dict], texts: Dict[str, List[str]]) -> Dict[str, Tuple[float, float]]:
+    by_layout: Dict[str, List[Tuple[float, float]]] = {}
+    for doc in corpus:
+        if doc["reference"] is not None:
+            by_layout.setdefault(doc["layout"], []).append(score(texts[doc["name"]], doc["reference"]))
+    return {layout: (statistics.mean(r for r, _ in scores), statistics.mean(o for _, o in scores))
+            for layout, scores in by_layout.items()}
+
+
+def run(args) -> Dict:
+    from utils import pdf_backends
+
+    corpus = make_corpus(args.docs, args.max_pages) + (load_corpus(args.corpus) if args.corpus else [])
+    backends = args.backends.split(",") if args.backends else pdf_backends.available()
+    pdf_backends.PDF_PROCESS_WORKERS = 1
+    results = {"corpus": {"documents": len(corpus), "pages": sum(d["pages"] for d in corpus),
+                          "megabytes": round(sum(len(d["pdf"]) for d in corpus) / 1e6, 2),
+                          "cpu_count": os.cpu_count()},
+               "runs": [], "layouts": {}}
+    for name in backends:
+        for workers in sorted({1, args.workers}):
+            row = measure(pdf_backends, corpus, name, workers, args.min_pages, args.repeat)
+            texts = row.pop("texts")
+            if workers == 1:
+                results["layouts"][name] = layout_quality(corpus, texts)
+            results["runs"].append(row)
+    return results
+
+
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Throughput and extraction quality of the PDF backends")
+    parser.add_argument("--docs", type=int, default=24, help="synthetic documents in the corpus")
+    parser.add_argument("--max-pages", type=int, default=40, help="pages in the longest synthetic document")
+    parser.add_argument("--corpus", help="directory of extra PDFs (throughput only)")
+    parser.add_argument("--backends", help="comma-separated backend names (default: all installed)")
+    parser.add_argument("--workers", type=int, default=4, help="process count for the page-parallel runs")
+    parser.add_argument("--min-pages", type=int, default=16, help="documents at least this long go parallel")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per run")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    corpus = results["corpus"]
+    print(f"\n{corpus['documents']} documents, {corpus['pages']} pages, {corpus['megabytes']} MB, "
+          f"{corpus['cpu_count']} CPU core(s)")
+    print(f"\n{'backend':<10}{'workers':>8}{'pages/s':>10}{'MB/s':>8}{'p50 ms':>9}{'max ms':>9}{'recall':>8}{'order':>7}")
+    for row in results["runs"]:
+        print(f"{row['backend']:<10}{row['workers']:>8}{row['pages_per_s']:>10.1f}{row['mb_per_s']:>8.2f}"
+              f"{row['p50_ms']:>9.1f}{row['max_ms']:>9.1f}{_fmt(row['recall'], '.3f'):>8}{_fmt(row['order'], '.3f'):>7}")
+    print(f"\n{'backend':<10}{'layout':<12}{'recall':>8}{'order':>7}")
+    for name, layouts in results["layouts"].items():
+        for layout, (recall, order) in layouts.items():
+            print(f"{name:<10}{layout:<12}{recall:>8.3f}{order:>7.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
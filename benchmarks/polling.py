@@ -0,0 +1,91 @@
+"""
+Polling cost with and without conditional GET — runs entirely offline.
+
+Seeds one user with a resume, an analysis, a roadmap and a few tests, then
+polls each cached read endpoint --polls times, plainly and with the last
+ETag in If-None-Match. Reports mean latency and DB queries per poll.
+
+Usage:
+    python -m benchmarks.polling --polls 200
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+
+def run(args) -> dict:
+    import main
+    from fastapi.testclient import TestClient
+    from migrate import migrate
+    from benchmarks.fakes import FakeGenerativeModel, install_fakes
+    from benchmarks.load_test import JD_TEXT, RESUME_TEXT, make_pdf
+    from utils.metrics import DB_QUERIES_PER_REQUEST
+
+    migrate()
+    install_fakes(FakeGenerativeModel())
+    client = TestClient(main.app)
+    email = f"poll-{time.time_ns()}@example.com"
+    client.post("/auth/signup", json={"name": "Poller", "email": email, "password": "bench-pass"})
+    token = client.post("/auth/login", json={"email": email, "password": "bench-pass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client.post("/resume/upload", headers=headers, files={"file": ("resume.pdf", make_pdf(RESUME_TEXT), "application/pdf")})
+    client.post("/analysis/jd", headers=headers, json={"company_name": "Acme", "jd_text": JD_TEXT})
+    client.get("/analysis/skill-gap", headers=headers)
+    for _ in range(3):
+        test = client.post("/test/generate", headers=headers, json={"skill_name": "Docker", "num_questions": 5}).json()
+        answers = [{"question_id": q["id"], "selected_answer": q["options"][0]} for q in test["questions"]]
+        client.post("/test/check", headers=headers,
+                    json={"test_id": test["test_id"], "skill_name": "Docker", "answers": answers})
+
+    def db_queries() -> int:
+        return sum(DB_QUERIES_PER_REQUEST._sums.values())
+
+    results = {}
+    for path in ("/dashboard/", "/roadmap/", "/progress/", "/resume/latest"):
+        tag = client.get(path, headers=headers).headers["etag"]
+        row = {}
+        for mode, extra in (("full", {}), ("conditional", {"If-None-Match": tag})):
+            queries_before = db_queries()
+            start = time.perf_counter()
+            for _ in range(args.polls):
+                status = client.get(path, headers={**headers, **extra}).status_code
+            row[f"{mode}_ms"] = (time.perf_counter() - start) / args.polls * 1000
+            row[f"{mode}_queries"] = (db_queries() - queries_before) / args.polls
+            row[f"{mode}_status"] = status
+        results[path] = row
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Cost of polling read endpoints, with and without If-None-Match")
+    parser.add_argument("--polls", type=int, default=200, help="requests per endpoint and mode")
+    parser.add_argument("--database-url", default="sqlite:///./bench_polling.db")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_BURST", "100000")
+    # GET /roadmap is admission-controlled; keep the per-user limit out of the measurement
+    os.environ.setdefault("ADMISSION_USER_RATE_PER_MINUTE", "1000000")
+    os.environ.setdefault("ADMISSION_USER_BURST", "100000")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(args)
+
+    print(f"\n{'endpoint':<16}{'full ms':>10}{'304 ms':>10}{'full q':>9}{'304 q':>8}")
+    for path, row in results.items():
+        print(f"{path:<16}{row['full_ms']:>10.2f}{row['conditional_ms']:>10.2f}"
+              f"{row['full_queries']:>9.1f}{row['conditional_queries']:>8.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,126 @@
+"""
+Multi-process throughput scaling test.
+
+For each worker count, starts `python server.py --workers N` on the fake-backed
+app (benchmarks/fake_app.py), seeds users over HTTP and runs the load-test user
+journey from benchmarks/load_test.py with --concurrency virtual users for
+--duration seconds. Requests are spread over workers by the kernel, so tests
+generated on one worker are routinely checked on another.
+
+Usage:
+    python -m benchmarks.scaling --workers 1,2,4,8 --duration 20
+    python -m benchmarks.scaling --database-url postgresql://... --json scaling.json
+
+SQLite serialises writers across processes, so use Postgres for numbers that
+reflect production. Results for a given host are recorded in SCALING.md.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.load_test import Recorder, make_pdf, scenario, seed_user, RESUME_TEXT
+
+
+def start_server(workers: int, port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers), "--port", str(port),
+         "--app", "benchmarks.fake_app:app", "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return proc
+
+
+async def wait_ready(base_url: str, timeout: float = 60) -> None:
+    import httpx
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def drive(base_url: str, concurrency: int, duration: float) -> dict:
+    import httpx
+    rec, seed_rec = Recorder(), Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    resume_pdf = make_pdf(RESUME_TEXT)
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        users = await asyncio.gather(*(seed_user(client, seed_rec, run_id, n) for n in range(concurrency)))
+        deadline = time.perf_counter() + duration
+
+        async def virtual_user(headers):
+            while time.perf_counter() < deadline:
+                await scenario(client, rec, headers, resume_pdf)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(h) for h in users))
+        wall = time.perf_counter() - start
+    report = rec.report(wall)
+    report["errors"] = sum(e["errors"] for e in report["endpoints"].values())
+    return report
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Throughput at several worker-process counts")
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load per worker count")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake Gemini latency (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default="sqlite:///./bench_scaling.db")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.database_url,
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "LLM_REQUESTS_PER_MINUTE": "1000000",
+        "LLM_BURST": "100000",
+        "ADMISSION_USER_RATE_PER_MINUTE": "1000000",
+        "ADMISSION_USER_BURST": "100000",
+        "WARMUP_AI_STACKS": "false",
+    }
+    subprocess.run([sys.executable, "migrate.py"], env=env, capture_output=True, check=True)
+
+    results = {}
+    for workers in (int(w) for w in args.workers.split(",")):
+        proc = start_server(workers, args.port, env)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_ready(base_url))
+            report = asyncio.run(drive(base_url, args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=60)
+        results[workers] = {
+            "throughput_rps": round(report["throughput_rps"], 1),
+            "requests": report["total_requests"],
+            "errors": report["errors"],
+        }
+        print(f"workers={workers}: {results[workers]['throughput_rps']} req/s "
+              f"({report['total_requests']} requests, {report['errors']} errors)", flush=True)
+
+    base = results[min(results)]["throughput_rps"] or 1
+    print(f"\n{'workers':>8}{'req/s':>10}{'speedup':>10}{'errors':>8}")
+    for workers, row in results.items():
+        print(f"{workers:>8}{row['throughput_rps']:>10.1f}{row['throughput_rps'] / base:>9.2f}x{row['errors']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
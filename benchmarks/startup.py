@@ -0,0 +1,102 @@
+"""
+Startup-time benchmark — each run is a fresh interpreter, like a new worker or a --reload.
+
+Measures, per configuration (median of --runs):
+  import    → `import main`
+  startup   → lifespan startup (migrations if enabled, pool warm-up, leaderboard, workers)
+  first_req → first GET / after startup
+  warm_up   → background import of the Gemini / voice SDKs (off the request path)
+
+Usage:
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --database-url postgresql://... --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CONFIGS = {
+    "default": {},
+    "auto_migrate": {"AUTO_MIGRATE": "true"},
+    "no_warm_up": {"WARMUP_AI_STACKS": "false"},
+}
+
+METRICS = ("import", "startup", "first_req", "warm_up")
+
+
+def child() -> None:
+    """Runs inside the measured interpreter; prints one JSON line."""
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    from utils.lifecycle import WARMUP_AI_STACKS, startup_timings
+
+    with TestClient(main.app) as client:
+        timings = startup_timings()
+        before = time.perf_counter()
+        client.get("/")
+        first_req = time.perf_counter() - before
+        deadline = time.time() + 60
+        while WARMUP_AI_STACKS and "warm_up" not in startup_timings() and time.time() < deadline:
+            time.sleep(0.01)
+        warm_up = startup_timings().get("warm_up")
+
+    result = {
+        "import": (imported - started) * 1000,
+        "startup": timings.get("total"),
+        "first_req": first_req * 1000,
+        "warm_up": warm_up,
+    }
+    sys.__stdout__.write("RESULT " + json.dumps(result) + "\n")
+
+
+def run_config(name: str, env: dict, runs: int, database_url: str) -> dict:
+    samples = {m: [] for m in METRICS}
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child"],
+            env={**os.environ, "DATABASE_URL": database_url, **env},
+            capture_output=True, text=True, check=True,
+        )
+        line = next(ln for ln in proc.stdout.splitlines() if ln.startswith("RESULT "))
+        for metric, value in json.loads(line[len("RESULT "):]).items():
+            if value is not None:
+                samples[metric].append(value)
+    return {m: round(statistics.median(v), 1) if v else None for m, v in samples.items()}
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Measure app import / startup / first-request time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per configuration")
+    parser.add_argument("--database-url", default="sqlite:///./bench_startup.db")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    # Schema first, so every configuration starts from a migrated database
+    subprocess.run([sys.executable, "migrate.py"], env={**os.environ, "DATABASE_URL": args.database_url},
+                   capture_output=True, check=True)
+
+    results = {name: run_config(name, env, args.runs, args.database_url) for name, env in CONFIGS.items()}
+
+    print(f"\n{'config':<14}" + "".join(f"{m + ' ms':>13}" for m in METRICS))
+    for name, row in results.items():
+        print(f"{name:<14}" + "".join(f"{row[m]:>13.1f}" if row[m] is not None else f"{'-':>13}" for m in METRICS))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
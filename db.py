@@ -3,6 +3,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from utils.metrics import count_db_queries
 load_dotenv()
 
 
@@ -12,7 +13,25 @@ DATABASE_URL=os.getenv("DATABASE_URL")
 print("DATABASE_URL",DATABASE_URL)
 
 engine=create_engine(DATABASE_URL)
+count_db_queries(engine)
 SessionLocal=sessionmaker(autocommit=False,autoflush=False,bind=engine)
+
+
+def warm_pool(connections: int) -> int:
+    """Open up to `connections` pooled connections now so the first requests skip the connect."""
+    pool_size = engine.pool.size() if hasattr(engine.pool, "size") else connections
+    opened = []
+    try:
+        for _ in range(min(connections, pool_size)):
+            conn = engine.connect()
+            conn.exec_driver_sql("SELECT 1")
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
 def get_db():
     db = SessionLocal()
     try:
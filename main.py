@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from db import engine
-from models import Base
+from utils.metrics import metrics_middleware, render_prometheus
+from utils.responses import FastJSONResponse
+from utils.compression import CompressionMiddleware
+from utils.admission import admission_middleware
+from utils.resume_parser import upload_limit_middleware
 
 # Import all routers
 from routes.auth_routes import router as auth_router
@@ -15,14 +18,28 @@ from routes.dashboard_routes import router as dashboard_router
 from routes.voice_routes import router as voice_router
 from routes.progress_routes import router as progress_router
 from routes.gamification_routes import router as gamification_router
+from routes.job_routes import router as job_router
+from routes.analytics_routes import router as analytics_router
+from utils.lifecycle import lifespan
 
 # --------------- App Initialisation ---------------
 app = FastAPI(
     title="AI Interview Preparation Platform",
     description="Analyse skill gaps, generate roadmaps, and practise with mock tests.",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+    # Startup / shutdown (DB pool, leaderboard, job workers, XP buffer, SDK warm-up): utils/lifecycle.py
+    # Schema changes are applied separately: python migrate.py
+    lifespan=lifespan,
 )
 
+# --------------- Admission control (AI endpoints) ---------------
+# Registered first so it sits inside CORS: 429s still carry CORS headers
+app.middleware("http")(admission_middleware)
+
+# --------------- Upload size limit (413 before the body is received) ---------------
+app.middleware("http")(upload_limit_middleware)
+
 # --------------- CORS ---------------
 app.add_middleware(
     CORSMiddleware,
@@ -30,8 +47,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "Retry-After", "ETag"],
 )
 
+# --------------- Compression (gzip / brotli) ---------------
+app.add_middleware(CompressionMiddleware)
+
+# --------------- Metrics / Server-Timing ---------------
+app.middleware("http")(metrics_middleware)
+
 # --------------- Include Routers ---------------
 app.include_router(auth_router)
 app.include_router(resume_router)
@@ -42,16 +66,20 @@ app.include_router(dashboard_router)
 app.include_router(voice_router)
 app.include_router(progress_router)
 app.include_router(gamification_router)
-
-# --------------- Create Tables ---------------
-Base.metadata.create_all(bind=engine)
-
+app.include_router(job_router)
+app.include_router(analytics_router)
 
 @app.get("/", tags=["Root"])
 def read_root():
     return {"message": "Welcome to the AI Interview Preparation Platform!"}
 
 
+@app.get("/metrics", tags=["Root"], response_class=PlainTextResponse)
+def metrics():
+    """Prometheus-format metrics: latency histograms, token usage, fallbacks, DB query counts."""
+    return render_prometheus()
+
+
 @app.get("/demo", tags=["Root"])
 def voice_demo():
     """Redirect to the voice chat demo page."""
@@ -62,6 +90,7 @@ def voice_demo():
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+# Single-process development server; use `python server.py` for several workers
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
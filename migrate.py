@@ -0,0 +1,88 @@
+"""
+Schema migrations — run explicitly on deploy instead of at app import:
+
+    python migrate.py           # apply
+    python migrate.py --check   # list pending changes, exit 1 if any
+
+Brings the database up to models.py additively:
+  - creates missing tables (with their indexes)
+  - adds missing columns to existing tables (new columns must be nullable)
+  - creates missing indexes on existing tables
+
+Nothing is dropped or altered. A change that fails (e.g. a unique index over
+duplicate legacy rows) is reported and skipped so the rest still apply.
+Set AUTO_MIGRATE=true to run this during app startup instead (dev only).
+"""
+
+import argparse
+import sys
+from typing import List, Tuple
+
+from sqlalchemy import Column, inspect, text
+
+from db import engine
+from models import Base
+
+
+def pending_changes(bind=engine) -> List[Tuple[str, object]]:
+    """[(description, table / column / index object)] needed to match models.py."""
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    changes = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            changes.append((f"create table {table.name}", table))
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                changes.append((f"add column {table.name}.{column.name}", column))
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                changes.append((f"create index {index.name} on {table.name}", index))
+    return changes
+
+
+def _apply(conn, obj) -> None:
+    if isinstance(obj, Column):
+        column_type = obj.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {obj.table.name} ADD COLUMN {obj.name} {column_type}"))
+    else:  # Table or Index
+        obj.create(bind=conn)
+
+
+def migrate(bind=engine) -> List[str]:
+    """Apply every pending change, each in its own transaction; returns what was applied."""
+    applied = []
+    for description, obj in pending_changes(bind):
+        try:
+            with bind.begin() as conn:
+                _apply(conn, obj)
+            applied.append(description)
+            print(f"[Migrate] {description}")
+        except Exception as e:
+            print(f"[Migrate] FAILED {description}: {e}")
+    return applied
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bring the database schema up to models.py")
+    parser.add_argument("--check", action="store_true", help="only list pending changes")
+    args = parser.parse_args()
+
+    if args.check:
+        changes = pending_changes()
+        for description, _ in changes:
+            print(f"pending: {description}")
+        print(f"{len(changes)} pending change(s)")
+        return 1 if changes else 0
+
+    applied = migrate()
+    remaining = pending_changes()
+    print(f"{len(applied)} change(s) applied, {len(remaining)} still pending")
+    return 1 if remaining else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
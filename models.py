@@ -1,5 +1,5 @@
 from db import Base
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -34,10 +34,14 @@ class ProjectProgress(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     project_id = Column(String(255), nullable=False)
-    completed_steps = Column(Text, default="[]")  # stored as JSON string [0, 1, 2]
+    completed_steps = Column(Text, default="[]")  # legacy JSON list [0, 1, 2]; superseded by steps_mask
+    steps_mask = Column(BigInteger, nullable=True)  # bit i set = step i completed
+    xp_mask = Column(BigInteger, nullable=True)     # steps that have already earned XP
 
     user = relationship("User", back_populates="project_progress")
 
+    __table_args__ = (Index("ix_project_progress_user_project", "user_id", "project_id", unique=True),)
+
 
 class Resume(Base):
     __tablename__ = "resumes"
@@ -85,6 +89,92 @@ class TestResult(Base):
 
     user = relationship("User", back_populates="test_results")
 
+    # Serves /test/history's keyset pagination (newest first) without a sort
+    __table_args__ = (Index("ix_test_results_user_taken", "user_id", "taken_at", "id"),)
+
+
+class SkillMastery(Base):
+    """Exponentially-weighted test score per user and skill, updated on every /test/check."""
+    __tablename__ = "skill_mastery"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    skill_key = Column(String(255), nullable=False)   # lower-cased skill name
+    skill_name = Column(String(255), nullable=False)
+    mastery = Column(Float, default=0.0)               # 0-100
+    attempts = Column(Integer, default=0)
+    last_score = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_skill_mastery_user_skill", "user_id", "skill_key", unique=True),)
+
+
+class UserBadge(Base):
+    """A badge held by a user — awarded by utils.badges, one row per (user, badge)."""
+    __tablename__ = "user_badges"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    badge_id = Column(Integer, nullable=False)
+    earned_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_user_badges_user_badge", "user_id", "badge_id", unique=True),)
+
+
+class BadgeCounter(Base):
+    """Running activity counter behind the badge rules (tests completed, best streak, ...)."""
+    __tablename__ = "badge_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String(50), nullable=False)
+    value = Column(Float, default=0.0)
+
+    __table_args__ = (Index("ix_badge_counters_user_name", "user_id", "name", unique=True),)
+
+
+class SkillRating(Base):
+    """Elo-style ability per user and skill, updated from every answered pool question."""
+    __tablename__ = "skill_ratings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    skill_key = Column(String(255), nullable=False)
+    rating = Column(Float, default=1000.0)
+    answered = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_skill_ratings_user_skill", "user_id", "skill_key", unique=True),)
+
+
+class PoolQuestion(Base):
+    """Generated MCQ kept for reuse across users, bucketed by difficulty."""
+    __tablename__ = "question_pool"
+
+    id = Column(Integer, primary_key=True, index=True)
+    skill_key = Column(String(255), nullable=False)
+    difficulty = Column(String(10), nullable=False)   # easy | medium | hard
+    rating = Column(Float, nullable=False)            # item difficulty on the same scale as SkillRating
+    question = Column(Text, nullable=False)
+    options = Column(Text, nullable=False)            # JSON list of 4 strings
+    correct_answer = Column(Text, nullable=False)
+    explanation = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_question_pool_skill_difficulty", "skill_key", "difficulty"),)
+
+
+class SeenQuestion(Base):
+    """Pool questions already served to a user (not served again while unseen ones remain)."""
+    __tablename__ = "seen_questions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("question_pool.id"), nullable=False)
+    seen_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_seen_questions_user_question", "user_id", "question_id"),)
+
 
 class Progress(Base):
     __tablename__ = "progress"
@@ -115,4 +205,45 @@ class GeneratedRoadmap(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     roadmap_data = Column(Text, nullable=False)  # Full roadmap JSON blob
+    skills_key = Column(Text, nullable=True)     # missing-skill set this roadmap was built for
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RoadmapFragment(Base):
+    """Roadmap weeks generated for one missing skill, reused while the skill stays missing."""
+    __tablename__ = "roadmap_fragments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    skill_key = Column(String(255), nullable=False)   # normalised skill name
+    skill = Column(String(255), nullable=False)
+    weeks_data = Column(Text, nullable=False)         # JSON list of week dicts
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_roadmap_fragments_user_skill", "user_id", "skill_key", unique=True),)
+
+
+class Job(Base):
+    """A queued AI generation (skill-gap analysis, roadmap, ...) processed by the background workers."""
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)           # uuid4
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued / running / done / failed / cancelled
+    payload = Column(Text, default="{}")                # JSON string
+    result = Column(Text, nullable=True)                # JSON string
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class SharedState(Base):
+    """Key-value state shared by every worker process (see utils/shared_state.py)."""
+    __tablename__ = "shared_state"
+
+    key = Column(String(255), primary_key=True)
+    value = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=True, index=True)
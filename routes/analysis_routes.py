@@ -1,13 +1,19 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from sqlalchemy.orm import Session
 from db import get_db
-from models import User, Resume, JobDescription, SkillAnalysis, GeneratedProject, GeneratedRoadmap
+from models import User, Resume, JobDescription, SkillAnalysis
 from schemas.job_schema import JobDescriptionRequest, JobDescriptionResponse
 from schemas.skill_schema import SkillAnalysisResponse
 from utils.jwt_handler import get_current_user
 from utils.skill_matcher import analyse_skill_gap
 from utils.streak_logic import add_xp, update_streak, XP_PER_ANALYSIS
+from utils import badges
+from utils.http_cache import touch
+from utils.job_queue import register_handler, enqueue, accepted
+from utils.prefetch import schedule_prefetch
+from utils.resume_parser import JD_MAX_CHARS, extract_upload
 
 router = APIRouter(prefix="/analysis", tags=["Skill Gap Analysis"])
 
@@ -19,10 +25,26 @@ def upload_jd(
     current_user: User = Depends(get_current_user),
 ):
     """Save a job description for the current user."""
+    return _save_jd(db, current_user, payload.company_name, payload.jd_text)
+
+
+@router.post("/jd/upload", response_model=JobDescriptionResponse, status_code=201)
+async def upload_jd_file(
+    file: UploadFile = File(...),
+    company_name: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Save a job description uploaded as a PDF, DOCX or plain-text file."""
+    text = await extract_upload(file, JD_MAX_CHARS)
+    return _save_jd(db, current_user, company_name, text)
+
+
+def _save_jd(db: Session, user: User, company_name: Optional[str], jd_text: str) -> JobDescription:
     jd = JobDescription(
-        user_id=current_user.id,
-        company_name=payload.company_name,
-        jd_text=payload.jd_text,
+        user_id=user.id,
+        company_name=company_name,
+        jd_text=jd_text,
     )
     db.add(jd)
     db.commit()
@@ -30,18 +52,11 @@ def upload_jd(
     return jd
 
 
-@router.get("/skill-gap", response_model=SkillAnalysisResponse)
-def get_skill_gap(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Compare the user's latest resume against their latest JD.
-    Returns matched skills, missing skills, and match percentage.
-    """
+def _latest_inputs(db: Session, user: User):
+    """Return the user's latest (resume, jd), or 404 if either is missing."""
     resume = (
         db.query(Resume)
-        .filter(Resume.user_id == current_user.id)
+        .filter(Resume.user_id == user.id)
         .order_by(Resume.uploaded_at.desc())
         .first()
     )
@@ -50,12 +65,18 @@ def get_skill_gap(
 
     jd = (
         db.query(JobDescription)
-        .filter(JobDescription.user_id == current_user.id)
+        .filter(JobDescription.user_id == user.id)
         .order_by(JobDescription.uploaded_at.desc())
         .first()
     )
     if not jd:
         raise HTTPException(status_code=404, detail="Upload a job description first")
+    return resume, jd
+
+
+def run_skill_gap(db: Session, current_user: User) -> SkillAnalysisResponse:
+    """Run the AI comparison, store a new SkillAnalysis and award XP."""
+    resume, jd = _latest_inputs(db, current_user)
 
     result = analyse_skill_gap(resume.resume_text, jd.jd_text)
 
@@ -66,17 +87,20 @@ def get_skill_gap(
         match_percentage=result["match_percentage"],
     )
     db.add(analysis)
-    
-    # Clear old AI content so new ones are generated uniquely for this analysis
-    db.query(GeneratedRoadmap).filter(GeneratedRoadmap.user_id == current_user.id).delete()
-    db.query(GeneratedProject).filter(GeneratedProject.user_id == current_user.id).delete()
-    
+    touch(db, current_user.id, "dashboard", "roadmap")
+    # The saved roadmap is keyed by its missing-skill set; GET /roadmap rebuilds it
+    # incrementally (reusing per-skill fragments) when this analysis changes the set
     db.commit()
     db.refresh(analysis)
 
     # Award XP and update streak
     add_xp(current_user, XP_PER_ANALYSIS, db)
     update_streak(current_user, db)
+    new_badges = badges.emit(db, current_user.id, "skill_gap_analysed",
+                             match_percentage=result["match_percentage"], streak=current_user.streak)
+
+    # Opt-in: start generating the roadmap / first test before the user asks
+    schedule_prefetch(db, current_user.id, analysis.id, result["missing_skills"])
 
     return SkillAnalysisResponse(
         id=analysis.id,
@@ -84,4 +108,29 @@ def get_skill_gap(
         matched_skills=result["matched_skills"],
         missing_skills=result["missing_skills"],
         match_percentage=result["match_percentage"],
+        new_badges=new_badges,
     )
+
+
+@register_handler("skill_gap")
+def _skill_gap_job(db: Session, user: User, payload: dict) -> dict:
+    return run_skill_gap(db, user).model_dump()
+
+
+@router.get("/skill-gap", response_model=SkillAnalysisResponse, responses={202: {"description": "Job accepted"}})
+def get_skill_gap(
+    background: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Compare the user's latest resume against their latest JD.
+    Returns matched skills, missing skills, and match percentage.
+
+    With `?background=true` the analysis is queued instead and a 202 with a
+    job id is returned — poll GET /jobs/{id} or subscribe to /jobs/{id}/events.
+    """
+    if background:
+        _latest_inputs(db, current_user)  # fail fast with 404 before queueing
+        return accepted(enqueue(db, current_user.id, "skill_gap"))
+    return run_skill_gap(db, current_user)
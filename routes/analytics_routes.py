@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from db import get_db
+from models import User
+from schemas.analytics_schema import UserAnalyticsResponse, CohortAnalyticsResponse
+from utils.jwt_handler import get_current_user, get_current_admin
+from utils.analytics import user_analytics, cohort_mastery
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/", response_model=UserAnalyticsResponse)
+def get_my_analytics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Per-skill mastery, readiness for the latest JD, and roadmap progress."""
+    return user_analytics(db, current_user)
+
+
+@router.get("/cohort", response_model=CohortAnalyticsResponse)
+def get_cohort_analytics(
+    persist: bool = False,
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin),
+):
+    """
+    Admin only: recompute mastery for every user and skill from the full test history
+    and summarise it per skill. `?persist=true` also rebuilds the stored mastery table.
+    """
+    return cohort_mastery(db, persist=persist)
@@ -5,16 +5,24 @@ from db import get_db
 from models import User, SkillAnalysis, Progress, TestResult
 from schemas.dashboard_schema import DashboardResponse
 from utils.jwt_handler import get_current_user
+from utils.analytics import user_analytics
+from utils.badges import badge_catalogue
+from utils.http_cache import conditional
+from utils import project_progress, xp_buffer
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/", response_model=DashboardResponse)
 def get_dashboard(
+    etag: str = Depends(conditional("dashboard")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Return a summary dashboard for the current user."""
+    """
+    Return a summary dashboard for the current user.
+    Send the last ETag in If-None-Match to get a 304 while nothing has changed.
+    """
 
     # Latest skill analysis
     analysis = (
@@ -51,23 +59,31 @@ def get_dashboard(
         for t in recent_tests
     ]
 
+    analytics = user_analytics(db, current_user)
+
+    # Include gamification writes still waiting in the write-behind buffer
+    xp_state = xp_buffer.projected(current_user)
+    projects = project_progress.all_progress(db, current_user.id)
+
     return DashboardResponse(
         user_name=current_user.name,
         email=current_user.email,
-        xp=current_user.xp,
-        level=current_user.level,
-        xp_to_next=current_user.xp_to_next,
+        xp=xp_state["xp"],
+        level=xp_state["level"],
+        xp_to_next=xp_state["xp_to_next"],
         streak=current_user.streak,
         match_percentage=match_percentage,
         matched_skills=matched_skills,
         missing_skills=missing_skills,
         total_progress_percentage=total_progress,
+        readiness_percentage=analytics["readiness_percentage"],
+        skill_mastery=analytics["skills"],
         completed_skills=completed_skills,
         recent_test_scores=recent_test_scores,
-        earned_badges=json.loads(current_user.earned_badges) if current_user.earned_badges else [],
-        daily_xp=json.loads(current_user.daily_xp) if current_user.daily_xp else {},
+        earned_badges=[b["id"] for b in badge_catalogue(db, current_user.id) if b["earned"]],
+        daily_xp=json.loads(xp_state["daily_xp"]) if xp_state["daily_xp"] else {},
         project_progress=[
-            {"project_id": p.project_id, "completed_steps": json.loads(p.completed_steps)}
-            for p in current_user.project_progress
+            {"project_id": project_id, "completed_steps": steps}
+            for project_id, steps in projects.items()
         ]
     )
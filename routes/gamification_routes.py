@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from db import get_db
-from models import User, ProjectProgress
-import json
+from models import User
 from utils.jwt_handler import get_current_user
-from utils.streak_logic import give_badge, add_xp
+from utils.streak_logic import add_xp, XP_PER_PROJECT_STEP
+from utils import badges, leaderboard, project_progress, xp_buffer
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 
 router = APIRouter(prefix="/gamification", tags=["Gamification & Projects"])
 
@@ -17,15 +17,50 @@ class ProjectStepUpdate(BaseModel):
     project_id: str
     completed_steps: List[int]
 
-@router.post("/badge")
+class ProjectStepDelta(BaseModel):
+    mark: List[int] = []
+    unmark: List[int] = []
+
+@router.get("/badges")
+def list_badges(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Every badge with whether the current user has earned it and their progress towards it."""
+    return {"badges": badges.badge_catalogue(db, current_user.id)}
+
+@router.post("/badge", status_code=410)
 def award_badge(
     payload: BadgeRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Deprecated: badges are awarded by the server from test, analysis and project activity."""
+    raise HTTPException(status_code=410, detail="Badges are awarded automatically; see GET /gamification/badges")
+
+def _step_response(db: Session, user: User, project_id: str, mark, unmark) -> dict:
+    """Apply a step delta; XP and badge progress only count steps completed for the first time."""
+    steps, newly_completed = project_progress.update_steps(db, user.id, project_id, mark, unmark)
+    new_badges = []
+    if newly_completed:
+        add_xp(user, XP_PER_PROJECT_STEP * newly_completed, db)
+        new_badges = badges.emit(db, user.id, "project_step", steps_added=newly_completed)
+    return {
+        "status": "success",
+        "project_id": project_id,
+        "completed_steps": steps,
+        "xp_awarded": XP_PER_PROJECT_STEP * newly_completed,
+        "new_badges": new_badges,
+    }
+
+@router.patch("/project/{project_id}/steps")
+def update_project_steps(
+    project_id: str,
+    payload: ProjectStepDelta,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Award a badge to the current user."""
-    give_badge(current_user, payload.badge_id, db)
-    return {"status": "success", "earned_badges": json.loads(current_user.earned_badges)}
+    """Mark and/or unmark individual steps of a project."""
+    return _step_response(db, current_user, project_id, payload.mark, payload.unmark)
 
 @router.post("/project/step")
 def update_project_step(
@@ -33,28 +68,21 @@ def update_project_step(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update completed steps for a specific project."""
-    project = db.query(ProjectProgress).filter(
-        ProjectProgress.user_id == current_user.id,
-        ProjectProgress.project_id == payload.project_id
-    ).first()
+    """Replace a project's completed steps with the given list."""
+    target = set(payload.completed_steps)
+    unmark = [i for i in range(project_progress.MAX_STEPS) if i not in target]
+    return _step_response(db, current_user, payload.project_id, target, unmark)
 
-    if not project:
-        project = ProjectProgress(
-            user_id=current_user.id,
-            project_id=payload.project_id,
-            completed_steps=json.dumps(payload.completed_steps)
-        )
-        db.add(project)
-    else:
-        project.completed_steps = json.dumps(payload.completed_steps)
-    
-    # Award minor XP for project progress
-    add_xp(current_user, 20, db)
-    
-    db.commit()
-    db.refresh(project)
-    return {"status": "success", "project_id": project.project_id, "completed_steps": json.loads(project.completed_steps)}
+@router.get("/projects")
+def list_project_progress(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Completed steps of every project the user has started."""
+    return {"projects": [
+        {"project_id": project_id, "completed_steps": steps}
+        for project_id, steps in project_progress.all_progress(db, current_user.id).items()
+    ]}
 
 class XPRequest(BaseModel):
     amount: int
@@ -68,4 +96,29 @@ def add_user_xp(
     """Manually add XP for an activity (e.g. Games)."""
     add_xp(current_user, payload.amount, db)
     db.commit()
-    return {"status": "success", "total_xp": current_user.xp, "level": current_user.level}
+    state = xp_buffer.projected(current_user)
+    return {"status": "success", "total_xp": state["xp"], "level": state["level"]}
+
+@router.get("/leaderboard")
+def get_leaderboard(
+    window: Literal["all", "week"] = "all",
+    week: Optional[str] = Query(None, pattern=r"^\d{4}-W\d{2}$", description="ISO week, e.g. 2025-W07 (default: current)"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Top users by lifetime XP, or by XP earned in one ISO week."""
+    board = leaderboard.resolve_board(window, week)
+    return {"window": board, "entries": leaderboard.top(db, board, limit)}
+
+@router.get("/leaderboard/me")
+def get_my_rank(
+    window: Literal["all", "week"] = "all",
+    week: Optional[str] = Query(None, pattern=r"^\d{4}-W\d{2}$"),
+    radius: int = Query(5, ge=0, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The current user's rank plus the `radius` users just above and below."""
+    board = leaderboard.resolve_board(window, week)
+    return {"window": board, **leaderboard.around(db, board, current_user.id, radius)}
@@ -0,0 +1,67 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from db import get_db, SessionLocal
+from models import User, Job
+from utils.jwt_handler import get_current_user
+from utils.job_queue import job_to_dict, TERMINAL_STATUSES
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+# How often the SSE stream re-reads the job row
+EVENTS_POLL_SECONDS = 0.5
+
+
+def _get_own_job(db: Session, job_id: str, user: User) -> Job:
+    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}")
+def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Poll the status of a background job; `result` is set once status is "done"."""
+    return job_to_dict(_get_own_job(db, job_id, current_user))
+
+
+def _load_job(job_id: str) -> dict:
+    db = SessionLocal()
+    try:
+        return job_to_dict(db.query(Job).filter(Job.id == job_id).first())
+    finally:
+        db.close()
+
+
+@router.get("/{job_id}/events")
+def job_events(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-Sent Events stream for a job: one `status` event per status change,
+    then a final `done` or `failed` event carrying the result, and the stream closes.
+    """
+    _get_own_job(db, job_id, current_user)
+
+    async def stream():
+        last_status = None
+        while True:
+            job = await asyncio.to_thread(_load_job, job_id)
+            if job["status"] in TERMINAL_STATUSES:
+                yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: status\ndata: {json.dumps({'job_id': job_id, 'status': last_status})}\n\n"
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
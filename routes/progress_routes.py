@@ -5,11 +5,14 @@ from db import get_db
 from models import User, Progress
 from schemas.progress_schema import ProgressUpdate, ProgressResponse
 from utils.jwt_handler import get_current_user
+from utils.analytics import refresh_progress
+from utils.http_cache import conditional
 
 router = APIRouter(prefix="/progress", tags=["Progress Tracking"])
 
 @router.get("/", response_model=ProgressResponse)
 def get_progress(
+    etag: str = Depends(conditional("progress")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -41,10 +44,9 @@ def update_progress(
         db.add(progress)
 
     progress.completed_skills = json.dumps(payload.completed_skills)
-    
-    # In a real app, we'd calculate % based on the roadmap length
-    # For now, we'll just store the list
-    db.commit()
+
+    # % of roadmap weeks whose skills are all completed or mastered in tests
+    refresh_progress(db, current_user.id, progress)
     db.refresh(progress)
 
     return {
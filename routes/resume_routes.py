@@ -4,7 +4,8 @@ from db import get_db
 from models import User, Resume
 from schemas.resume_schema import ResumeUploadResponse
 from utils.jwt_handler import get_current_user
-from utils.resume_parser import extract_text_from_pdf
+from utils.resume_parser import RESUME_MAX_CHARS, extract_upload
+from utils.http_cache import conditional, touch
 
 router = APIRouter(prefix="/resume", tags=["Resume"])
 
@@ -15,18 +16,12 @@ async def upload_resume(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Upload a PDF resume, extract text, and save to DB."""
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
-
-    contents = await file.read()
-    text = extract_text_from_pdf(contents)
-
-    if not text.strip():
-        raise HTTPException(status_code=422, detail="Could not extract text from the PDF")
+    """Upload a resume (PDF, DOCX or plain text), extract its text, and save to DB."""
+    text = await extract_upload(file, RESUME_MAX_CHARS)
 
     resume = Resume(user_id=current_user.id, resume_text=text)
     db.add(resume)
+    touch(db, current_user.id, "resume")
     db.commit()
     db.refresh(resume)
     return resume
@@ -34,6 +29,7 @@ async def upload_resume(
 
 @router.get("/latest", response_model=ResumeUploadResponse)
 def get_latest_resume(
+    etag: str = Depends(conditional("resume")),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -1,22 +1,125 @@
 import json
+import os
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from db import get_db
-from models import User, SkillAnalysis, GeneratedProject, GeneratedRoadmap
+from db import get_db, SessionLocal
+from models import User, SkillAnalysis, GeneratedProject, GeneratedRoadmap, RoadmapFragment
 from utils.jwt_handler import get_current_user
-from utils.roadmap_generator import generate_roadmap, generate_mini_projects
+from utils.roadmap_generator import (
+    generate_skill_fragments,
+    stream_skill_fragments,
+    generate_mini_projects,
+    assemble_roadmap,
+    all_set_roadmap,
+    skill_key,
+    skills_set_key,
+    ROADMAP_WEEKS_PER_SKILL,
+)
+from utils.job_queue import register_handler, enqueue, accepted
+from utils.prefetch import is_superseded
+from utils.responses import RawJSONResponse, dumps
+from utils.http_cache import cache_headers, conditional, touch
+from utils import shared_state
 
 router = APIRouter(prefix="/roadmap", tags=["AI Roadmap"])
 
+# Serialises roadmap generation per user, across every worker process, so a
+# double-click can't create duplicate rows. The lease outlives a slow generation;
+# it only matters if the worker holding it dies.
+ROADMAP_LOCK_TTL_SECONDS = float(os.getenv("ROADMAP_LOCK_TTL_SECONDS", "300"))
+_roadmap_locks = shared_state.namespace("roadmap_lock")
 
-@router.get("/")
-def get_roadmap(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+
+def _latest_roadmap(db: Session, user_id: int):
+    return (
+        db.query(GeneratedRoadmap)
+        .filter(GeneratedRoadmap.user_id == user_id)
+        .order_by(GeneratedRoadmap.id.desc())
+        .first()
+    )
+
+
+def _projects_for(db: Session, user_id: int) -> list:
+    projects = db.query(GeneratedProject).filter(GeneratedProject.user_id == user_id).all()
+    return [
+        {
+            "id": p.id,
+            "title": p.title,
+            "difficulty": p.difficulty,
+            "description": p.description,
+            "features": json.loads(p.features)
+        }
+        for p in projects
+    ]
+
+
+def _current_roadmap(db: Session, user_id: int, missing_skills: list):
+    """The saved roadmap if it was built for exactly this missing-skill set, else None."""
+    roadmap = _latest_roadmap(db, user_id)
+    if roadmap and roadmap.skills_key == skills_set_key(missing_skills):
+        return roadmap
+    return None
+
+
+def _reusable_fragments(db: Session, user_id: int, missing_skills: list) -> tuple:
     """
-    Generate an AI-based weekly roadmap from the user's latest skill analysis.
+    Split the missing skills into those with a stored week fragment (returned
+    as {skill: weeks}) and those that still need generating. Fragments for skills
+    that are no longer missing are dropped.
     """
+    wanted = {skill_key(s): s for s in missing_skills}
+    reused = {}
+    for fragment in db.query(RoadmapFragment).filter(RoadmapFragment.user_id == user_id).all():
+        if fragment.skill_key in wanted:
+            reused[wanted[fragment.skill_key]] = json.loads(fragment.weeks_data)
+        else:
+            db.delete(fragment)
+    db.commit()
+    return reused, [s for s in missing_skills if s not in reused]
+
+
+def _save_fragments(db: Session, user_id: int, fragments: dict) -> None:
+    stored = {k for (k,) in db.query(RoadmapFragment.skill_key).filter(RoadmapFragment.user_id == user_id)}
+    for skill, weeks in fragments.items():
+        if skill_key(skill) not in stored:
+            db.add(RoadmapFragment(user_id=user_id, skill_key=skill_key(skill), skill=skill,
+                                   weeks_data=json.dumps(weeks)))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # another worker stored these skills first; its weeks serve as well
+
+
+def _save_generated(db: Session, user_id: int, missing_skills: list,
+                    roadmap_data: list, projects_data: list, complete: bool = True) -> None:
+    """
+    Replace the user's roadmap and mini projects with freshly assembled ones.
+    An incomplete roadmap (some skills fell back to placeholder weeks) is saved
+    without its skills_key, so the next request generates those skills again.
+    """
+    # Normally no ETag bump: the content follows the latest analysis, whose commit already
+    # bumped "roadmap". Incomplete roadmaps, and the ones replacing them, change under that tag.
+    previous = _latest_roadmap(db, user_id)
+    if not complete or (previous is not None and previous.skills_key is None):
+        touch(db, user_id, "roadmap")
+    db.query(GeneratedRoadmap).filter(GeneratedRoadmap.user_id == user_id).delete()
+    db.query(GeneratedProject).filter(GeneratedProject.user_id == user_id).delete()
+    db.add(GeneratedRoadmap(user_id=user_id, roadmap_data=dumps(roadmap_data),
+                            skills_key=skills_set_key(missing_skills) if complete else None))
+    for p in projects_data:
+        db.add(GeneratedProject(
+            user_id=user_id,
+            title=p["title"],
+            difficulty=p["difficulty"],
+            description=p["description"],
+            features=json.dumps(p["features"])
+        ))
+    db.commit()
+
+
+def _latest_analysis(db: Session, current_user: User) -> SkillAnalysis:
     analysis = (
         db.query(SkillAnalysis)
         .filter(SkillAnalysis.user_id == current_user.id)
@@ -28,53 +131,195 @@ def get_roadmap(
             status_code=404,
             detail="Run a skill-gap analysis first (POST /analysis/jd then GET /analysis/skill-gap)",
         )
+    return analysis
+
+
+def _save_roadmap(db: Session, user_id: int, analysis_id: int, missing_skills: list,
+                  fragments: dict, generated: dict, fallback: list) -> list:
+    """
+    Store the newly generated fragments (not the fallback ones), assemble the
+    roadmap in missing-skill order (the "all set" week when nothing is missing),
+    and save it with fresh mini projects unless a newer analysis replaced this
+    one meanwhile. Call with _roadmap_locks held.
+    """
+    _save_fragments(db, user_id, {s: w for s, w in generated.items() if s not in fallback})
+    if missing_skills:
+        roadmap_data = assemble_roadmap([(s, fragments[s]) for s in missing_skills])
+    else:
+        roadmap_data = all_set_roadmap()
+    projects_data = generate_mini_projects(missing_skills)
+    if not is_superseded(db, user_id, analysis_id):
+        _save_generated(db, user_id, missing_skills, roadmap_data, projects_data, complete=not fallback)
+    return roadmap_data
+
+
+def _ensure_roadmap(db: Session, current_user: User) -> tuple:
+    """
+    Return (analysis, roadmap JSON text) for the user's latest analysis,
+    generating and saving the roadmap + mini projects if needed.
+
+    The roadmap is assembled from per-skill week fragments: fragments for skills
+    that are still missing are reused, so only newly missing skills cost an AI call.
+    """
+    analysis = _latest_analysis(db, current_user)
 
     missing_skills = json.loads(analysis.missing_skills) if analysis.missing_skills else []
 
-    # Check if we already have a generated roadmap for this specific analysis session
-    existing_roadmap = db.query(GeneratedRoadmap).filter(GeneratedRoadmap.user_id == current_user.id).order_by(GeneratedRoadmap.id.desc()).first()
-    
+    existing_roadmap = _current_roadmap(db, current_user.id, missing_skills)
+
     if not existing_roadmap:
-        # Generate and save new unique roadmap
-        roadmap_data = generate_roadmap(missing_skills)
-        new_roadmap = GeneratedRoadmap(
-            user_id=current_user.id,
-            roadmap_data=json.dumps(roadmap_data)
-        )
-        db.add(new_roadmap)
-        
-        # Also generate and save unique mini projects
-        projects_data = generate_mini_projects(missing_skills)
-        for p in projects_data:
-            new_project = GeneratedProject(
-                user_id=current_user.id,
-                title=p["title"],
-                difficulty=p["difficulty"],
-                description=p["description"],
-                features=json.dumps(p["features"])
-            )
-            db.add(new_project)
-        
-        db.commit()
-    else:
-        roadmap_data = json.loads(existing_roadmap.roadmap_data)
+        with _roadmap_locks.lock(str(current_user.id), ROADMAP_LOCK_TTL_SECONDS):
+            # Another request may have generated it while we waited for the lock
+            existing_roadmap = _current_roadmap(db, current_user.id, missing_skills)
+            if not existing_roadmap:
+                fragments, new_skills = _reusable_fragments(db, current_user.id, missing_skills)
+                generated, fallback = generate_skill_fragments(new_skills)
+                fragments.update(generated)
+                roadmap_data = _save_roadmap(db, current_user.id, analysis.id, missing_skills,
+                                             fragments, generated, fallback)
+                return analysis, dumps(roadmap_data)
 
-    # Fetch projects for this user
-    projects = db.query(GeneratedProject).filter(GeneratedProject.user_id == current_user.id).all()
-    projects_list = [
-        {
-            "id": p.id,
-            "title": p.title,
-            "difficulty": p.difficulty,
-            "description": p.description,
-            "features": json.loads(p.features)
-        }
-        for p in projects
-    ]
+    return analysis, existing_roadmap.roadmap_data
 
+
+def build_roadmap(db: Session, current_user: User) -> dict:
+    """Return the user's roadmap + mini projects, generating and saving them if needed."""
+    analysis, roadmap_json = _ensure_roadmap(db, current_user)
     return {
         "user_id": current_user.id,
         "match_percentage": analysis.match_percentage,
-        "roadmap": roadmap_data,
-        "mini_projects": projects_list,
+        "roadmap": json.loads(roadmap_json),
+        "mini_projects": _projects_for(db, current_user.id),
     }
+
+
+@register_handler("roadmap")
+def _roadmap_job(db: Session, user: User, payload: dict) -> dict:
+    return build_roadmap(db, user)
+
+
+@register_handler("prefetch_roadmap")
+def _prefetch_roadmap_job(db: Session, user: User, payload: dict) -> dict:
+    """Warm the roadmap right after an analysis (see utils/prefetch.py)."""
+    if is_superseded(db, user.id, payload["analysis_id"]):
+        return {"skipped": "superseded"}
+    roadmap = build_roadmap(db, user)
+    return {"weeks": len(roadmap["roadmap"]), "mini_projects": len(roadmap["mini_projects"])}
+
+
+@router.get("/", responses={202: {"description": "Job accepted"}})
+def get_roadmap(
+    background: bool = False,
+    etag: str = Depends(conditional("roadmap")),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Generate an AI-based weekly roadmap from the user's latest skill analysis.
+
+    With `?background=true` a roadmap that still needs generating is queued and
+    a 202 with a job id is returned; an existing roadmap is returned directly.
+    Send the last ETag in If-None-Match to get a 304 while nothing has changed.
+    """
+    if background:
+        analysis = _latest_analysis(db, current_user)  # fail fast with 404 before queueing
+        missing_skills = json.loads(analysis.missing_skills) if analysis.missing_skills else []
+        if not _current_roadmap(db, current_user.id, missing_skills):
+            return accepted(enqueue(db, current_user.id, "roadmap"))
+
+    # The stored roadmap is already JSON — splice it in rather than decode and re-encode it
+    analysis, roadmap_json = _ensure_roadmap(db, current_user)
+    head = dumps({"user_id": current_user.id, "match_percentage": analysis.match_percentage})
+    tail = dumps(_projects_for(db, current_user.id))
+    return RawJSONResponse(f'{head[:-1]},"roadmap":{roadmap_json},"mini_projects":{tail}}}',
+                           headers=cache_headers(etag))
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/stream")
+def stream_roadmap_events(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-Sent Events version of GET /roadmap.
+    Emits one `week` event per roadmap week, in the same order GET /roadmap
+    returns them: weeks reused from earlier analyses immediately, new ones as
+    soon as the AI finishes them and every earlier skill's weeks are out. Then a
+    `projects` event, then `done` once everything is saved.
+    An already-saved roadmap for the same skill set is replayed immediately.
+    """
+    analysis = _latest_analysis(db, current_user)
+    missing_skills = json.loads(analysis.missing_skills) if analysis.missing_skills else []
+    user_id, analysis_id = current_user.id, analysis.id
+    existing = _current_roadmap(db, user_id, missing_skills)
+    saved_weeks = json.loads(existing.roadmap_data) if existing else None
+    reused, new_skills = ({}, []) if existing else _reusable_fragments(db, user_id, missing_skills)
+
+    def events():
+        if saved_weeks is not None:
+            for week in saved_weeks:
+                yield _sse("week", week)
+            session = SessionLocal()
+            try:
+                yield _sse("projects", _projects_for(session, user_id))
+            finally:
+                session.close()
+            yield _sse("done", {"cached": True, "weeks": len(saved_weeks)})
+            return
+
+        # Weeks go out in missing-skill order, the order the saved roadmap uses:
+        # a skill's weeks are held back until every earlier skill is complete
+        fragments, generated, fallback = dict(reused), {}, []
+        complete = set(reused)
+        weeks = []
+        current, sent = 0, 0  # index into missing_skills, weeks of that skill already sent
+
+        def ready():
+            nonlocal current, sent
+            while current < len(missing_skills):
+                skill = missing_skills[current]
+                blocks = fragments.get(skill) or generated.get(skill, [])
+                for week in blocks[sent:]:
+                    sent += 1
+                    week = assemble_roadmap([(skill, [week])], start=len(weeks) + 1)[0]
+                    weeks.append(week)
+                    yield _sse("week", week)
+                if skill not in complete:
+                    return
+                current, sent = current + 1, 0
+
+        yield from ready()
+        for skill, week, is_fallback in stream_skill_fragments(new_skills):
+            generated.setdefault(skill, []).append(week)
+            if is_fallback and skill not in fallback:
+                fallback.append(skill)
+            if len(generated[skill]) >= ROADMAP_WEEKS_PER_SKILL:
+                complete.add(skill)
+            yield from ready()
+        complete.update(missing_skills)  # the stream is over: whatever arrived is all there is
+        yield from ready()
+        if not missing_skills:
+            for week in all_set_roadmap():
+                weeks.append(week)
+                yield _sse("week", week)
+        fragments.update(generated)
+
+        # The request's own session may already be closed — use a fresh one
+        session = SessionLocal()
+        try:
+            with _roadmap_locks.lock(str(user_id), ROADMAP_LOCK_TTL_SECONDS):
+                # Another request may have saved this skill set while we streamed
+                if not _current_roadmap(session, user_id, missing_skills):
+                    _save_roadmap(session, user_id, analysis_id, missing_skills, fragments, generated, fallback)
+            projects = _projects_for(session, user_id)
+        finally:
+            session.close()
+        yield _sse("projects", projects)
+        yield _sse("done", {"cached": False, "weeks": len(weeks), "reused_skills": len(reused)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,5 +1,9 @@
+import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 from db import get_db
 from models import User, TestResult
@@ -11,33 +15,53 @@ from schemas.test_schema import (
     SubmitTestResponse,
     QuestionResult,
     TestResultResponse,
+    SkillHistoryStats,
 )
 from utils.jwt_handler import get_current_user
-from utils.test_generator import generate_test_questions
+from utils.adaptive_test import build_adaptive_test, record_answers
 from utils.streak_logic import add_xp, update_streak, XP_PER_TEST
+from utils.job_queue import register_handler
+from utils.prefetch import take_prefetched_test
+from utils.pagination import encode_cursor, decode_cursor
+from utils.analytics import record_test_result
+from utils import badges, shared_state
 
 router = APIRouter(prefix="/test", tags=["Mock Tests"])
 
-# In-memory store for active tests (test_id -> list of full question dicts)
-_active_tests: dict[str, list[dict]] = {}
+# Active tests (test_id -> list of full question dicts), shared by all worker processes
+ACTIVE_TEST_TTL_SECONDS = int(os.getenv("ACTIVE_TEST_TTL_SECONDS", str(6 * 3600)))
+_active_tests = shared_state.namespace("active_test", ttl=ACTIVE_TEST_TTL_SECONDS)
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
+
+
+@register_handler("prefetch_test")
+def _prefetch_test_job(db: Session, user: User, payload: dict) -> dict:
+    """Pre-select a test for the top missing skill (see utils/prefetch.py)."""
+    return {"questions": build_adaptive_test(db, user.id, payload["skill_name"])}
 
 
 @router.post("/generate", response_model=TestGenerateResponse)
 def generate_test(
     payload: TestRequest,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Generate MCQ questions for a skill.
+    """Generate MCQ questions for a skill, pitched at the user's current rating for it.
     Returns questions WITHOUT correct answers — user must submit answers to /test/check."""
-    questions = generate_test_questions(payload.skill_name, payload.num_questions)
+    questions = (
+        take_prefetched_test(db, current_user.id, payload.skill_name, payload.num_questions)
+        or build_adaptive_test(db, current_user.id, payload.skill_name, payload.num_questions)
+    )
 
     # Create a unique test ID and store the full questions (with answers) server-side
     test_id = str(uuid.uuid4())
-    _active_tests[test_id] = questions
+    _active_tests.set_json(test_id, questions)
 
     # Return questions WITHOUT correct_answer or explanation
     questions_out = [
-        QuestionOut(id=i, question=q["question"], options=q["options"])
+        QuestionOut(id=i, question=q["question"], options=q["options"], difficulty=q.get("difficulty"))
         for i, q in enumerate(questions)
     ]
 
@@ -55,13 +79,13 @@ def check_answers(
     current_user: User = Depends(get_current_user),
 ):
     """Submit your answers and get right/wrong results for each question."""
-    if payload.test_id not in _active_tests:
+    full_questions = _active_tests.pop_json(payload.test_id)  # remove after checking
+    if full_questions is None:
         raise HTTPException(status_code=404, detail="Test not found or already submitted")
-
-    full_questions = _active_tests.pop(payload.test_id)  # remove after checking
     total = len(full_questions)
     correct_count = 0
     results = []
+    outcomes = []
 
     for ans in payload.answers:
         if ans.question_id < 0 or ans.question_id >= total:
@@ -71,6 +95,7 @@ def check_answers(
         is_correct = ans.selected_answer.strip().lower() == q["correct_answer"].strip().lower()
         if is_correct:
             correct_count += 1
+        outcomes.append((q.get("pool_id"), is_correct))
 
         results.append(QuestionResult(
             question_id=ans.question_id,
@@ -92,10 +117,13 @@ def check_answers(
     db.add(test_result)
     db.commit()
     db.refresh(test_result)
+    record_test_result(db, current_user.id, payload.skill_name, score)
+    rating = record_answers(db, current_user.id, payload.skill_name, outcomes)
 
     # Award XP and update streak
     add_xp(current_user, XP_PER_TEST, db)
     update_streak(current_user, db)
+    new_badges = badges.emit(db, current_user.id, "test_completed", score=score, streak=current_user.streak)
 
     return SubmitTestResponse(
         skill_name=payload.skill_name,
@@ -103,19 +131,117 @@ def check_answers(
         correct_count=correct_count,
         score=score,
         results=results,
+        rating=round(rating, 1),
+        new_badges=new_badges,
     )
 
 
+def _history_query(db: Session, user_id: int, skill: Optional[str],
+                   date_from: Optional[datetime], date_to: Optional[datetime]):
+    query = db.query(TestResult).filter(TestResult.user_id == user_id)
+    if skill:
+        query = query.filter(func.lower(TestResult.skill_name) == skill.strip().lower())
+    if date_from:
+        query = query.filter(TestResult.taken_at >= date_from)
+    if date_to:
+        query = query.filter(TestResult.taken_at <= date_to)
+    return query
+
+
 @router.get("/history", response_model=list[TestResultResponse])
 def get_test_history(
+    request: Request,
+    response: Response,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    skill: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Return the current user's test results, newest first, one page at a time.
+    Optionally filter by `skill` and a `date_from` / `date_to` range.
+
+    When more results exist the response carries an `X-Next-Cursor` header
+    (and a `Link: rel="next"`); pass it back as `?cursor=` for the next page.
+    """
+    query = _history_query(db, current_user.id, skill, date_from, date_to)
+    if cursor:
+        taken_at, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            TestResult.taken_at < taken_at,
+            and_(TestResult.taken_at == taken_at, TestResult.id < last_id),
+        ))
+    results = query.order_by(TestResult.taken_at.desc(), TestResult.id.desc()).limit(limit + 1).all()
+
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor(results[-1].taken_at, results[-1].id)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return results
+
+
+@router.get("/history/stats", response_model=list[SkillHistoryStats])
+def get_test_history_stats(
+    skill: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Return all test results for the current user."""
-    results = (
-        db.query(TestResult)
-        .filter(TestResult.user_id == current_user.id)
-        .order_by(TestResult.taken_at.desc())
+    """
+    Per-skill aggregates over the (optionally filtered) history: number of tests,
+    mean and best score, last attempt, and trend — the least-squares slope of
+    score against attempt number. Everything is computed in the database.
+    """
+    # One series per skill regardless of case, as in utils/analytics.py; named as last taken
+    key = func.lower(TestResult.skill_name)
+    ordered = (
+        _history_query(db, current_user.id, skill, date_from, date_to)
+        .with_entities(
+            key.label("skill_key"),
+            func.first_value(TestResult.skill_name).over(
+                partition_by=key,
+                order_by=(TestResult.taken_at.desc(), TestResult.id.desc()),
+            ).label("skill_name"),
+            TestResult.score.label("score"),
+            TestResult.taken_at.label("taken_at"),
+            func.row_number().over(
+                partition_by=key,
+                order_by=(TestResult.taken_at, TestResult.id),
+            ).label("n"),
+        )
+        .subquery()
+    )
+    rows = (
+        db.query(
+            func.max(ordered.c.skill_name),
+            func.count(),
+            func.avg(ordered.c.score),
+            func.max(ordered.c.score),
+            func.max(ordered.c.taken_at),
+            func.sum(ordered.c.n),
+            func.sum(ordered.c.n * ordered.c.n),
+            func.sum(ordered.c.n * ordered.c.score),
+        )
+        .group_by(ordered.c.skill_key)
+        .order_by(func.count().desc())
         .all()
     )
-    return results
+
+    stats = []
+    for skill_name, count, mean, best, last, sum_x, sum_xx, sum_xy in rows:
+        denominator = count * sum_xx - sum_x * sum_x
+        trend = (count * sum_xy - sum_x * mean * count) / denominator if denominator else 0.0
+        stats.append(SkillHistoryStats(
+            skill_name=skill_name,
+            count=count,
+            mean_score=round(mean, 2),
+            best_score=best,
+            last_taken_at=last,
+            trend=round(trend, 3),
+        ))
+    return stats
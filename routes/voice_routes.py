@@ -12,11 +12,17 @@ POST /voice/transcribe
 
 POST /voice/tts
     Send text → return MP3 audio only
+
+All routes require a bearer token; the coach keeps one conversation per user.
+STT, Gemini and TTS calls block, so they run in the threadpool.
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
+from models import User
 from schemas.voice_schema import VoiceChatTextRequest, VoiceChatTextResponse, TranscriptionResponse
+from utils.jwt_handler import get_current_user
 from utils.voice_handler import speech_to_text, text_to_speech, ask_gemini
 from urllib.parse import quote
 import json
@@ -28,7 +34,7 @@ router = APIRouter(prefix="/voice", tags=["Voice Chat"])
 @router.post("/chat-audio")
 async def voice_chat_audio(
     audio: UploadFile = File(...),
-    user_email: str = Form("anonymous"),
+    current_user: User = Depends(get_current_user),
 ):
     """
     Full pipeline:
@@ -43,13 +49,13 @@ async def voice_chat_audio(
         content_type = audio.content_type or "audio/wav"
 
         # Step 1 — Speech to Text
-        user_text = speech_to_text(audio_bytes, content_type)
+        user_text = await run_in_threadpool(speech_to_text, audio_bytes, content_type)
 
         # Step 2 — Gemini AI
-        ai_response = ask_gemini(user_text, user_email)
+        ai_response = await run_in_threadpool(ask_gemini, user_text, current_user.email)
 
         # Step 3 — Text to Speech
-        audio_reply = text_to_speech(ai_response)
+        audio_reply = await run_in_threadpool(text_to_speech, ai_response)
 
         # Return audio with transcription & AI text in custom headers
         return Response(
@@ -70,6 +76,7 @@ async def voice_chat_audio(
 @router.post("/chat-text")
 async def voice_chat_text(
     request: VoiceChatTextRequest,
+    current_user: User = Depends(get_current_user),
 ):
     """
     Text pipeline:
@@ -79,8 +86,8 @@ async def voice_chat_text(
       4. Return MP3 audio along with AI text in headers
     """
     try:
-        ai_response = ask_gemini(request.message, request.user_email)
-        audio_reply = text_to_speech(ai_response)
+        ai_response = await run_in_threadpool(ask_gemini, request.message, current_user.email)
+        audio_reply = await run_in_threadpool(text_to_speech, ai_response)
 
         return Response(
             content=audio_reply,
@@ -100,12 +107,13 @@ async def voice_chat_text(
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     audio: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
 ):
     """Upload audio and get transcribed text back."""
     try:
         audio_bytes = await audio.read()
         content_type = audio.content_type or "audio/wav"
-        text = speech_to_text(audio_bytes, content_type)
+        text = await run_in_threadpool(speech_to_text, audio_bytes, content_type)
         return TranscriptionResponse(transcribed_text=text)
 
     except Exception as e:
@@ -117,10 +125,11 @@ async def transcribe_audio(
 async def tts_only(
     text: str = Form(...),
     lang: str = Form("en"),
+    current_user: User = Depends(get_current_user),
 ):
     """Convert text to speech and return MP3 audio."""
     try:
-        audio_bytes = text_to_speech(text, lang)
+        audio_bytes = await run_in_threadpool(text_to_speech, text, lang)
         return Response(content=audio_bytes, media_type="audio/mpeg")
 
     except Exception as e:
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class SkillMasteryOut(BaseModel):
+    skill_name: str
+    mastery: float
+    attempts: int
+    last_score: float
+    mastered: bool
+
+
+class UserAnalyticsResponse(BaseModel):
+    user_id: int
+    skills: List[SkillMasteryOut] = []
+    readiness_percentage: float
+    roadmap_progress_percentage: float
+
+
+class CohortSkillStats(BaseModel):
+    skill: str
+    learners: int
+    mean_mastery: float
+    median_mastery: float
+    p90_mastery: float
+    mastered_share: float
+
+
+class CohortAnalyticsResponse(BaseModel):
+    users: int
+    tests: int
+    skills: List[CohortSkillStats] = []
+    seconds: float
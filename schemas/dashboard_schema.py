@@ -13,6 +13,8 @@ class DashboardResponse(BaseModel):
     matched_skills: List[str] = []
     missing_skills: List[str] = []
     total_progress_percentage: float = 0.0
+    readiness_percentage: float = 0.0
+    skill_mastery: List[dict] = []
     completed_skills: List[str] = []
     recent_test_scores: List[dict] = []
     earned_badges: List[int] = []
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List
+
+
+# --- Shapes the AI agent must return (validated before saving) ---
+class RoadmapResource(BaseModel):
+    skill: str
+    url: str
+
+
+class RoadmapWeek(BaseModel):
+    """One week of an AI-generated learning roadmap."""
+    week: int
+    title: str
+    skills: List[str] = []
+    notes: str = ""
+    resources: List[RoadmapResource] = []
+
+
+class MiniProject(BaseModel):
+    """An AI-generated mini project idea."""
+    title: str
+    difficulty: str
+    description: str
+    features: List[str]
@@ -8,6 +8,7 @@ class SkillAnalysisResponse(BaseModel):
     matched_skills: List[str]
     missing_skills: List[str]
     match_percentage: float
+    new_badges: List[int] = []  # badges unlocked by this analysis
 
     class Config:
         from_attributes = True
@@ -9,6 +9,7 @@ class QuestionOut(BaseModel):
     id: int
     question: str
     options: List[str]
+    difficulty: Optional[str] = None
 
 
 # --- Full question with answer (used internally) ---
@@ -59,6 +60,8 @@ class SubmitTestResponse(BaseModel):
     correct_count: int
     score: float
     results: List[QuestionResult]
+    rating: Optional[float] = None  # adaptive skill rating after this test
+    new_badges: List[int] = []      # badges unlocked by this test
 
 
 class SubmitAnswerRequest(BaseModel):
@@ -75,3 +78,13 @@ class TestResultResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SkillHistoryStats(BaseModel):
+    """Per-skill aggregate over a user's test history."""
+    skill_name: str
+    count: int
+    mean_score: float
+    best_score: float
+    last_taken_at: Optional[datetime] = None
+    trend: float  # least-squares change in score per test (positive = improving)
@@ -1,11 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional
 
 
 class VoiceChatTextRequest(BaseModel):
     """Request body when sending a text message for voice chat."""
     message: str
-    user_email: Optional[str] = "anonymous"
 
 
 class VoiceChatTextResponse(BaseModel):
@@ -0,0 +1,55 @@
+"""
+Production entry point — N uvicorn worker processes sharing one listening socket.
+
+    python server.py                          # WEB_CONCURRENCY, else one worker per CPU core
+    python server.py --workers 4 --port 8000
+    gunicorn main:app -k uvicorn.workers.UvicornWorker -w 4   # equivalent, with gunicorn
+
+Run `python migrate.py` first. Every worker runs the full lifespan (its own DB
+pool, job workers), so per-process settings such as JOB_WORKERS and
+LLM_REQUESTS_PER_MINUTE are multiplied by the worker count. State every worker
+must see lives in the database or utils/shared_state.py — see SCALING.md.
+
+`python main.py` remains the single-process development server with auto-reload.
+"""
+
+import argparse
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--app", default="main:app", help="ASGI app import path")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if os.getenv("SHARED_STATE_BACKEND", "database").lower() == "memory":
+            parser.error("SHARED_STATE_BACKEND=memory keeps active tests and coach chats in one process; "
+                         "use database or redis with several workers")
+        if not os.getenv("LEADERBOARD_REDIS_URL"):
+            # Workers only see their own XP increments; reload boards from the ledger periodically
+            os.environ.setdefault("LEADERBOARD_REFRESH_SECONDS", "30")
+        # The XP write-behind buffer holds each worker's pending step claims in its own
+        # memory, so two workers could both pay for the same step; write XP directly
+        os.environ["XP_BUFFER_ENABLED"] = "false"
+
+    # Environment set above is inherited by the worker processes
+    uvicorn.run(args.app, host=args.host, port=args.port, workers=args.workers,
+                proxy_headers=True, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
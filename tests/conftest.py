@@ -0,0 +1,49 @@
+"""
+Shared fixtures: the app against a throwaway SQLite database, with Gemini,
+STT and TTS replaced by the deterministic fakes in benchmarks/fakes.py.
+"""
+
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Must be set before db / main are imported
+_db_dir = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("WARMUP_AI_STACKS", "false")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("LLM_BURST", "100000")
+os.environ.setdefault("ADMISSION_USER_RATE_PER_MINUTE", "1000000")
+os.environ.setdefault("ADMISSION_USER_BURST", "100000")
+
+
+@pytest.fixture(scope="session")
+def fake_model():
+    from benchmarks.fakes import FakeGenerativeModel, install_fakes
+
+    model = FakeGenerativeModel()
+    install_fakes(model)
+    return model
+
+
+@pytest.fixture(scope="session")
+def client(fake_model):
+    from fastapi.testclient import TestClient
+
+    import main
+    from migrate import migrate
+
+    migrate()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Bearer headers for a freshly signed-up user."""
+    email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+    client.post("/auth/signup", json={"name": "Test User", "email": email, "password": "test-pass"})
+    token = client.post("/auth/login", json={"email": email, "password": "test-pass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
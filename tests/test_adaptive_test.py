@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from models import PoolQuestion, SeenQuestion
+from utils import adaptive_test
+
+
+def test_least_recently_seen_follows_the_latest_sighting(client):
+    from db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user_id, skill = 900003, "repeat-skill"
+        pool = [PoolQuestion(skill_key=skill, difficulty="easy", rating=800, question=f"Q{i}?",
+                             options='["a", "b", "c", "d"]', correct_answer="a") for i in range(3)]
+        db.add_all(pool)
+        db.flush()
+        start = datetime(2026, 1, 1)
+        # Q0 was first seen earliest but served again most recently (a legacy duplicate row)
+        for question, minutes in ((pool[0], 0), (pool[1], 1), (pool[2], 2), (pool[0], 3)):
+            db.add(SeenQuestion(user_id=user_id, question_id=question.id, seen_at=start + timedelta(minutes=minutes)))
+        db.commit()
+
+        def next_repeat():
+            return adaptive_test._least_recently_seen(db, user_id, skill, "easy", set(), 1)
+
+        assert next_repeat() == [pool[1]]
+        adaptive_test._mark_seen(db, user_id, [pool[1].id])
+        db.commit()
+        assert next_repeat() == [pool[2]]
+        assert db.query(SeenQuestion).filter(SeenQuestion.question_id == pool[1].id).count() == 1
+        assert adaptive_test._least_recently_seen(db, user_id, skill, "easy", {pool[2].id}, 5) == [pool[0], pool[1]]
+    finally:
+        db.close()
@@ -0,0 +1,21 @@
+from benchmarks.load_test import JD_TEXT, RESUME_TEXT, make_pdf
+from utils import admission
+from utils.jwt_handler import user_id_from_token
+from utils.llm_resilience import TokenBucket
+
+
+def test_unchanged_roadmap_revalidation_skips_admission(client, auth_headers, monkeypatch):
+    client.post("/resume/upload", headers=auth_headers,
+                files={"file": ("resume.pdf", make_pdf(RESUME_TEXT), "application/pdf")})
+    client.post("/analysis/jd", headers=auth_headers, json={"company_name": "Acme", "jd_text": JD_TEXT})
+    client.get("/analysis/skill-gap", headers=auth_headers)
+    tag = client.get("/roadmap/", headers=auth_headers).headers["etag"]
+
+    # The user's bucket is now empty
+    user_id = user_id_from_token(auth_headers["Authorization"].split()[1])
+    empty = TokenBucket(1e-6, 1)
+    empty.try_acquire(1)
+    monkeypatch.setitem(admission._buckets, f"user:{user_id}", empty)
+
+    assert client.get("/roadmap/", headers={**auth_headers, "If-None-Match": tag}).status_code == 304
+    assert client.get("/roadmap/", headers={**auth_headers, "If-None-Match": '"stale"'}).status_code == 429
@@ -0,0 +1,45 @@
+from benchmarks.load_test import JD_TEXT, RESUME_TEXT, make_pdf
+
+
+def _upload_inputs(client, headers):
+    resume = client.post("/resume/upload", headers=headers,
+                         files={"file": ("resume.pdf", make_pdf(RESUME_TEXT), "application/pdf")})
+    assert resume.status_code == 201
+    jd = client.post("/analysis/jd", headers=headers, json={"company_name": "Acme", "jd_text": JD_TEXT})
+    assert jd.status_code == 201
+
+
+def test_skill_gap_returns_analysis_and_new_badges(client, auth_headers):
+    _upload_inputs(client, auth_headers)
+
+    response = client.get("/analysis/skill-gap", headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["missing_skills"] == ["Docker", "Kubernetes", "AWS"]
+    assert body["match_percentage"] == 50.0
+    assert 5 in body["new_badges"]  # "Gap Finder": first analysis
+
+
+def test_repeat_skill_gap_stores_a_new_analysis_without_repeating_badges(client, auth_headers):
+    _upload_inputs(client, auth_headers)
+    analysis = client.get("/analysis/skill-gap", headers=auth_headers).json()
+
+    again = client.get("/analysis/skill-gap", headers=auth_headers).json()
+
+    assert again["id"] > analysis["id"]
+    assert again["new_badges"] == []  # badges are awarded once
+
+
+def test_skill_gap_without_job_description_is_404(client, auth_headers):
+    client.post("/resume/upload", headers=auth_headers,
+                files={"file": ("resume.pdf", make_pdf(RESUME_TEXT), "application/pdf")})
+
+    response = client.get("/analysis/skill-gap", headers=auth_headers)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Upload a job description first"
+
+
+def test_skill_gap_requires_authentication(client):
+    assert client.get("/analysis/skill-gap").status_code == 401
@@ -0,0 +1,149 @@
+"""State that several worker processes race on: roadmap leases and project-step XP."""
+
+from datetime import datetime, timedelta
+
+from models import SharedState
+from utils import project_progress
+from utils.shared_state import DatabaseStore
+
+
+def test_database_lease_is_exclusive_until_released_or_expired(client):
+    from db import SessionLocal
+
+    store = DatabaseStore()
+    assert store.add("lease:a", "worker-1", ttl=60)
+    assert not store.add("lease:a", "worker-2", ttl=60)
+
+    store.delete_if("lease:a", "worker-2")  # not the holder: no effect
+    assert not store.add("lease:a", "worker-2", ttl=60)
+    store.delete_if("lease:a", "worker-1")
+    assert store.add("lease:a", "worker-2", ttl=60)
+
+    db = SessionLocal()
+    try:
+        db.query(SharedState).filter(SharedState.key == "lease:a").update(
+            {SharedState.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+    finally:
+        db.close()
+    assert store.add("lease:a", "worker-3", ttl=60)  # the holder died
+
+
+def test_step_completed_by_two_workers_pays_xp_once(client):
+    from db import SessionLocal
+
+    user_id, project_id = 900001, "race-project"
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # Both workers read "no progress yet" before either writes
+        stale = project_progress.steps_to_mask([0])
+        assert project_progress._apply_direct(first, user_id, project_id, None, stale, 0, stale) == stale
+        first.commit()
+        assert project_progress._apply_direct(second, user_id, project_id, None, stale, 0, stale) == 0
+        second.commit()
+
+        assert project_progress.all_progress(first, user_id) == {project_id: [0]}
+    finally:
+        first.close()
+        second.close()
+
+
+def test_first_result_for_a_skill_racing_another_worker_folds_into_its_row(client, monkeypatch):
+    from db import SessionLocal
+    from models import SkillMastery, User
+    from utils import analytics
+
+    db = SessionLocal()
+    try:
+        user = User(name="Race", email="mastery-race@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.add(SkillMastery(user_id=user.id, skill_key="docker", skill_name="Docker", mastery=50.0, attempts=1))
+        db.commit()
+
+        # This worker looked before the other worker's row was committed
+        real, calls = analytics._mastery_row, []
+
+        def stale_first_lookup(*args):
+            calls.append(args)
+            return None if len(calls) == 1 else real(*args)
+
+        monkeypatch.setattr(analytics, "_mastery_row", stale_first_lookup)
+
+        row = analytics.record_test_result(db, user.id, "Docker", 100.0)
+
+        assert row.attempts == 2
+        assert db.query(SkillMastery).filter(SkillMastery.user_id == user.id).count() == 1
+    finally:
+        db.close()
+
+
+def test_step_completed_again_while_the_buffer_flushes_pays_xp_once(client, monkeypatch):
+    from db import SessionLocal
+    from utils import xp_buffer
+
+    assert xp_buffer.active()  # the app lifespan runs the flusher
+    user_id, project_id = 900002, "flush-window-project"
+    during_flush = []
+
+    def session_with_probe():
+        # Another request completes the same step after the flush took the delta, before it commits
+        session = SessionLocal()
+        commit = session.commit
+
+        def probe_then_commit():
+            if not during_flush:
+                other = SessionLocal()
+                try:
+                    during_flush.append(project_progress.update_steps(other, user_id, project_id, [0]))
+                finally:
+                    other.close()
+            commit()
+
+        session.commit = probe_then_commit
+        return session
+
+    monkeypatch.setattr(xp_buffer, "SessionLocal", session_with_probe)
+    db = SessionLocal()
+    try:
+        assert project_progress.update_steps(db, user_id, project_id, [0]) == ([0], 1)
+        xp_buffer.flush()
+        xp_buffer.flush()  # the probe's (empty) delta
+
+        assert during_flush == [([0], 0)]
+        assert project_progress.all_progress(db, user_id) == {project_id: [0]}
+    finally:
+        db.close()
+
+
+def test_first_badge_poll_racing_another_backfill_does_not_fail(client, auth_headers, monkeypatch):
+    from db import SessionLocal
+    from models import BadgeCounter
+    from utils import badges
+    from utils.jwt_handler import user_id_from_token
+
+    user_id = user_id_from_token(auth_headers["Authorization"].split()[1])
+    real, raced = badges._history_counters, []
+
+    def history_then_other_backfill(db, user):
+        values = real(db, user)
+        if not raced:
+            raced.append(True)
+            other = SessionLocal()
+            try:
+                assert badges._backfill(other, user.id)  # the other request commits first
+            finally:
+                other.close()
+        return values
+
+    monkeypatch.setattr(badges, "_history_counters", history_then_other_backfill)
+    db = SessionLocal()
+    try:
+        catalogue = badges.badge_catalogue(db, user_id)
+        new_badges = badges.emit(db, user_id, "skill_gap_analysed", match_percentage=80, streak=1)
+
+        assert len(catalogue) == len(badges.BADGES)
+        assert db.query(BadgeCounter).filter(BadgeCounter.user_id == user_id).count() == len(badges.COUNTERS)
+        assert set(new_badges) == {5, 6}  # Gap Finder, Strong Match
+    finally:
+        db.close()
@@ -0,0 +1,38 @@
+import json
+
+from models import SkillAnalysis
+from utils.jwt_handler import user_id_from_token
+
+
+def _analysis_with_nothing_missing(headers):
+    from db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.add(SkillAnalysis(user_id=user_id_from_token(headers["Authorization"].split()[1]),
+                             matched_skills='["Python"]', missing_skills="[]", match_percentage=100.0))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_roadmap_with_no_missing_skills_is_the_all_set_week(client, auth_headers):
+    _analysis_with_nothing_missing(auth_headers)
+
+    first = client.get("/roadmap/", headers=auth_headers).json()
+    again = client.get("/roadmap/", headers=auth_headers).json()
+
+    assert [w["title"] for w in first["roadmap"]] == ["You're all set!"]
+    assert again["roadmap"] == first["roadmap"]  # saved, not an empty list
+
+
+def test_roadmap_stream_with_no_missing_skills_sends_the_all_set_week(client, auth_headers):
+    _analysis_with_nothing_missing(auth_headers)
+
+    body = client.get("/roadmap/stream", headers=auth_headers).text
+
+    weeks = [json.loads(block.split("data: ", 1)[1]) for block in body.split("\n\n")
+             if block.startswith("event: week")]
+    assert [w["title"] for w in weeks] == ["You're all set!"]
+    replay = client.get("/roadmap/", headers=auth_headers).json()
+    assert replay["roadmap"] == weeks
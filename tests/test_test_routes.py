@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+import models
+from utils.jwt_handler import user_id_from_token
+
+
+def test_history_stats_merge_skill_names_that_differ_only_in_case(client, auth_headers):
+    from db import SessionLocal
+
+    user_id = user_id_from_token(auth_headers["Authorization"].split()[1])
+    start = datetime(2026, 1, 1)
+    db = SessionLocal()
+    try:
+        for minutes, (skill, score) in enumerate([("Python", 60.0), ("Java", 50.0), ("python", 80.0)]):
+            db.add(models.TestResult(user_id=user_id, skill_name=skill, score=score,
+                                     taken_at=start + timedelta(minutes=minutes)))
+        db.commit()
+    finally:
+        db.close()
+
+    filtered = client.get("/test/history/stats", params={"skill": "PYTHON"}, headers=auth_headers).json()
+    everything = client.get("/test/history/stats", headers=auth_headers).json()
+
+    assert [(s["skill_name"], s["count"], s["mean_score"]) for s in filtered] == [("python", 2, 70.0)]
+    assert filtered[0]["trend"] == 20.0
+    assert sorted((s["skill_name"], s["count"]) for s in everything) == [("Java", 1), ("python", 2)]
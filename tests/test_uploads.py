@@ -0,0 +1,29 @@
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from utils import resume_parser
+
+
+def test_upload_over_the_limit_is_refused_from_content_length(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(resume_parser, "UPLOAD_MAX_BYTES", 50_000)
+    extracted = []
+    monkeypatch.setattr(resume_parser, "extract_text", lambda *args: extracted.append(args) or "text")
+
+    response = client.post("/resume/upload", headers=auth_headers,
+                           files={"file": ("resume.txt", b"a" * 100_000, "text/plain")})
+
+    assert response.status_code == 413
+    assert extracted == []  # refused by the middleware, never parsed
+
+
+def test_upload_without_content_length_is_measured_after_receipt():
+    upload = UploadFile(file=io.BytesIO(b"a" * 2048), filename="resume.txt")  # size unknown, as when chunked
+
+    with pytest.raises(HTTPException) as refused:
+        resume_parser.check_upload_size(upload, max_bytes=1024)
+
+    assert refused.value.status_code == 413
+    assert upload.file.tell() == 0
+    resume_parser.check_upload_size(upload, max_bytes=4096)
@@ -0,0 +1,221 @@
+"""
+Adaptive mock tests.
+
+Each user has an Elo-style rating per skill (SkillRating, starts at 1000) and
+every pooled question has a rating of its own (PoolQuestion, seeded from its
+difficulty bucket). Answering a question is treated as a match:
+
+    expected = 1 / (1 + 10 ** ((question - user) / 400))
+    user     += K_USER * (correct - expected)
+    question -= K_QUESTION * (correct - expected)
+
+  - plan_difficulty(rating, n)           → how many easy / medium / hard questions to serve
+  - build_adaptive_test(db, user_id, ..) → questions picked from the shared pool,
+                                           calling the LLM only for exhausted buckets
+  - record_answers(db, user_id, ...)     → rating updates after /test/check
+
+Questions a user has already seen are not served again while unseen ones remain.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import PoolQuestion, SeenQuestion, SkillRating
+from utils.test_generator import generate_test_questions
+
+load_dotenv()
+
+DEFAULT_RATING = 1000.0
+K_USER = float(os.getenv("ADAPTIVE_K_USER", "32"))
+K_QUESTION = float(os.getenv("ADAPTIVE_K_QUESTION", "8"))
+# Success probability the test aims for — challenging but not discouraging
+TARGET_SUCCESS = float(os.getenv("ADAPTIVE_TARGET_SUCCESS", "0.7"))
+# Minimum questions requested per LLM call so each call refills the pool for later tests
+GENERATE_BATCH = int(os.getenv("ADAPTIVE_GENERATE_BATCH", "5"))
+
+BUCKET_RATINGS = {"easy": 800.0, "medium": 1000.0, "hard": 1200.0}
+
+
+def _key(skill: str) -> str:
+    return skill.strip().lower()
+
+
+def expected_score(user_rating: float, question_rating: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((question_rating - user_rating) / 400))
+
+
+def _rating_row(db: Session, user_id: int, skill_name: str) -> SkillRating:
+    """The user's rating row for the skill, created (and committed) at DEFAULT_RATING if missing."""
+    key = _key(skill_name)
+    query = db.query(SkillRating).filter(SkillRating.user_id == user_id, SkillRating.skill_key == key)
+    row = query.first()
+    if row is None:
+        try:
+            db.add(SkillRating(user_id=user_id, skill_key=key, rating=DEFAULT_RATING, answered=0))
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # a concurrent request for the same skill created it first
+        row = query.one()
+    return row
+
+
+def plan_difficulty(rating: float, num_questions: int) -> Dict[str, int]:
+    """
+    Serve most questions from the bucket whose expected success is closest to
+    TARGET_SUCCESS, and one or two from each neighbouring bucket to keep probing.
+    """
+    buckets = list(BUCKET_RATINGS)
+    primary = min(buckets, key=lambda b: abs(expected_score(rating, BUCKET_RATINGS[b]) - TARGET_SUCCESS))
+    i = buckets.index(primary)
+    neighbours = [b for b in (buckets[i - 1] if i > 0 else None,
+                              buckets[i + 1] if i + 1 < len(buckets) else None) if b]
+    plan = {primary: num_questions}
+    probes = max(0, num_questions - (num_questions * 3 + 4) // 5)  # ~40% for probing
+    for n in range(probes):
+        neighbour = neighbours[n % len(neighbours)]
+        plan[neighbour] = plan.get(neighbour, 0) + 1
+        plan[primary] -= 1
+    return plan
+
+
+def _to_question(item: PoolQuestion) -> dict:
+    return {
+        "pool_id": item.id,
+        "difficulty": item.difficulty,
+        "question": item.question,
+        "options": json.loads(item.options),
+        "correct_answer": item.correct_answer,
+        "explanation": item.explanation,
+    }
+
+
+def _unseen(db: Session, user_id: int, skill_key: str, difficulty: str, limit: int) -> List[PoolQuestion]:
+    seen = db.query(SeenQuestion.question_id).filter(SeenQuestion.user_id == user_id)
+    return (
+        db.query(PoolQuestion)
+        .filter(PoolQuestion.skill_key == skill_key, PoolQuestion.difficulty == difficulty,
+                ~PoolQuestion.id.in_(seen))
+        .order_by(PoolQuestion.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _least_recently_seen(db: Session, user_id: int, skill_key: str, difficulty: str,
+                         exclude: set, limit: int) -> List[PoolQuestion]:
+    """Repeat old questions (latest sighting oldest first) when the pool can't be grown."""
+    query = (
+        db.query(PoolQuestion)
+        .join(SeenQuestion, SeenQuestion.question_id == PoolQuestion.id)
+        .filter(SeenQuestion.user_id == user_id, PoolQuestion.skill_key == skill_key,
+                PoolQuestion.difficulty == difficulty)
+    )
+    if exclude:
+        query = query.filter(~PoolQuestion.id.in_(exclude))
+    # Rows written before sightings were refreshed in place may repeat a question; its latest counts
+    return (
+        query.group_by(PoolQuestion.id)
+        .order_by(func.max(SeenQuestion.seen_at), PoolQuestion.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _mark_seen(db: Session, user_id: int, question_ids: List[int]) -> None:
+    """Record a sighting: refresh seen_at of questions served before, insert the rest."""
+    if not question_ids:
+        return
+    now = datetime.utcnow()
+    seen = db.query(SeenQuestion).filter(SeenQuestion.user_id == user_id, SeenQuestion.question_id.in_(question_ids))
+    before = {q for (q,) in seen.with_entities(SeenQuestion.question_id)}
+    if before:
+        seen.update({SeenQuestion.seen_at: now}, synchronize_session=False)
+    for question_id in question_ids:
+        if question_id not in before:
+            db.add(SeenQuestion(user_id=user_id, question_id=question_id, seen_at=now))
+
+
+def _grow_pool(db: Session, skill_name: str, difficulty: str, count: int) -> Tuple[List[PoolQuestion], List[dict]]:
+    """
+    Generate at least `count` new questions for one bucket.
+    Returns (new pool rows, unpooled questions). Fallback questions and
+    duplicates of existing pool questions are not pooled.
+    """
+    key = _key(skill_name)
+    generated = generate_test_questions(skill_name, max(count, GENERATE_BATCH), difficulty)
+    existing = {q for (q,) in db.query(PoolQuestion.question).filter(PoolQuestion.skill_key == key)}
+    added, unpooled = [], []
+    for q in generated:
+        if q.get("fallback"):
+            unpooled.append(q)
+            continue
+        if q["question"] in existing:
+            continue
+        existing.add(q["question"])
+        item = PoolQuestion(skill_key=key, difficulty=difficulty, rating=BUCKET_RATINGS[difficulty],
+                            question=q["question"], options=json.dumps(q["options"]),
+                            correct_answer=q["correct_answer"], explanation=q.get("explanation"))
+        db.add(item)
+        added.append(item)
+    db.flush()
+    return added, unpooled
+
+
+def build_adaptive_test(db: Session, user_id: int, skill_name: str, num_questions: int = 5) -> List[dict]:
+    """
+    Pick `num_questions` questions matched to the user's rating for `skill_name`.
+    Unseen pooled questions are used first; the LLM is only called for buckets
+    that run out. Served questions are marked as seen.
+    """
+    key = _key(skill_name)
+    rating = _rating_row(db, user_id, skill_name).rating
+    questions: List[dict] = []
+    served: List[PoolQuestion] = []
+
+    for difficulty, count in plan_difficulty(rating, num_questions).items():
+        if count <= 0:
+            continue
+        picked = _unseen(db, user_id, key, difficulty, count)
+        unpooled: List[dict] = []
+        if len(picked) < count:
+            added, unpooled = _grow_pool(db, skill_name, difficulty, count - len(picked))
+            picked += added[:count - len(picked)]
+        if len(picked) < count:
+            picked += _least_recently_seen(db, user_id, key, difficulty, {p.id for p in picked},
+                                           count - len(picked))
+        served += picked
+        questions += [_to_question(p) for p in picked]
+        # Last resort (e.g. LLM down and nothing pooled yet): static questions, unrated
+        questions += unpooled[:count - len(picked)]
+
+    _mark_seen(db, user_id, [item.id for item in served])
+    db.commit()
+    return questions
+
+
+def record_answers(db: Session, user_id: int, skill_name: str, outcomes: List[Tuple[int, bool]]) -> float:
+    """
+    Apply Elo updates for (pool_id, is_correct) pairs; returns the new rating.
+    Questions without a pool id (static fallbacks) are ignored.
+    """
+    row = _rating_row(db, user_id, skill_name)
+    ids = [pool_id for pool_id, _ in outcomes if pool_id is not None]
+    items = {q.id: q for q in db.query(PoolQuestion).filter(PoolQuestion.id.in_(ids))} if ids else {}
+    for pool_id, correct in outcomes:
+        item = items.get(pool_id)
+        if item is None:
+            continue
+        delta = (1.0 if correct else 0.0) - expected_score(row.rating, item.rating)
+        row.rating += K_USER * delta
+        item.rating -= K_QUESTION * delta
+        row.answered += 1
+    row.updated_at = datetime.utcnow()
+    db.commit()
+    return row.rating
@@ -0,0 +1,271 @@
+"""
+Admission control for the AI-backed endpoints (Gemini, speech-to-text, TTS).
+
+Each of these requests is slow, costs money and holds a worker, so
+admission_middleware screens them before they reach the route:
+
+  1. Per-user token bucket → ADMISSION_USER_RATE_PER_MINUTE, bursts of
+                             ADMISSION_USER_BURST; each endpoint costs 0+ tokens
+  2. Priority gate         → at most ADMISSION_MAX_CONCURRENT AI requests run at
+                             once (each endpoint also has its own cap); the rest
+                             wait in a bounded queue, most important first
+  3. 429 + Retry-After     → when the user's bucket is empty, the queue is full,
+                             or a request waits ADMISSION_QUEUE_TIMEOUT_SECONDS
+
+A full queue sheds its least important waiter to make room for a more important
+request. Under overload, test checks and the live coach keep flowing while test
+regenerations back off.
+
+Users are identified from the bearer token without a database lookup (client IP
+without one). Limits are per worker process. A conditional GET whose
+If-None-Match still matches (policy "etag") is let straight through: the route
+answers 304 from the version counter without calling the AI, so it costs
+neither a token nor a slot.
+
+  - POLICIES             → (method, path) → name / priority / cost / max_concurrent / etag
+  - PriorityGate         → concurrency cap + priority wait queue
+  - admission_middleware → register with app.middleware("http")
+"""
+
+import asyncio
+import bisect
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from utils.http_cache import not_modified
+from utils.jwt_handler import user_id_from_token
+from utils.llm_resilience import TokenBucket
+from utils.metrics import counter, histogram, register_gauges
+from utils.responses import FastJSONResponse
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_USER_RATE_PER_MINUTE = float(os.getenv("ADMISSION_USER_RATE_PER_MINUTE", "20"))
+ADMISSION_USER_BURST = int(os.getenv("ADMISSION_USER_BURST", "10"))
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+# Least recently seen users beyond this are forgotten (their bucket starts full again)
+ADMISSION_MAX_TRACKED_USERS = int(os.getenv("ADMISSION_MAX_TRACKED_USERS", "10000"))
+
+# Lower priority number = served first. cost = bucket tokens; 0 skips the per-user limit.
+# etag = the http_cache resource of a conditional GET; unchanged revalidations skip admission.
+POLICIES = {
+    ("POST", "/test/check"):        {"name": "test_check",    "priority": 0, "cost": 0, "max_concurrent": None},
+    ("POST", "/voice/chat-text"):   {"name": "coach_text",    "priority": 1, "cost": 1, "max_concurrent": 4},
+    ("POST", "/voice/chat-audio"):  {"name": "coach_audio",   "priority": 1, "cost": 2, "max_concurrent": 4},
+    ("POST", "/voice/transcribe"):  {"name": "transcribe",    "priority": 1, "cost": 1, "max_concurrent": 4},
+    ("POST", "/voice/tts"):         {"name": "tts",           "priority": 1, "cost": 1, "max_concurrent": 4},
+    ("GET", "/analysis/skill-gap"): {"name": "skill_gap",     "priority": 2, "cost": 2, "max_concurrent": 4},
+    ("GET", "/roadmap"):            {"name": "roadmap",       "priority": 2, "cost": 1, "max_concurrent": 4,
+                                     "etag": "roadmap"},
+    ("GET", "/roadmap/stream"):     {"name": "roadmap",       "priority": 2, "cost": 1, "max_concurrent": 4},
+    ("POST", "/test/generate"):     {"name": "test_generate", "priority": 3, "cost": 1, "max_concurrent": 4},
+}
+
+_MESSAGES = {
+    "rate_limited": "Too many AI requests — please wait before trying again",
+    "queue_full": "The AI service is busy — please retry shortly",
+    "shed": "The AI service is busy — please retry shortly",
+    "timeout": "The AI service is busy — please retry shortly",
+}
+
+REJECTED = counter("admission_rejected_total", "AI requests refused with 429", ("endpoint", "reason"))
+QUEUE_WAIT = histogram("admission_wait_seconds", "Time AI requests spent waiting for a slot", ("endpoint",))
+
+
+# ── Priority gate ─────────────────────────────────────────────
+class PriorityGate:
+    """
+    Concurrency cap with a bounded, priority-ordered wait queue (asyncio, one per process).
+    Freed slots go to the lowest priority number first, FIFO within a priority,
+    skipping waiters whose endpoint is already at its own cap.
+    """
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        self._active_by: Dict[str, int] = defaultdict(int)
+        self._waiting: List[list] = []  # [priority, seq, policy, future], kept sorted
+        self._seq = itertools.count()
+        self._hold_seconds = 1.0        # moving average of slot hold time, for Retry-After
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    def _fits(self, policy: dict) -> bool:
+        cap = policy["max_concurrent"]
+        return self.active < self.limit and (cap is None or self._active_by[policy["name"]] < cap)
+
+    def _take(self, policy: dict) -> None:
+        self.active += 1
+        self._active_by[policy["name"]] += 1
+
+    def _dispatch(self) -> None:
+        i = 0
+        while i < len(self._waiting) and self.active < self.limit:
+            entry = self._waiting[i]
+            if self._fits(entry[2]):
+                del self._waiting[i]
+                self._take(entry[2])
+                entry[3].set_result(None)
+            else:
+                i += 1
+
+    async def acquire(self, policy: dict, timeout: float) -> Optional[str]:
+        """None once a slot is held, otherwise why not: "queue_full", "shed" or "timeout"."""
+        # Free slots are always handed to fitting waiters on release, so none are queued here
+        if self._fits(policy):
+            self._take(policy)
+            return None
+        if len(self._waiting) >= self.max_queue:
+            if not self._waiting or self._waiting[-1][0] <= policy["priority"]:
+                return "queue_full"
+            self._waiting.pop()[3].set_result("shed")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [policy["priority"], next(self._seq), policy, future]
+        bisect.insort(self._waiting, entry)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done():  # granted or shed just as the wait ran out
+                return future.result()
+            self._waiting.remove(entry)
+            return "timeout"
+        except asyncio.CancelledError:  # client went away while queued
+            if future.done():
+                if future.result() is None:
+                    self.release(policy, 0.0)
+            else:
+                self._waiting.remove(entry)
+            raise
+
+    def release(self, policy: dict, held_seconds: float) -> None:
+        self.active -= 1
+        self._active_by[policy["name"]] -= 1
+        self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held_seconds
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        """Rough seconds until a new request would get a slot."""
+        return max(1, math.ceil(self._hold_seconds * (len(self._waiting) + 1) / self.limit))
+
+
+_gate = PriorityGate(ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE)
+
+
+# ── Per-user token buckets ────────────────────────────────────
+_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+
+def _user_id(request) -> Optional[int]:
+    auth = request.headers.get("authorization", "")
+    return user_id_from_token(auth[7:].strip()) if auth[:7].lower() == "bearer " else None
+
+
+def client_key(request) -> str:
+    """"user:<id>" from a valid bearer token, else "ip:<address>"."""
+    user_id = _user_id(request)
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _bucket(key: str) -> TokenBucket:
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = _buckets[key] = TokenBucket(ADMISSION_USER_RATE_PER_MINUTE / 60, ADMISSION_USER_BURST)
+        if len(_buckets) > ADMISSION_MAX_TRACKED_USERS:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(key)
+    return bucket
+
+
+# ── Middleware ────────────────────────────────────────────────
+def _reject(policy: dict, reason: str, retry_after: float) -> FastJSONResponse:
+    REJECTED.inc(endpoint=policy["name"], reason=reason)
+    return FastJSONResponse(
+        status_code=429,
+        content={"detail": _MESSAGES[reason]},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def admission_middleware(request, call_next):
+    """Rate-limit and queue AI requests (see module docstring); everything else passes straight through."""
+    policy = POLICIES.get((request.method, request.url.path.rstrip("/"))) if ADMISSION_ENABLED else None
+    if policy is None:
+        return await call_next(request)
+
+    if policy.get("etag") and request.headers.get("if-none-match"):
+        user_id = _user_id(request)
+        # The version lookup may hit the database store, so keep it off the event loop
+        if user_id is not None and await run_in_threadpool(
+                not_modified, request.headers["if-none-match"], user_id, policy["etag"]):
+            return await call_next(request)
+
+    cost = policy["cost"]
+    bucket = _bucket(client_key(request)) if cost else None
+    if bucket is not None and bucket.retry_after(cost) > 0:
+        return _reject(policy, "rate_limited", bucket.retry_after(cost))
+
+    started = time.perf_counter()
+    reason = await _gate.acquire(policy, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+    QUEUE_WAIT.observe(time.perf_counter() - started, endpoint=policy["name"])
+    if reason is not None:
+        return _reject(policy, reason, _gate.retry_after())
+
+    held_from = time.perf_counter()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            _gate.release(policy, time.perf_counter() - held_from)
+
+    # Tokens are only spent once a slot is held, so a busy server doesn't also drain the user's bucket
+    if bucket is not None and not bucket.try_acquire(cost):
+        release()
+        return _reject(policy, "rate_limited", bucket.retry_after(cost))
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        release()
+        raise
+
+    # Hold the slot until the body is sent — streamed routes (roadmap SSE) keep working after call_next returns
+    body = response.body_iterator
+
+    async def body_then_release():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            release()
+
+    response.body_iterator = body_then_release()
+    return response
+
+
+def _admission_gauges():
+    return [
+        ("admission_active_requests", "AI requests currently holding a slot", {}, _gate.active),
+        ("admission_queued_requests", "AI requests waiting for a slot", {}, _gate.queued),
+    ]
+
+
+register_gauges(_admission_gauges)
@@ -4,48 +4,170 @@ Central AI Agent — powered by Google Gemini.
 Provides four capabilities:
   1. ai_analyse_skill_gap   → compare resume vs JD using AI
   2. ai_generate_test       → generate MCQ questions for any skill
-  3. ai_generate_roadmap    → create a personalised weekly learning roadmap
+  3. ai_generate_skill_weeks / ai_stream_skill_weeks
+                            → per-skill roadmap week blocks, reused across analyses
   4. ai_interview_coach     → context-aware mock interview / mentor chat
+
+All Gemini calls go through utils/llm_resilience.py (timeouts, retries,
+rate limiting, circuit breaker, hedging). When the layer gives up, each
+function falls back to its existing static result.
 """
 
 import os
 import json
-import google.generativeai as genai
+import time
+import functools
+import threading
+from types import SimpleNamespace
 from dotenv import load_dotenv
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Tuple, Any
+from utils.llm_resilience import llm_caller
+from utils.json_decoder import extract_json, validate_items, IncrementalArrayParser
+from schemas.test_schema import QuestionFull
+from schemas.roadmap_schema import RoadmapWeek, MiniProject
+from utils.single_flight import SingleFlight, normalize_key
+from utils.template_cache import TemplateCache, template_key
+from utils.prompt_compactor import compact_for_prompt, estimate_tokens, trim_chat_history, history_to_dicts
+from utils import shared_state
+from utils.metrics import timed, register_gauges, FUNCTION_SECONDS, LLM_TOKENS, LLM_ERRORS, LLM_FALLBACKS
 
 load_dotenv()
 
+# How many times we go back to the model for items missing from a partial answer
+MAX_REASKS = int(os.getenv("LLM_MAX_REASKS", "1"))
+
 # ── Gemini setup ──────────────────────────────────────────────
+# google.generativeai takes most of a second to import, so the SDK is loaded
+# on the first AI call (or by warm_up() after startup) rather than at import.
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                _model = genai.GenerativeModel(GEMINI_MODEL)
+    return _model
+
+
+def warm_up() -> None:
+    """Import the Gemini SDK and build the model client ahead of the first request."""
+    _get_model()
+
+
+def set_model(model) -> None:
+    """
+    Swap the underlying model object (e.g. a local fake exposing
+    generate_content / start_chat) — used by tests and benchmarks.
+    """
+    global _model
+    _model = model
+
+
+def _record_usage(label: str, prompt: str, response) -> None:
+    """Record tokens in/out for one call, preferring Gemini's own usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    tokens_in = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+    tokens_out = getattr(usage, "candidates_token_count", None) or estimate_tokens(response.text)
+    LLM_TOKENS.inc(tokens_in, function=label, direction="in")
+    LLM_TOKENS.inc(tokens_out, function=label, direction="out")
+
+
+def _generate(prompt: str, label: str = "gemini", json_mode: bool = True):
+    """Call Gemini through the shared resilient call layer."""
+    timeout = llm_caller.timeout
+    generation_config = {"response_mime_type": "application/json"} if json_mode else None
+    try:
+        with timed(f"llm_{label}", stage="llm"):
+            response = llm_caller.call(
+                lambda: _get_model().generate_content(
+                    prompt,
+                    generation_config=generation_config,
+                    request_options={"timeout": timeout},
+                )
+            )
+    except Exception:
+        LLM_ERRORS.inc(function=label)
+        raise
+    _record_usage(label, prompt, response)
+    return response
+
+
+def _log_fallback(label: str, message: str, error: Exception) -> None:
+    """Log an AI failure and count that `label` served its static fallback."""
+    LLM_FALLBACKS.inc(function=label)
+    print(f"[AI Agent] {message}: {error}")
+
+
+def _ask_gemini_json(prompt: str, label: str = "gemini") -> dict | list:
+    """
+    Send a prompt to Gemini and parse the response as JSON.
+    Trailing prose, code fences and truncated output are repaired where possible.
+    """
+    response = _generate(prompt, label)
+    return extract_json(response.text)
+
+
+def _ask_gemini_items(prompt: str, model, check=None, label: str = "gemini") -> List[Dict]:
+    """Ask for a JSON array and keep only the elements that validate against `model`."""
+    result = _ask_gemini_json(prompt, label)
+    if isinstance(result, dict):
+        result = [result]
+    if not isinstance(result, list):
+        return []
+    return validate_items(result, model, check)
+
+
+# Identical concurrent generations (same function + normalised args) share one Gemini call
+_single_flight = SingleFlight()
+
+
+def _llm_gauges():
+    return [
+        ("llm_single_flight_in_flight", "Distinct AI generations currently running", {}, _single_flight.in_flight()),
+        ("llm_single_flight_coalesced", "Calls served by another caller's in-flight generation", {}, _single_flight.coalesced),
+        ("llm_circuit_open", "1 while the LLM circuit breaker is open", {},
+         1 if llm_caller.breaker.state == "open" else 0),
+    ]
 
-_model = genai.GenerativeModel("gemini-2.0-flash")
 
+register_gauges(_llm_gauges)
 
-def _ask_gemini_json(prompt: str) -> dict | list:
-    """Send a prompt to Gemini and parse the response as JSON."""
-    response = _model.generate_content(prompt)
-    text = response.text.strip()
+# Cross-user pools of generated content, keyed by skill set (see utils/template_cache.py)
+_fragment_templates = TemplateCache("roadmap_fragment")
+_project_templates = TemplateCache("projects")
 
-    # Strip markdown code fences if Gemini wraps JSON in ```json ... ```
-    if text.startswith("```"):
-        # Remove first line (```json) and last line (```)
-        lines = text.split("\n")
-        text = "\n".join(lines[1:-1]).strip()
 
-    return json.loads(text)
+def _coalesce(fn):
+    """Decorator: route concurrent identical calls of `fn` through the single-flight layer."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__name__, normalize_key(args), normalize_key(kwargs))
+        return _single_flight.do(key, lambda: fn(*args, **kwargs))
+    return wrapper
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 1. AI SKILL-GAP ANALYSIS
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
+@_coalesce
 def ai_analyse_skill_gap(resume_text: str, jd_text: str) -> Dict:
     """
     Use Gemini to extract skills from resume & JD, compare them,
     and return matched_skills, missing_skills, and match_percentage.
     """
+    # Strip PDF noise / boilerplate and keep both documents within the token budget
+    docs = compact_for_prompt({"resume": resume_text, "jd": jd_text})
+    resume_text, jd_text = docs["resume"], docs["jd"]
+
     prompt = f"""You are an expert HR analyst and technical recruiter.
 
 TASK: Compare the candidate's resume against the job description below.
@@ -72,7 +194,7 @@ Return ONLY valid JSON in this exact format (no markdown, no explanation):
 }}
 """
     try:
-        result = _ask_gemini_json(prompt)
+        result = _ask_gemini_json(prompt, "skill_gap")
         # Ensure required keys exist with defaults
         return {
             "matched_skills": result.get("matched_skills", []),
@@ -80,7 +202,7 @@ Return ONLY valid JSON in this exact format (no markdown, no explanation):
             "match_percentage": float(result.get("match_percentage", 0.0)),
         }
     except Exception as e:
-        print(f"[AI Agent] Skill analysis error: {e}")
+        _log_fallback("skill_gap", "Skill analysis error", e)
         # Fallback — return empty result rather than crashing
         return {
             "matched_skills": [],
@@ -93,11 +215,25 @@ Return ONLY valid JSON in this exact format (no markdown, no explanation):
 # 2. AI TEST QUESTION GENERATION
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-def ai_generate_test(skill_name: str, num_questions: int = 5) -> List[Dict]:
+DIFFICULTY_GUIDE = {
+    "easy": "definitions and basic usage a beginner should know",
+    "medium": "applying the skill to typical day-to-day problems",
+    "hard": "edge cases, internals, trade-offs and debugging scenarios",
+}
+
+
+@_coalesce
+def ai_generate_test(skill_name: str, num_questions: int = 5, difficulty: str | None = None) -> List[Dict]:
     """
     Use Gemini to generate interview-style MCQ questions for any skill.
     Returns a list of question dicts with question, options, correct_answer, explanation.
+    With `difficulty` ("easy" / "medium" / "hard") every question targets that level;
+    otherwise the test mixes all three. Static fallback questions carry "fallback": True.
     """
+    if difficulty in DIFFICULTY_GUIDE:
+        level_rule = f"ALL questions must be {difficulty.upper()} difficulty: {DIFFICULTY_GUIDE[difficulty]}"
+    else:
+        level_rule = "Include a mix of easy, medium, and hard questions"
     prompt = f"""You are an expert technical interviewer.
 
 TASK: Generate EXACTLY {num_questions} multiple-choice interview questions for the skill: "{skill_name}".
@@ -105,7 +241,7 @@ TASK: Generate EXACTLY {num_questions} multiple-choice interview questions for t
 STRICT RULES:
 - You MUST return EXACTLY {num_questions} question objects in the JSON array
 - Each question MUST have exactly 4 options (A, B, C, D)
-- Include a mix of easy, medium, and hard questions
+- {level_rule}
 - Questions should be real interview-style questions
 - correct_answer MUST be one of the 4 options (exact match)
 - Do NOT include the answer in the question text
@@ -122,13 +258,49 @@ Return ONLY a valid JSON array (no markdown, no extra text):
   ... ({num_questions} total)
 ]"""
     try:
-        result = _ask_gemini_json(prompt)
-        if isinstance(result, list) and len(result) >= 1:
-            return result[:num_questions]
-        return _fallback_questions(skill_name, num_questions)
+        questions = _ask_gemini_items(prompt, QuestionFull, _is_valid_question, "test")
     except Exception as e:
-        print(f"[AI Agent] Test generation error: {e}")
+        _log_fallback("test", "Test generation error", e)
         return _fallback_questions(skill_name, num_questions)
+    if not questions:
+        _log_fallback("test", "Test generation error", ValueError("no valid questions in response"))
+        return _fallback_questions(skill_name, num_questions)
+
+    # Re-ask only for the questions we could not salvage
+    for _ in range(MAX_REASKS):
+        missing = num_questions - len(questions)
+        if missing <= 0:
+            break
+        try:
+            questions += _ask_gemini_items(
+                _reask_questions_prompt(skill_name, missing, questions),
+                QuestionFull,
+                _is_valid_question,
+                "test",
+            )
+        except Exception as e:
+            print(f"[AI Agent] Test re-ask error: {e}")
+            break
+    return questions[:num_questions]
+
+
+def _is_valid_question(q: QuestionFull) -> bool:
+    """A usable MCQ has 4 options and its correct answer is one of them."""
+    return len(q.options) == 4 and q.correct_answer in q.options
+
+
+def _reask_questions_prompt(skill_name: str, count: int, existing: List[Dict]) -> str:
+    """Prompt for `count` extra questions that do not repeat `existing`."""
+    asked = "\n".join(f"- {q['question']}" for q in existing)
+    return f"""You are an expert technical interviewer.
+
+TASK: Generate EXACTLY {count} more multiple-choice interview questions for the skill: "{skill_name}".
+Do NOT repeat any of these questions:
+{asked}
+
+Each question MUST have exactly 4 options and correct_answer MUST be one of them (exact match).
+
+Return ONLY a valid JSON array of objects with keys: question, options, correct_answer, explanation."""
 
 
 def _fallback_questions(skill_name: str, count: int) -> List[Dict]:
@@ -155,79 +327,179 @@ def _fallback_questions(skill_name: str, count: int) -> List[Dict]:
          "correct_answer": "Explaining your thought process",
          "explanation": "Interviewers value clear thinking over just the right answer."},
     ]
-    return base[:count]
+    return [{**q, "fallback": True} for q in base[:count]]
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 3. AI ROADMAP GENERATION
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-def ai_generate_roadmap(missing_skills: List[str], total_weeks: int = 4) -> List[Dict]:
-    """
-    Use Gemini to create a personalised weekly learning roadmap
-    for the given missing skills.
-    """
-    if not missing_skills:
-        return [{
-            "week": 1,
-            "title": "You're all set!",
-            "skills": [],
-            "notes": "Your resume already covers the JD requirements. Keep practising!",
-            "resources": [],
-        }]
-
-    skills_str = ", ".join(missing_skills)
-    prompt = f"""You are an expert career coach and learning strategist.
+def _skill_weeks_prompt(skills: List[str], weeks_per_skill: int) -> str:
+    return f"""You are an expert career coach and learning strategist.
 
-TASK: Create a detailed {total_weeks}-week learning roadmap for a job candidate who needs to learn these skills: {skills_str}
+TASK: For EACH of these skills, write a self-contained {weeks_per_skill}-week study block: {", ".join(skills)}
 
-STRICT RULE: Every time you are asked, generate a UNIQUE and fresh roadmap. Do not repeat previous templates exactly.
 Requirements:
-- Distribute skills logically across {total_weeks} weeks (related skills close together)
-- For each week provide: a title, the skills to focus on, detailed study notes/action items, and real learning resources (URLs)
-- Resources should be real, well-known websites (official docs, freeCodeCamp, Coursera, YouTube channels, GeeksforGeeks, etc.)
+- Every week object is about exactly one of the skills above; its "skills" list MUST start with that skill, spelled exactly as given
+- "week" is the week number WITHIN that skill's block (1 to {weeks_per_skill})
+- "title" describes the focus of the week WITHOUT a week number
 - Notes should include specific topics to cover, projects to build, and practice exercises
-- Order from foundational skills to advanced ones
-- Ensure the advice is tailored specifically to these skills.
+- Resources should be real, well-known websites (official docs, freeCodeCamp, Coursera, YouTube channels, GeeksforGeeks, etc.)
+- Cover the skills in the order given
 
-Return ONLY valid JSON in this exact format (no markdown, no explanation):
+Return ONLY a valid JSON array (no markdown, no explanation):
 [
   {{
     "week": 1,
-    "title": "Week 1: Foundations of ...",
-    "skills": ["skill1", "skill2"],
+    "title": "Foundations of ...",
+    "skills": ["skill1"],
     "notes": "Detailed study plan and action items for this week...",
-    "resources": [
-      {{"skill": "skill1", "url": "https://..."}},
-      {{"skill": "skill2", "url": "https://..."}}
-    ]
+    "resources": [{{"skill": "skill1", "url": "https://..."}}]
   }}
 ]
 """
+
+
+def _skill_for_week(week: Dict, skills_by_key: Dict[str, str]) -> str | None:
+    """Which requested skill a generated week belongs to (its first listed skill)."""
+    if not week["skills"]:
+        return None
+    return skills_by_key.get(week["skills"][0].strip().casefold())
+
+
+@_coalesce
+def ai_generate_skill_weeks(skills: List[str], weeks_per_skill: int = 1) -> Tuple[Dict[str, List[Dict]], List[str]]:
+    """
+    Generate a separate block of `weeks_per_skill` roadmap weeks for each skill.
+    Returns ({skill: [week, ...]}, fallback_skills). The per-skill fragments are
+    stored and reused so a later analysis only pays for skills that are newly
+    missing, except those in fallback_skills: they hold the static placeholder
+    week because generation failed, and must not be stored.
+    """
+    if not skills:
+        return {}, []
+    skills_by_key = {s.strip().casefold(): s for s in skills}
+    fragments: Dict[str, List[Dict]] = {}
+    for skill in skills:
+        cached = _fragment_templates.lookup(template_key([skill], weeks_per_skill))
+        if cached is not None:
+            fragments[skill] = cached
+
+    pending = [s for s in skills if s not in fragments]
+    asked = list(pending)
+    for attempt in range((1 + MAX_REASKS) if pending else 0):
+        try:
+            weeks = _ask_gemini_items(_skill_weeks_prompt(pending, weeks_per_skill), RoadmapWeek,
+                                      label="roadmap_fragments")
+        except Exception as e:
+            _log_fallback("roadmap_fragments", "Roadmap fragment generation error", e)
+            break
+        for week in weeks:
+            skill = _skill_for_week(week, skills_by_key)
+            if skill in pending and len(fragments.get(skill, [])) < weeks_per_skill:
+                fragments.setdefault(skill, []).append(week)
+        pending = [s for s in skills if s not in fragments]
+        # Only re-ask for the skills that came back empty
+        if not pending or not weeks:
+            break
+
+    for skill in asked:
+        if skill not in pending:
+            _fragment_templates.add(template_key([skill], weeks_per_skill), fragments[skill])
+    for skill in pending:
+        fragments[skill] = _fallback_roadmap([skill])
+    return fragments, pending
+
+
+def ai_stream_skill_weeks(skills: List[str], weeks_per_skill: int = 1) -> Iterator[Tuple[str, Dict, bool]]:
+    """
+    Streaming variant of ai_generate_skill_weeks: yields (skill, week, is_fallback)
+    as soon as each week's JSON object is complete in Gemini's streamed output.
+    Skills that never arrive (stream cut off / invalid) are generated at the end.
+    """
+    if not skills:
+        return
+    # Skills already pooled by other users are emitted straight away
+    pending = []
+    for skill in skills:
+        cached = _fragment_templates.lookup(template_key([skill], weeks_per_skill))
+        if cached is None:
+            pending.append(skill)
+            continue
+        for week in cached:
+            yield skill, week, False
+    if not pending:
+        return
+    skills = pending
+
+    skills_by_key = {s.strip().casefold(): s for s in skills}
+    counts: Dict[str, int] = {}
+    streamed: Dict[str, List[Dict]] = {}
+    prompt = _skill_weeks_prompt(skills, weeks_per_skill)
+    timeout = llm_caller.timeout
+    parser = IncrementalArrayParser()
+    text_parts: List[str] = []
+    usage = None
+    start = time.perf_counter()
     try:
-        result = _ask_gemini_json(prompt)
-        if isinstance(result, list):
-            return result
-        return []
+        stream = llm_caller.call(
+            lambda: _get_model().generate_content(
+                prompt,
+                stream=True,
+                generation_config={"response_mime_type": "application/json"},
+                request_options={"timeout": timeout},
+            ),
+            hedge=False,
+        )
+        for chunk in stream:
+            text_parts.append(chunk.text)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            for week in validate_items(parser.feed(chunk.text), RoadmapWeek):
+                skill = _skill_for_week(week, skills_by_key)
+                if skill is None or counts.get(skill, 0) >= weeks_per_skill:
+                    continue
+                if not counts:
+                    FUNCTION_SECONDS.observe(time.perf_counter() - start, function="llm_roadmap_stream_first_week")
+                counts[skill] = counts.get(skill, 0) + 1
+                streamed.setdefault(skill, []).append(week)
+                yield skill, week, False
     except Exception as e:
-        print(f"[AI Agent] Roadmap generation error: {e}")
-        # Fallback — basic roadmap
-        return [{
-            "week": 1,
-            "title": f"Week 1: Start Learning {', '.join(missing_skills[:3])}",
-            "skills": missing_skills,
-            "notes": f"Focus on learning: {skills_str}. Start with official documentation.",
-            "resources": [
-                {"skill": s, "url": f"https://www.google.com/search?q=learn+{s.replace(' ', '+')}"}
-                for s in missing_skills
-            ],
-        }]
+        LLM_ERRORS.inc(function="roadmap_stream")
+        print(f"[AI Agent] Roadmap stream interrupted after {sum(counts.values())} weeks: {e}")
+    finally:
+        FUNCTION_SECONDS.observe(time.perf_counter() - start, function="llm_roadmap_stream")
+
+    if text_parts:
+        _record_usage("roadmap_stream", prompt, SimpleNamespace(text="".join(text_parts), usage_metadata=usage))
+    for skill, weeks in streamed.items():
+        _fragment_templates.add(template_key([skill], weeks_per_skill), weeks)
+    missing = [s for s in skills if s not in counts]
+    fragments, fallback = ai_generate_skill_weeks(missing, weeks_per_skill)
+    for skill, weeks in fragments.items():
+        for week in weeks:
+            yield skill, week, skill in fallback
+
+
+def _fallback_roadmap(missing_skills: List[str]) -> List[Dict]:
+    """Basic one-week roadmap used when AI generation fails."""
+    skills_str = ", ".join(missing_skills)
+    return [{
+        "week": 1,
+        "title": f"Week 1: Start Learning {', '.join(missing_skills[:3])}",
+        "skills": missing_skills,
+        "notes": f"Focus on learning: {skills_str}. Start with official documentation.",
+        "resources": [
+            {"skill": s, "url": f"https://www.google.com/search?q=learn+{s.replace(' ', '+')}"}
+            for s in missing_skills
+        ],
+    }]
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 3.1 AI PROJECT GENERATION
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
+@_coalesce
 def ai_generate_projects(missing_skills: List[str], count: int = 2) -> List[Dict]:
     """
     Use Gemini to create unique, hands-on mini projects for the given skills.
@@ -235,6 +507,11 @@ def ai_generate_projects(missing_skills: List[str], count: int = 2) -> List[Dict
     if not missing_skills:
         return []
 
+    key = template_key(missing_skills, count)
+    cached = _project_templates.lookup(key)
+    if cached is not None:
+        return cached
+
     skills_str = ", ".join(missing_skills)
     prompt = f"""You are a technical project mentor.
     
@@ -257,13 +534,13 @@ Return ONLY valid JSON in this format (no markdown):
 ]
 """
     try:
-        result = _ask_gemini_json(prompt)
-        if isinstance(result, list):
-            return result[:count]
-        return []
+        projects = _ask_gemini_items(prompt, MiniProject, label="projects")[:count]
     except Exception as e:
-        print(f"[AI Agent] Project generation error: {e}")
+        _log_fallback("projects", "Project generation error", e)
         return []
+    if projects:
+        _project_templates.add(key, projects)
+    return projects
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -294,31 +571,41 @@ Keep replies concise and spoken-friendly (the user may hear your answer via text
 Use simple language. Be encouraging but honest.
 """
 
-# Store per-user chat sessions in memory
-_coach_sessions: dict[str, object] = {}
+# Per-user chat histories live in the shared store, so a conversation
+# continues whichever worker process serves the next message
+COACH_SESSION_TTL_SECONDS = int(os.getenv("COACH_SESSION_TTL_SECONDS", str(24 * 3600)))
+_coach_sessions = shared_state.namespace("coach", ttl=COACH_SESSION_TTL_SECONDS)
+
+_COACH_HEAD = [
+    {"role": "user", "parts": [INTERVIEW_COACH_PROMPT]},
+    {"role": "model", "parts": [
+        "I'm your AI Interview Coach! I can help you with:\n"
+        "• Mock interviews (technical & behavioral)\n"
+        "• Detailed feedback on your answers\n"
+        "• Learning concepts for your skill gaps\n"
+        "• Interview tips and career guidance\n\n"
+        "What would you like to practise today?"
+    ]},
+]
 
 
 def get_interview_coach(user_email: str):
-    """Return (or create) a Gemini interview coach session for this user."""
-    if user_email not in _coach_sessions:
-        _coach_sessions[user_email] = _model.start_chat(
-            history=[
-                {"role": "user", "parts": [INTERVIEW_COACH_PROMPT]},
-                {"role": "model", "parts": [
-                    "I'm your AI Interview Coach! I can help you with:\n"
-                    "• Mock interviews (technical & behavioral)\n"
-                    "• Detailed feedback on your answers\n"
-                    "• Learning concepts for your skill gaps\n"
-                    "• Interview tips and career guidance\n\n"
-                    "What would you like to practise today?"
-                ]},
-            ]
-        )
-    return _coach_sessions[user_email]
+    """Start a Gemini interview coach chat for this user, resuming their saved history."""
+    saved = _coach_sessions.get_json(user_email) or []
+    # Only resend the system turns plus the most recent exchanges that fit the budget
+    return _get_model().start_chat(history=trim_chat_history(_COACH_HEAD + saved))
 
 
 def ai_interview_coach(user_message: str, user_email: str = "anonymous") -> str:
     """Send a message to the AI interview coach and get a response."""
     chat = get_interview_coach(user_email)
-    response = chat.send_message(user_message)
+    # No hedging here: a duplicate send_message would append twice to the chat history
+    try:
+        with timed("llm_coach", stage="llm"):
+            response = llm_caller.call(lambda: chat.send_message(user_message), hedge=False)
+    except Exception:
+        LLM_ERRORS.inc(function="coach")
+        raise
+    _coach_sessions.set_json(user_email, history_to_dicts(chat.history[len(_COACH_HEAD):]))
+    _record_usage("coach", user_message, response)
     return response.text
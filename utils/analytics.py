@@ -0,0 +1,295 @@
+"""
+Learning analytics — per-skill mastery, readiness and roadmap progress.
+
+  - ewma_by_group(starts, scores)  → vectorised EWMA for many score series at once
+  - record_test_result(db, ...)    → O(1) mastery update after each /test/check
+  - refresh_progress(db, user_id)  → recompute Progress.total_progress_percentage
+  - user_analytics(db, user)       → mastery per skill, readiness, roadmap progress
+  - cohort_mastery(db)             → admin batch over every TestResult row
+
+Mastery is an exponentially-weighted mean of a skill's test scores
+(m = α·score + (1-α)·m_prev, seeded with the first score), so recent attempts
+count most. Readiness is the mean of min(mastery / MASTERY_TARGET, 1) over the
+latest analysis' missing skills. A roadmap week counts as done once every skill
+it covers is either marked completed (/progress/update) or mastered.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import GeneratedRoadmap, Progress, SkillAnalysis, SkillMastery, TestResult, User
+from utils.http_cache import touch
+
+load_dotenv()
+
+MASTERY_ALPHA = float(os.getenv("MASTERY_ALPHA", "0.4"))
+# Mastery (0-100) at which a skill counts as learned
+MASTERY_TARGET = float(os.getenv("MASTERY_TARGET", "70"))
+# Rows fetched per round-trip in cohort mode
+COHORT_CHUNK_ROWS = int(os.getenv("COHORT_CHUNK_ROWS", "200000"))
+
+
+def _key(skill: str) -> str:
+    return skill.strip().lower()
+
+
+# ── Vectorised core ───────────────────────────────────────────
+def ewma_by_group(starts: np.ndarray, scores: np.ndarray, alpha: float = MASTERY_ALPHA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    EWMA of every contiguous group in `scores` (rows sorted oldest → newest
+    within each group; `starts` marks each group's first row).
+    Returns (mastery per group, rows per group).
+
+    Uses the closed form m_N = (1-α)^(N-1)·s_1 + Σ_{k≥2} α(1-α)^(N-k)·s_k,
+    so the whole array is reduced with one bincount — no Python loop per row.
+    """
+    n = len(scores)
+    if n == 0:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    group = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    sizes = np.diff(np.append(first, n))
+    position = np.arange(n) - first[group]
+    exponent = (sizes[group] - 1 - position).astype(np.float64)
+    weights = alpha * np.power(1.0 - alpha, exponent)
+    weights[first] = np.power(1.0 - alpha, sizes - 1.0)
+    mastery = np.bincount(group, weights=weights * scores, minlength=len(sizes))
+    return mastery, sizes
+
+
+# ── Per-user, incremental ─────────────────────────────────────
+def _mastery_rows(db: Session, user_id: int) -> Dict[str, SkillMastery]:
+    rows = db.query(SkillMastery).filter(SkillMastery.user_id == user_id).all()
+    return {r.skill_key: r for r in rows}
+
+
+def _mastery_row(db: Session, user_id: int, key: str):
+    return (
+        db.query(SkillMastery)
+        .filter(SkillMastery.user_id == user_id, SkillMastery.skill_key == key)
+        .first()
+    )
+
+
+def record_test_result(db: Session, user_id: int, skill_name: str, score: float) -> SkillMastery:
+    """
+    Fold one new test score into the user's mastery for that skill.
+    The first time a skill is seen its mastery is computed from the full
+    history (covers results recorded before this table existed).
+    """
+    key = _key(skill_name)
+    row = _mastery_row(db, user_id, key)
+    created = False
+    if row is None:
+        scores = np.array([
+            s for (s,) in db.query(TestResult.score)
+            .filter(TestResult.user_id == user_id, func.lower(TestResult.skill_name) == key)
+            .order_by(TestResult.taken_at, TestResult.id)
+        ] or [score], dtype=np.float64)
+        starts = np.zeros(len(scores), dtype=bool)
+        starts[0] = True
+        mastery, _ = ewma_by_group(starts, scores)
+        row = SkillMastery(user_id=user_id, skill_key=key, skill_name=skill_name,
+                           mastery=float(mastery[0]), attempts=len(scores))
+        db.add(row)
+        try:
+            db.flush()
+            created = True
+        except IntegrityError:
+            # A concurrent check of the same skill created the row first; fold this score into it
+            db.rollback()
+            row = _mastery_row(db, user_id, key)
+    if not created:
+        row.mastery = MASTERY_ALPHA * score + (1 - MASTERY_ALPHA) * row.mastery
+        row.attempts += 1
+    row.last_score = score
+    row.updated_at = datetime.utcnow()
+    db.flush()  # sessions don't autoflush; refresh_progress must see this row
+    refresh_progress(db, user_id, commit=False)
+    db.commit()
+    return row
+
+
+def _latest_missing_skills(db: Session, user_id: int) -> List[str]:
+    analysis = (
+        db.query(SkillAnalysis)
+        .filter(SkillAnalysis.user_id == user_id)
+        .order_by(SkillAnalysis.id.desc())
+        .first()
+    )
+    return json.loads(analysis.missing_skills) if analysis and analysis.missing_skills else []
+
+
+def _latest_roadmap_weeks(db: Session, user_id: int) -> List[dict]:
+    roadmap = (
+        db.query(GeneratedRoadmap)
+        .filter(GeneratedRoadmap.user_id == user_id)
+        .order_by(GeneratedRoadmap.id.desc())
+        .first()
+    )
+    return json.loads(roadmap.roadmap_data) if roadmap else []
+
+
+def _progress_row(db: Session, user_id: int) -> Progress:
+    progress = (
+        db.query(Progress)
+        .filter(Progress.user_id == user_id)
+        .order_by(Progress.id.desc())
+        .first()
+    )
+    if not progress:
+        progress = Progress(user_id=user_id, completed_skills="[]", total_progress_percentage=0.0)
+        db.add(progress)
+    return progress
+
+
+def readiness(mastery: Dict[str, float], missing_skills: Iterable[str]) -> float:
+    """Percent of the way the user's mastery is to MASTERY_TARGET across `missing_skills`."""
+    keys = [_key(s) for s in missing_skills]
+    if not keys:
+        return 100.0
+    values = np.array([mastery.get(k, 0.0) for k in keys])
+    return round(float(np.minimum(values / MASTERY_TARGET, 1.0).mean() * 100), 2)
+
+
+def roadmap_progress(weeks: List[dict], done_skills: set, fallback_skills: Iterable[str] = ()) -> float:
+    """
+    Percent of roadmap weeks whose skills are all done. Without a roadmap,
+    the share of `fallback_skills` (the missing skills) that are done.
+    """
+    units = [[_key(s) for s in w.get("skills", [])] for w in weeks] or [[_key(s)] for s in fallback_skills]
+    if not units:
+        return 0.0
+    done = np.array([bool(skills) and all(s in done_skills for s in skills) for skills in units])
+    return round(float(done.mean() * 100), 2)
+
+
+def _done_skills(progress: Progress, mastery: Dict[str, float]) -> set:
+    completed = json.loads(progress.completed_skills) if progress.completed_skills else []
+    return {_key(s) for s in completed} | {k for k, m in mastery.items() if m >= MASTERY_TARGET}
+
+
+def refresh_progress(db: Session, user_id: int, progress: Progress = None, commit: bool = True) -> Progress:
+    """Recompute and store Progress.total_progress_percentage from the roadmap and mastery."""
+    progress = progress or _progress_row(db, user_id)
+    mastery = {k: r.mastery for k, r in _mastery_rows(db, user_id).items()}
+    progress.total_progress_percentage = roadmap_progress(
+        _latest_roadmap_weeks(db, user_id),
+        _done_skills(progress, mastery),
+        _latest_missing_skills(db, user_id),
+    )
+    touch(db, user_id, "progress", "dashboard")
+    if commit:
+        db.commit()
+    return progress
+
+
+def user_analytics(db: Session, user: User) -> dict:
+    """Mastery per skill, readiness against the latest analysis, and roadmap progress."""
+    rows = _mastery_rows(db, user.id)
+    mastery = {k: r.mastery for k, r in rows.items()}
+    missing_skills = _latest_missing_skills(db, user.id)
+    progress = _progress_row(db, user.id)
+    return {
+        "user_id": user.id,
+        "skills": [
+            {
+                "skill_name": r.skill_name,
+                "mastery": round(r.mastery, 2),
+                "attempts": r.attempts,
+                "last_score": r.last_score,
+                "mastered": r.mastery >= MASTERY_TARGET,
+            }
+            for r in sorted(rows.values(), key=lambda r: -r.mastery)
+        ],
+        "readiness_percentage": readiness(mastery, missing_skills),
+        "roadmap_progress_percentage": roadmap_progress(
+            _latest_roadmap_weeks(db, user.id), _done_skills(progress, mastery), missing_skills
+        ),
+    }
+
+
+# ── Cohort batch ──────────────────────────────────────────────
+def _load_history(db: Session) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(user_ids, skill_keys, scores) for every TestResult, sorted user → skill → time."""
+    skill = func.lower(TestResult.skill_name)
+    stmt = (
+        select(TestResult.user_id, skill, TestResult.score)
+        .order_by(TestResult.user_id, skill, TestResult.taken_at, TestResult.id)
+        .execution_options(yield_per=COHORT_CHUNK_ROWS)
+    )
+    users, skills, scores = [], [], []
+    for chunk in db.execute(stmt).partitions():
+        u, k, s = zip(*chunk)
+        users.append(np.fromiter(u, dtype=np.int64, count=len(u)))
+        skills.append(np.array(k, dtype=object))
+        scores.append(np.fromiter((x or 0.0 for x in s), dtype=np.float64, count=len(s)))
+    if not users:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object), np.zeros(0)
+    return np.concatenate(users), np.concatenate(skills), np.concatenate(scores)
+
+
+def cohort_mastery(db: Session, persist: bool = False) -> dict:
+    """
+    Mastery for every (user, skill) in one vectorised pass, summarised per skill.
+    With `persist`, the skill_mastery table is rebuilt from the result.
+    """
+    started = time.perf_counter()
+    users, skills, scores = _load_history(db)
+    if len(scores) == 0:
+        return {"users": 0, "tests": 0, "skills": [], "seconds": 0.0}
+
+    skill_names, skill_codes = np.unique(skills, return_inverse=True)
+    starts = np.ones(len(scores), dtype=bool)
+    starts[1:] = (users[1:] != users[:-1]) | (skill_codes[1:] != skill_codes[:-1])
+    mastery, attempts = ewma_by_group(starts, scores)
+    first = np.flatnonzero(starts)
+    group_users, group_skills = users[first], skill_codes[first]
+
+    # Per-skill summary: sort groups by (skill, mastery) so each skill is a contiguous, sorted slice
+    order = np.lexsort((mastery, group_skills))
+    sorted_mastery, sorted_skills = mastery[order], group_skills[order]
+    bounds = np.searchsorted(sorted_skills, np.arange(len(skill_names) + 1))
+    learners = np.diff(bounds)
+    mastered = np.bincount(group_skills, weights=mastery >= MASTERY_TARGET, minlength=len(skill_names))
+    mean = np.bincount(group_skills, weights=mastery, minlength=len(skill_names)) / np.maximum(learners, 1)
+
+    summary = []
+    for code, name in enumerate(skill_names):
+        block = sorted_mastery[bounds[code]:bounds[code + 1]]
+        summary.append({
+            "skill": name,
+            "learners": int(learners[code]),
+            "mean_mastery": round(float(mean[code]), 2),
+            "median_mastery": round(float(np.median(block)), 2),
+            "p90_mastery": round(float(np.percentile(block, 90)), 2),
+            "mastered_share": round(float(mastered[code] / learners[code]), 4),
+        })
+    summary.sort(key=lambda s: -s["learners"])
+
+    if persist:
+        now = datetime.utcnow()
+        last_scores = scores[np.append(first[1:], len(scores)) - 1]
+        db.query(SkillMastery).delete()
+        db.bulk_insert_mappings(SkillMastery, [
+            {"user_id": int(u), "skill_key": skill_names[k], "skill_name": skill_names[k],
+             "mastery": float(m), "attempts": int(a), "last_score": float(last), "updated_at": now}
+            for u, k, m, a, last in zip(group_users, group_skills, mastery, attempts, last_scores)
+        ])
+        db.commit()
+
+    return {
+        "users": int(len(np.unique(users))),
+        "tests": int(len(scores)),
+        "skills": summary,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
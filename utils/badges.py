@@ -0,0 +1,227 @@
+"""
+Server-side badge engine.
+
+Badges are declared as data (BADGES): each one names a counter and the value
+it must reach. Counters (COUNTERS) say which activity events move them and how.
+Routes report activity with emit(); only the counters listening to that event
+are updated and only the badges watching those counters are checked, so each
+activity costs O(rules affected), never a scan of the user's history.
+
+  - emit(db, user_id, event, **data) → newly earned badge ids
+  - earned_badges(db, user_id)       → ids of every badge the user holds
+  - badge_catalogue(db, user_id)     → all badges with earned flag and progress
+
+Events: "test_completed" (score, streak), "skill_gap_analysed"
+(match_percentage, streak), "project_step" (steps_added).
+
+Counter specs:
+  "events" → event names that update it
+  "min"    → (field, value): count the event only if data[field] >= value
+  "add"    → increment by data[field] instead of 1
+  "max"    → keep the largest data[field] seen (e.g. best streak)
+
+A user's counters are backfilled from history the first time they are needed,
+and badges from the legacy users.earned_badges column are carried over.
+Counters move with UPDATE ... SET value = value + n (or a conditional UPDATE
+for "max"); concurrent first events or polls that race on the unique indexes
+roll back and re-read.
+users.earned_badges is kept as a mirror for /auth/me.
+"""
+
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import BadgeCounter, SkillAnalysis, TestResult, User, UserBadge
+from utils.http_cache import touch
+from utils.project_progress import steps_ever_completed
+
+BADGES = [
+    {"id": 1, "name": "First Steps", "description": "Complete your first mock test",
+     "counter": "tests_completed", "threshold": 1},
+    {"id": 2, "name": "Test Marathon", "description": "Complete 25 mock tests",
+     "counter": "tests_completed", "threshold": 25},
+    {"id": 3, "name": "High Achiever", "description": "Score 80% or more in 5 tests",
+     "counter": "tests_scored_80", "threshold": 5},
+    {"id": 4, "name": "Perfectionist", "description": "Score 100% in a test",
+     "counter": "perfect_tests", "threshold": 1},
+    {"id": 5, "name": "Gap Finder", "description": "Run your first skill-gap analysis",
+     "counter": "analyses", "threshold": 1},
+    {"id": 6, "name": "Strong Match", "description": "Reach a 75% match with a job description",
+     "counter": "strong_matches", "threshold": 1},
+    {"id": 7, "name": "Builder", "description": "Complete 10 mini-project steps",
+     "counter": "project_steps", "threshold": 10},
+    {"id": 8, "name": "On Fire", "description": "Keep a 3-day streak",
+     "counter": "best_streak", "threshold": 3},
+    {"id": 9, "name": "Week Warrior", "description": "Keep a 7-day streak",
+     "counter": "best_streak", "threshold": 7},
+]
+
+COUNTERS = {
+    "tests_completed": {"events": ["test_completed"]},
+    "tests_scored_80": {"events": ["test_completed"], "min": ("score", 80)},
+    "perfect_tests": {"events": ["test_completed"], "min": ("score", 100)},
+    "analyses": {"events": ["skill_gap_analysed"]},
+    "strong_matches": {"events": ["skill_gap_analysed"], "min": ("match_percentage", 75)},
+    "project_steps": {"events": ["project_step"], "add": "steps_added"},
+    "best_streak": {"events": ["test_completed", "skill_gap_analysed"], "max": "streak"},
+}
+
+# Precomputed indexes: event → counters it moves, counter → badges watching it
+_COUNTERS_BY_EVENT: Dict[str, List[str]] = defaultdict(list)
+for _name, _spec in COUNTERS.items():
+    for _event in _spec["events"]:
+        _COUNTERS_BY_EVENT[_event].append(_name)
+_BADGES_BY_COUNTER: Dict[str, List[dict]] = defaultdict(list)
+for _badge in BADGES:
+    _BADGES_BY_COUNTER[_badge["counter"]].append(_badge)
+
+
+def _update(db: Session, user_id: int, name: str, data: dict) -> bool:
+    """Apply one event to a counter in SQL, so concurrent events don't lose updates; True if it changed."""
+    spec = COUNTERS[name]
+    if "min" in spec:
+        field, minimum = spec["min"]
+        if (data.get(field) or 0) < minimum:
+            return False
+    query = db.query(BadgeCounter).filter(BadgeCounter.user_id == user_id, BadgeCounter.name == name)
+    if "max" in spec:
+        value = data.get(spec["max"]) or 0
+        return bool(query.filter(BadgeCounter.value < value).update(
+            {BadgeCounter.value: value}, synchronize_session=False))
+    step = (data.get(spec["add"]) or 0) if "add" in spec else 1
+    if not step:
+        return False
+    return bool(query.update({BadgeCounter.value: BadgeCounter.value + step}, synchronize_session=False))
+
+
+def _history_counters(db: Session, user: User) -> Dict[str, float]:
+    """Counter values implied by everything the user did before the engine existed."""
+    scores = [s or 0 for (s,) in db.query(TestResult.score).filter(TestResult.user_id == user.id)]
+    matches = [m or 0 for (m,) in db.query(SkillAnalysis.match_percentage).filter(SkillAnalysis.user_id == user.id)]
+    return {
+        "tests_completed": len(scores),
+        "tests_scored_80": sum(1 for s in scores if s >= 80),
+        "perfect_tests": sum(1 for s in scores if s >= 100),
+        "analyses": len(matches),
+        "strong_matches": sum(1 for m in matches if m >= 75),
+        "project_steps": steps_ever_completed(db, user.id),
+        "best_streak": user.streak or 0,
+    }
+
+
+def _backfill(db: Session, user_id: int) -> bool:
+    """
+    Create the user's counters from history and carry over legacy badges, unless
+    they exist. True if this call created them; False also when a concurrent
+    request did so first.
+    """
+    if db.query(BadgeCounter.id).filter(BadgeCounter.user_id == user_id).first() is not None:
+        return False
+    user = db.query(User).filter(User.id == user_id).first()
+    for name, value in _history_counters(db, user).items():
+        db.add(BadgeCounter(user_id=user_id, name=name, value=value))
+    legacy = set(json.loads(user.earned_badges or "[]")) & {b["id"] for b in BADGES}
+    for badge_id in legacy:
+        db.add(UserBadge(user_id=user_id, badge_id=badge_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def _add_missing_counters(db: Session, user_id: int, names: List[str]) -> None:
+    """Rows at 0 for counters declared after the user's were backfilled."""
+    have = {n for (n,) in db.query(BadgeCounter.name).filter(BadgeCounter.user_id == user_id,
+                                                               BadgeCounter.name.in_(names))}
+    if have.issuperset(names):
+        return
+    for name in names:
+        if name not in have:
+            db.add(BadgeCounter(user_id=user_id, name=name, value=0))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # created by a concurrent event
+
+
+def _counter_values(db: Session, user_id: int, names: List[str]) -> Dict[str, float]:
+    return dict(
+        db.query(BadgeCounter.name, BadgeCounter.value)
+        .filter(BadgeCounter.user_id == user_id, BadgeCounter.name.in_(names))
+    )
+
+
+def earned_badges(db: Session, user_id: int) -> List[int]:
+    return [b for (b,) in db.query(UserBadge.badge_id).filter(UserBadge.user_id == user_id).order_by(UserBadge.earned_at)]
+
+
+def _award(db: Session, user_id: int, values: Dict[str, float], changed: List[str]) -> List[int]:
+    """Insert UserBadge rows for badges on `changed` counters that have reached their threshold."""
+    candidates = [b for name in changed for b in _BADGES_BY_COUNTER[name] if values[name] >= b["threshold"]]
+    new_ids = []
+    if candidates:
+        held = set(earned_badges(db, user_id))
+        now = datetime.utcnow()
+        for badge in candidates:
+            if badge["id"] not in held:
+                held.add(badge["id"])
+                new_ids.append(badge["id"])
+                db.add(UserBadge(user_id=user_id, badge_id=badge["id"], earned_at=now))
+        if new_ids:
+            db.query(User).filter(User.id == user_id).update({User.earned_badges: json.dumps(sorted(held))},
+                                                              synchronize_session=False)
+            touch(db, user_id, "dashboard")
+    return new_ids
+
+
+def _award_and_commit(db: Session, user_id: int, changed: List[str]) -> List[int]:
+    for _ in range(2):
+        new_ids = _award(db, user_id, _counter_values(db, user_id, changed), changed)
+        try:
+            db.commit()
+            return new_ids
+        except IntegrityError:
+            db.rollback()  # a concurrent event awarded some of them first; the rest are still ours
+    return []
+
+
+def emit(db: Session, user_id: int, event: str, **data) -> List[int]:
+    """Record one activity event and award any badges it unlocks; returns their ids."""
+    names = _COUNTERS_BY_EVENT.get(event)
+    if not names:
+        return []
+
+    if _backfill(db, user_id):
+        # History already includes this event, so evaluate rather than increment
+        changed = list(COUNTERS)
+    else:
+        _add_missing_counters(db, user_id, names)
+        changed = [name for name in names if _update(db, user_id, name, data)]
+        db.commit()
+    return _award_and_commit(db, user_id, changed)
+
+
+def badge_catalogue(db: Session, user_id: int) -> List[dict]:
+    """Every badge with whether the user holds it and their progress towards it."""
+    if _backfill(db, user_id):
+        _award_and_commit(db, user_id, list(COUNTERS))
+    held = set(earned_badges(db, user_id))
+    values = dict(db.query(BadgeCounter.name, BadgeCounter.value).filter(BadgeCounter.user_id == user_id))
+    return [
+        {
+            "id": b["id"],
+            "name": b["name"],
+            "description": b["description"],
+            "earned": b["id"] in held,
+            "progress": int(min(values.get(b["counter"], 0), b["threshold"])),
+            "threshold": b["threshold"],
+        }
+        for b in BADGES
+    ]
@@ -0,0 +1,115 @@
+"""
+Conditional GET (ETag / If-None-Match) for per-user read endpoints.
+
+Each user has a version counter per cached resource, kept in the shared
+state store so every worker sees the same value. Writes bump the counters
+of the resources they change. The ETag is derived from the counter alone,
+so a poll whose If-None-Match still matches is answered 304 after a token
+decode and one store lookup: no user query and no response assembly.
+
+  - RESOURCES                        → "resume", "roadmap", "progress", "dashboard"
+  - touch(db, user_id, *resources)   → bump once `db` commits (nothing if it rolls back)
+  - bump(user_id, *resources)        → bump now, for writes that don't go through a commit
+  - conditional(resource)            → route dependency: 304 on a match, else sets ETag
+                                       on the response and returns it
+  - cache_headers(tag)               → the same headers, for routes returning a Response
+  - not_modified(if_none_match, user_id, resource) → would conditional() answer 304?
+
+Counters are bumped only after the write is committed, and read before the
+response is built, so a body is never newer-tagged than its contents.
+"""
+
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from utils import shared_state
+from utils.jwt_handler import oauth2_scheme, user_id_from_token
+
+RESOURCES = ("resume", "roadmap", "progress", "dashboard")
+# Clients may keep the body but must revalidate before every use
+CACHE_CONTROL = "private, no-cache"
+
+_versions = shared_state.namespace("version")
+
+
+def _key(user_id: int, resource: str) -> str:
+    return f"{user_id}:{resource}"
+
+
+def _initial() -> int:
+    # Counters (re)created later start higher, so a lost counter never reissues an old ETag
+    return int(time.time() * 1000)
+
+
+def bump(user_id: int, *resources: str) -> None:
+    for resource in resources:
+        _versions.incr(_key(user_id, resource), _initial())
+
+
+def version(user_id: int, resource: str) -> int:
+    value = _versions.get_json(_key(user_id, resource))
+    return value if value is not None else _versions.incr(_key(user_id, resource), _initial())
+
+
+def etag(user_id: int, resource: str) -> str:
+    return f'"{resource}-{user_id}-{version(user_id, resource)}"'
+
+
+# ── Bump after commit ─────────────────────────────────────────
+def touch(db: Session, user_id: int, *resources: str) -> None:
+    """Bump these counters when `db` next commits; a rollback discards them."""
+    db.info.setdefault("touched", set()).update((user_id, r) for r in resources)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_touched(session: Session) -> None:
+    for user_id, resource in session.info.pop("touched", ()):
+        bump(user_id, resource)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_touched(session: Session) -> None:
+    session.info.pop("touched", None)
+
+
+# ── Route dependency ──────────────────────────────────────────
+def cache_headers(tag: Optional[str]) -> dict:
+    return {"ETag": tag, "Cache-Control": CACHE_CONTROL} if tag else {}
+
+
+def _matches(if_none_match: Optional[str], tag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    return any(t.strip().removeprefix("W/") == tag for t in if_none_match.split(","))
+
+
+def not_modified(if_none_match: Optional[str], user_id: int, resource: str) -> bool:
+    """True when the client's If-None-Match still matches, i.e. the route will answer 304."""
+    return bool(if_none_match) and _matches(if_none_match, etag(user_id, resource))
+
+
+def conditional(resource: str):
+    """
+    Dependency for a GET route serving `resource`. List it before the other
+    dependencies so a 304 is sent before the user is loaded.
+    """
+    def dependency(request: Request, response: Response, token: str = Depends(oauth2_scheme)) -> Optional[str]:
+        user_id = user_id_from_token(token)
+        if user_id is None:
+            return None  # get_current_user answers 401
+        tag = etag(user_id, resource)
+        headers = cache_headers(tag)
+        if _matches(request.headers.get("if-none-match"), tag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return tag
+
+    return dependency
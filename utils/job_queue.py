@@ -0,0 +1,245 @@
+"""
+Background job queue for long-running AI generations.
+
+Jobs are rows in the `jobs` table (durable across restarts); a fixed pool of
+asyncio workers claims them and runs the registered handler in a thread, so
+HTTP workers return immediately with a job id and generation concurrency is
+controlled by a single knob (JOB_WORKERS).
+
+  - register_handler(kind) → decorator registering fn(db, user, payload) -> dict
+  - enqueue(db, user_id, kind, payload) → Job (status "queued")
+  - start_workers() / stop_workers()   → called on app startup / shutdown; stopping
+                                         drains running jobs for up to JOB_DRAIN_SECONDS
+  - job_to_dict(job)                   → API representation
+  - accepted(job)                      → 202 response pointing at the status/SSE URLs
+  - cancel_queued(db, user_id, kinds)  → drop not-yet-started jobs that are no longer wanted
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from models import Job, User
+
+load_dotenv()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# A "running" job older than this is assumed orphaned by a crashed worker and re-queued
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+# On shutdown, how long running jobs get to finish before they are re-queued
+JOB_DRAIN_SECONDS = float(os.getenv("JOB_DRAIN_SECONDS", "20"))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+TERMINAL_STATUSES = {DONE, FAILED, CANCELLED}
+
+_handlers: Dict[str, Callable[[Session, User, dict], dict]] = {}
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_running: set = set()      # ids of jobs this process is executing
+_stopping = False
+
+
+def register_handler(kind: str):
+    """Register the function that executes jobs of `kind`."""
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def _notify() -> None:
+    """Wake an idle worker (safe to call from any thread)."""
+    if _loop is not None and _wakeup is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def enqueue(db: Session, user_id: int, kind: str, payload: Optional[dict] = None) -> Job:
+    """Persist a new job and wake the worker pool."""
+    if kind not in _handlers:
+        raise ValueError(f"No job handler registered for '{kind}'")
+    job = Job(id=str(uuid.uuid4()), user_id=user_id, kind=kind, status=QUEUED,
+              payload=json.dumps(payload or {}))
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _notify()
+    return job
+
+
+def cancel_queued(db: Session, user_id: int, kinds: List[str]) -> int:
+    """Cancel this user's queued (not yet running) jobs of the given kinds."""
+    cancelled = (
+        db.query(Job)
+        .filter(Job.user_id == user_id, Job.kind.in_(kinds), Job.status == QUEUED)
+        .update({"status": CANCELLED, "finished_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return cancelled
+
+
+def job_to_dict(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": str(job.created_at),
+        "finished_at": str(job.finished_at) if job.finished_at else None,
+    }
+
+
+def accepted(job: Job) -> JSONResponse:
+    """202 Accepted for an enqueued job, with where to poll / subscribe."""
+    status_url = f"/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": status_url,
+            "events_url": f"{status_url}/events",
+        },
+        headers={"Location": status_url},
+    )
+
+
+# ── Worker internals (run in threads) ─────────────────────────
+def _claim_next() -> Optional[str]:
+    """Atomically move the oldest queued job to running; return its id."""
+    db = SessionLocal()
+    try:
+        while True:
+            job = (
+                db.query(Job.id)
+                .filter(Job.status == QUEUED)
+                .order_by(Job.created_at)
+                .first()
+            )
+            if not job:
+                return None
+            # Conditional update so two workers (or processes) never claim the same job
+            claimed = (
+                db.query(Job)
+                .filter(Job.id == job.id, Job.status == QUEUED)
+                .update({"status": RUNNING, "started_at": datetime.utcnow(),
+                         "attempts": Job.attempts + 1}, synchronize_session=False)
+            )
+            db.commit()
+            if claimed == 1:
+                return job.id
+    finally:
+        db.close()
+
+
+def _run_job(job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        user = db.query(User).filter(User.id == job.user_id).first()
+        try:
+            result = _handlers[job.kind](db, user, json.loads(job.payload or "{}"))
+            job.status, job.result = DONE, json.dumps(result, default=str)
+        except Exception as e:
+            db.rollback()
+            print(f"[Jobs] {job.kind} job {job.id} failed: {e}")
+            job.status, job.error = FAILED, str(e)
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _requeue_stale() -> int:
+    """Recover jobs left 'running' by a worker that died mid-way."""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+        stale = db.query(Job).filter(Job.status == RUNNING, Job.started_at < cutoff)
+        failed = stale.filter(Job.attempts >= JOB_MAX_ATTEMPTS).update(
+            {"status": FAILED, "error": "worker lost", "finished_at": datetime.utcnow()},
+            synchronize_session=False)
+        requeued = stale.filter(Job.attempts < JOB_MAX_ATTEMPTS).update(
+            {"status": QUEUED}, synchronize_session=False)
+        db.commit()
+        return requeued + failed
+    finally:
+        db.close()
+
+
+def _requeue_interrupted(job_ids: List[str]) -> int:
+    """Put jobs cut off by shutdown back in the queue without counting the lost attempt."""
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(Job)
+            .filter(Job.id.in_(job_ids), Job.status == RUNNING)
+            .update({"status": QUEUED, "attempts": Job.attempts - 1}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+    finally:
+        db.close()
+
+
+# ── Worker pool ───────────────────────────────────────────────
+async def _worker(n: int) -> None:
+    while not _stopping:
+        # Clear before looking so an enqueue racing with the claim is not missed
+        _wakeup.clear()
+        job_id = await asyncio.to_thread(_claim_next)
+        if job_id is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        _running.add(job_id)
+        await asyncio.to_thread(_run_job, job_id)
+        _running.discard(job_id)   # skipped on cancellation, so stop_workers re-queues it
+
+
+async def start_workers(count: int = JOB_WORKERS) -> None:
+    """Start `count` workers on the running event loop."""
+    global _loop, _wakeup
+    if _workers:
+        return
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    await asyncio.to_thread(_requeue_stale)
+    for n in range(count):
+        _workers.append(asyncio.create_task(_worker(n), name=f"job-worker-{n}"))
+
+
+async def stop_workers(drain_seconds: float = JOB_DRAIN_SECONDS) -> None:
+    """
+    Stop claiming jobs and give running ones `drain_seconds` to finish.
+    Jobs still running after that are cancelled and put back in the queue.
+    """
+    global _loop, _wakeup, _stopping
+    if not _workers:
+        return
+    _stopping = True
+    _wakeup.set()  # idle workers see _stopping and exit
+    _, unfinished = await asyncio.wait(_workers, timeout=drain_seconds)
+    for task in unfinished:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    if _running:
+        requeued = await asyncio.to_thread(_requeue_interrupted, list(_running))
+        print(f"[Jobs] Re-queued {requeued} job(s) interrupted by shutdown")
+        _running.clear()
+    _loop = _wakeup = None
+    _stopping = False
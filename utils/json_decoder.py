@@ -0,0 +1,178 @@
+"""
+Robust decoding of LLM JSON output.
+
+  - extract_json            → parse the first JSON value in a response, ignoring
+                              code fences and trailing prose, repairing truncation
+  - IncrementalArrayParser  → feed text chunks, get back each array element as
+                              soon as it is complete (works on streams and on
+                              truncated responses)
+  - validate_items          → keep only the elements that match a pydantic model
+"""
+
+import json
+from typing import Any, Callable, Iterable, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _find_json_start(text: str) -> int:
+    """Index of the first '{' or '[' in text, or -1."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    return min(starts) if starts else -1
+
+
+def _close_truncated(text: str) -> Optional[str]:
+    """
+    Repair a JSON document that was cut off mid-way: drop the trailing
+    incomplete value and append the missing closing brackets.
+    Returns None if nothing complete can be salvaged.
+    """
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    # Position just after the last value that was fully closed inside a container
+    safe_cut = -1
+    safe_stack: List[str] = []
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                return text[: i + 1]
+            safe_cut, safe_stack = i + 1, list(stack)
+        elif ch == ",":
+            # Everything before a top-level-of-container comma is a complete member
+            safe_cut, safe_stack = i, list(stack)
+
+    if safe_cut == -1:
+        return None
+    head = text[:safe_cut].rstrip().rstrip(",")
+    # A dangling `"key":` with no value would still be invalid
+    if head.endswith(":"):
+        return None
+    return head + "".join(_CLOSERS[c] for c in reversed(safe_stack))
+
+
+def extract_json(text: str) -> Any:
+    """
+    Parse the first JSON object/array found in `text`.
+    Tolerates ```json fences, leading/trailing prose and truncated output
+    (complete array elements / object members are kept, the rest dropped).
+    Raises ValueError when no JSON can be recovered.
+    """
+    start = _find_json_start(text)
+    if start == -1:
+        raise ValueError("No JSON value found in model response")
+
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+        return value
+    except json.JSONDecodeError:
+        pass
+
+    if text[start] == "[":
+        parser = IncrementalArrayParser()
+        items = parser.feed(text[start:])
+        if items:
+            return items
+
+    repaired = _close_truncated(text[start:])
+    if repaired is not None:
+        try:
+            return json.loads(repaired)
+        except json.JSONDecodeError:
+            pass
+    raise ValueError("Model response is not valid JSON and could not be repaired")
+
+
+class IncrementalArrayParser:
+    """
+    Streaming parser for a JSON array of values.
+
+    Call feed() with successive chunks; each call returns the elements that
+    became complete. Anything before the opening '[' (fences, prose) is skipped.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+        self.items: List[Any] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buf += chunk
+        new_items: List[Any] = []
+        buf = self._buf
+
+        while not self.done:
+            if not self._started:
+                i = buf.find("[", self._pos)
+                if i == -1:
+                    self._pos = len(buf)
+                    break
+                self._started = True
+                self._pos = i + 1
+                continue
+
+            j = self._pos
+            while j < len(buf) and (buf[j] in _WHITESPACE or buf[j] == ","):
+                j += 1
+            self._pos = j
+            if j >= len(buf):
+                break
+            if buf[j] == "]":
+                self.done = True
+                self._pos = j + 1
+                break
+
+            try:
+                value, end = _decoder.raw_decode(buf, j)
+            except json.JSONDecodeError:
+                break  # element not complete yet — wait for more text
+            if end == len(buf) and buf[j] not in '{["':
+                break  # a bare number/literal may still be growing
+            new_items.append(value)
+            self._pos = end
+
+        # Drop consumed text so repeated feeds stay cheap
+        self._buf = buf[self._pos:]
+        self._pos = 0
+        self.items.extend(new_items)
+        return new_items
+
+
+def validate_items(
+    items: Iterable[Any],
+    model: Type[BaseModel],
+    check: Optional[Callable[[BaseModel], bool]] = None,
+) -> List[dict]:
+    """Return model_dump() of every item that validates against `model` (and `check`, if given)."""
+    valid = []
+    for item in items:
+        try:
+            obj = model.model_validate(item)
+        except ValidationError:
+            continue
+        if check is not None and not check(obj):
+            continue
+        valid.append(obj.model_dump())
+    return valid
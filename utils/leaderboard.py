@@ -0,0 +1,293 @@
+"""
+XP leaderboards.
+
+Scores come from the XP ledger (User.daily_xp, {"YYYY-MM-DD": xp}) — User.xp
+resets on every level-up, so it can't be ranked directly.
+
+  - board "all"          → lifetime XP
+  - board "week:YYYY-Www" → XP earned in that ISO week
+
+Backends (same interface):
+  - MemoryBackend → per-board sorted array of (-score, user_id) + score map;
+                    bisect finds a user in O(log n) and a rank is that index.
+                    An update moves the entry: O(n) list delete + insert, but
+                    each is one memmove (~45 µs per update at 10^5 users)
+  - RedisBackend  → Redis sorted sets (ZINCRBY / ZREVRANK / ZREVRANGE); set
+                    LEADERBOARD_REDIS_URL to share one leaderboard across processes
+
+With several worker processes and no Redis, each process only sees its own
+increments; LEADERBOARD_REFRESH_SECONDS makes memory boards reload from the
+ledger once they are that old (server.py sets it for multi-worker runs).
+
+  - record_xp(user_id, points)     → called by add_xp after it commits
+  - top(window, n) / around(window, user_id, radius)
+  - rebuild(db)                    → bulk load from the users table (app startup)
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from models import User
+
+try:
+    import redis
+except ImportError:  # optional — only needed for LEADERBOARD_REDIS_URL
+    redis = None
+
+load_dotenv()
+
+LEADERBOARD_REDIS_URL = os.getenv("LEADERBOARD_REDIS_URL", "")
+LEADERBOARD_REDIS_PREFIX = os.getenv("LEADERBOARD_REDIS_PREFIX", "leaderboard:")
+# Weekly boards older than this many weeks are dropped from memory
+LEADERBOARD_KEEP_WEEKS = int(os.getenv("LEADERBOARD_KEEP_WEEKS", "4"))
+# 0 = memory boards are never reloaded (single process)
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "0"))
+
+ALL_TIME = "all"
+
+
+def week_board(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"week:{year}-W{week:02d}"
+
+
+def _week_bounds(board: str) -> Tuple[date, date]:
+    """First and last day (inclusive) of a "week:YYYY-Www" board."""
+    year, week = board[len("week:"):].split("-W")
+    monday = date.fromisocalendar(int(year), int(week), 1)
+    return monday, monday + timedelta(days=6)
+
+
+# ── Backends ──────────────────────────────────────────────────
+class MemoryBackend:
+    def __init__(self):
+        self._scores: Dict[str, Dict[int, float]] = {}
+        self._ranked: Dict[str, List[Tuple[float, int]]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def has(self, board: str) -> bool:
+        return board in self._scores
+
+    def age(self, board: str) -> float:
+        """Seconds since the board was last loaded from the ledger."""
+        return time.monotonic() - self._loaded_at.get(board, time.monotonic())
+
+    def load(self, board: str, scores: Dict[int, float]) -> None:
+        """Replace a whole board in one O(n log n) sort."""
+        ranked = sorted((-s, uid) for uid, s in scores.items())
+        with self._lock:
+            self._scores[board] = dict(scores)
+            self._ranked[board] = ranked
+            self._loaded_at[board] = time.monotonic()
+
+    def incr(self, board: str, user_id: int, delta: float) -> float:
+        with self._lock:
+            scores = self._scores.setdefault(board, {})
+            ranked = self._ranked.setdefault(board, [])
+            old = scores.get(user_id)
+            if old is not None:
+                del ranked[bisect.bisect_left(ranked, (-old, user_id))]
+            new = (old or 0) + delta
+            scores[user_id] = new
+            bisect.insort(ranked, (-new, user_id))
+            return new
+
+    def rank(self, board: str, user_id: int) -> Optional[int]:
+        with self._lock:
+            score = self._scores.get(board, {}).get(user_id)
+            if score is None:
+                return None
+            return bisect.bisect_left(self._ranked[board], (-score, user_id))
+
+    def range(self, board: str, start: int, stop: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            return [(uid, -neg) for neg, uid in self._ranked.get(board, [])[start:stop]]
+
+    def boards(self) -> List[str]:
+        return list(self._scores)
+
+    def drop(self, board: str) -> None:
+        with self._lock:
+            self._scores.pop(board, None)
+            self._ranked.pop(board, None)
+            self._loaded_at.pop(board, None)
+
+
+class RedisBackend:
+    def __init__(self, client, prefix: str = LEADERBOARD_REDIS_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, board: str) -> str:
+        return self.prefix + board
+
+    def _expire(self, target, board: str) -> None:
+        if board.startswith("week:"):
+            ttl = (LEADERBOARD_KEEP_WEEKS + 1) * 7 * 86400
+            target.expire(self._key(board), ttl)
+            target.expire(self._key(board) + ":built", ttl)
+
+    def has(self, board: str) -> bool:
+        # Redis drops empty sorted sets, so "built" is tracked with a marker key
+        return bool(self.client.exists(self._key(board) + ":built"))
+
+    def age(self, board: str) -> float:
+        return 0.0  # shared by every process, never stale
+
+    def load(self, board: str, scores: Dict[int, float]) -> None:
+        key = self._key(board)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        items = list(scores.items())
+        for i in range(0, len(items), 10_000):
+            pipe.zadd(key, {str(uid): s for uid, s in items[i:i + 10_000]})
+        pipe.set(key + ":built", 1)
+        self._expire(pipe, board)
+        pipe.execute()
+
+    def incr(self, board: str, user_id: int, delta: float) -> float:
+        pipe = self.client.pipeline()
+        pipe.zincrby(self._key(board), delta, str(user_id))
+        self._expire(pipe, board)
+        return float(pipe.execute()[0])
+
+    def rank(self, board: str, user_id: int) -> Optional[int]:
+        # Redis orders equal scores by member descending; fine for display purposes
+        return self.client.zrevrank(self._key(board), str(user_id))
+
+    def range(self, board: str, start: int, stop: int) -> List[Tuple[int, float]]:
+        if stop <= start:
+            return []
+        rows = self.client.zrevrange(self._key(board), start, stop - 1, withscores=True)
+        return [(int(m.decode() if isinstance(m, bytes) else m), float(s)) for m, s in rows]
+
+    def boards(self) -> List[str]:
+        return []  # weekly Redis boards carry a TTL instead
+
+    def drop(self, board: str) -> None:
+        self.client.delete(self._key(board))
+        self.client.delete(self._key(board) + ":built")
+
+
+def _default_backend():
+    if LEADERBOARD_REDIS_URL:
+        if redis is None:
+            raise RuntimeError("LEADERBOARD_REDIS_URL is set but the redis package is not installed")
+        return RedisBackend(redis.Redis.from_url(LEADERBOARD_REDIS_URL))
+    return MemoryBackend()
+
+
+_backend = _default_backend()
+
+
+def set_backend(backend) -> None:
+    """Swap the backend (e.g. RedisBackend over a fake client in benchmarks)."""
+    global _backend
+    _backend = backend
+
+
+# ── Building boards from the ledger ───────────────────────────
+def _ledger_scores(db: Session, first: Optional[date] = None, last: Optional[date] = None) -> Dict[int, float]:
+    """Sum each user's daily_xp, optionally restricted to [first, last]."""
+    lo = first.isoformat() if first else ""
+    hi = last.isoformat() if last else "9999"
+    scores = {}
+    for user_id, daily_xp in db.query(User.id, User.daily_xp).yield_per(5000):
+        ledger = json.loads(daily_xp) if daily_xp else {}
+        total = sum(xp for day, xp in ledger.items() if lo <= day <= hi)
+        if total:
+            scores[user_id] = total
+    return scores
+
+
+def _ensure_board(db: Session, board: str) -> None:
+    fresh = not LEADERBOARD_REFRESH_SECONDS or _backend.age(board) < LEADERBOARD_REFRESH_SECONDS
+    if _backend.has(board) and fresh:
+        return
+    if board == ALL_TIME:
+        _backend.load(board, _ledger_scores(db))
+    else:
+        _backend.load(board, _ledger_scores(db, *_week_bounds(board)))
+
+
+def _drop_old_weeks() -> None:
+    oldest = week_board(datetime.utcnow().date() - timedelta(weeks=LEADERBOARD_KEEP_WEEKS))
+    for board in _backend.boards():
+        if board.startswith("week:") and board < oldest:
+            _backend.drop(board)
+
+
+def rebuild(db: Session) -> int:
+    """Bulk-load the all-time and current-week boards; returns the number of ranked users."""
+    today = datetime.utcnow().date()
+    all_time = _ledger_scores(db)
+    _backend.load(ALL_TIME, all_time)
+    board = week_board(today)
+    _backend.load(board, _ledger_scores(db, *_week_bounds(board)))
+    return len(all_time)
+
+
+# ── Public API ────────────────────────────────────────────────
+def record_xp(user_id: int, points: int, day: Optional[date] = None) -> None:
+    """Move the user on the all-time and weekly boards (see MemoryBackend for cost); boards not built yet are skipped."""
+    board = week_board(day or datetime.utcnow().date())
+    for name in (ALL_TIME, board):
+        if _backend.has(name):
+            _backend.incr(name, user_id, points)
+
+
+def resolve_board(window: str, week: Optional[str] = None) -> str:
+    """Board name for a window ("all" / "week") and optional ISO week "YYYY-Www"."""
+    if window != "week":
+        return ALL_TIME
+    if not week:
+        return week_board(datetime.utcnow().date())
+    try:
+        _week_bounds(f"week:{week}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid ISO week '{week}'")
+    return f"week:{week}"
+
+
+def top(db: Session, board: str, n: int = 10) -> List[dict]:
+    _ensure_board(db, board)
+    _drop_old_weeks()
+    return _with_names(db, _backend.range(board, 0, n), start=0)
+
+
+def around(db: Session, board: str, user_id: int, radius: int = 5) -> dict:
+    """The user's rank (1-based, None if unranked) and the entries around it."""
+    _ensure_board(db, board)
+    rank = _backend.rank(board, user_id)
+    if rank is None:
+        return {"rank": None, "entries": []}
+    start = max(0, rank - radius)
+    return {
+        "rank": rank + 1,
+        "entries": _with_names(db, _backend.range(board, start, rank + radius + 1), start=start),
+    }
+
+
+def _with_names(db: Session, rows: List[Tuple[int, float]], start: int) -> List[dict]:
+    ids = [uid for uid, _ in rows]
+    users = {u.id: u for u in db.query(User.id, User.name, User.level).filter(User.id.in_(ids))} if ids else {}
+    return [
+        {
+            "rank": start + i + 1,
+            "user_id": uid,
+            "name": users[uid].name if uid in users else None,
+            "level": users[uid].level if uid in users else None,
+            "xp": int(score),
+        }
+        for i, (uid, score) in enumerate(rows)
+    ]
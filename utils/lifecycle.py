@@ -0,0 +1,112 @@
+"""
+Application lifespan — everything between process start and the first request,
+and the orderly shutdown after the last one.
+
+Startup (each stage timed, see startup_timings()):
+  - migrate      → only with AUTO_MIGRATE=true; otherwise run `python migrate.py` on deploy
+  - db_pool      → open DB_POOL_WARM pooled connections up front
+  - leaderboard  → bulk-load the XP leaderboards
+  - job_workers / xp_buffer → start the background tasks
+  - warm_up      → import the Gemini and voice SDKs in a background thread so the
+                   first AI / voice request doesn't pay for it (WARMUP_AI_STACKS)
+
+Shutdown: stop claiming jobs and let running ones finish (JOB_DRAIN_SECONDS),
+then flush the XP write-behind buffer and stop the PDF extraction processes.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from db import SessionLocal, engine, warm_pool
+from utils import job_queue, leaderboard, pdf_backends, xp_buffer
+from utils.metrics import register_gauges
+
+load_dotenv()
+
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "4"))
+WARMUP_AI_STACKS = os.getenv("WARMUP_AI_STACKS", "true").lower() in ("1", "true", "yes")
+
+_timings: Dict[str, float] = {}
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+def startup_timings() -> Dict[str, float]:
+    """Milliseconds spent in each startup stage of the last startup ("total" included)."""
+    return dict(_timings)
+
+
+def _startup_gauges():
+    return [("app_startup_seconds", "Time spent in each startup stage", {"stage": stage}, ms / 1000)
+            for stage, ms in _timings.items()]
+
+
+register_gauges(_startup_gauges)
+
+
+async def _stage(name: str, fn, *args) -> None:
+    started = time.perf_counter()
+    result = fn(*args)
+    if asyncio.iscoroutine(result):
+        await result
+    _timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def _migrate() -> None:
+    from migrate import migrate
+    migrate(engine)
+
+
+def _rebuild_leaderboard() -> None:
+    db = SessionLocal()
+    try:
+        print(f"[Leaderboard] Ranked {leaderboard.rebuild(db)} users")
+    finally:
+        db.close()
+
+
+def _warm_up_stacks() -> None:
+    started = time.perf_counter()
+    from utils import ai_agent, voice_handler
+    ai_agent.warm_up()
+    voice_handler.warm_up()
+    _timings["warm_up"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def startup() -> None:
+    global _warm_up_task
+    _timings.clear()
+    started = time.perf_counter()
+    if AUTO_MIGRATE:
+        await _stage("migrate", asyncio.to_thread, _migrate)
+    await _stage("db_pool", asyncio.to_thread, warm_pool, DB_POOL_WARM)
+    await _stage("leaderboard", asyncio.to_thread, _rebuild_leaderboard)
+    await _stage("job_workers", job_queue.start_workers)
+    await _stage("xp_buffer", xp_buffer.start_flusher)
+    if WARMUP_AI_STACKS:
+        # Not awaited: requests are served while the SDKs load
+        _warm_up_task = asyncio.create_task(asyncio.to_thread(_warm_up_stacks), name="warm-up")
+    _timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"[Startup] Ready in {_timings['total']} ms {startup_timings()}")
+
+
+async def shutdown() -> None:
+    started = time.perf_counter()
+    await job_queue.stop_workers()
+    await xp_buffer.stop_flusher()
+    await asyncio.to_thread(pdf_backends.shutdown)
+    if _warm_up_task is not None and not _warm_up_task.done():
+        await asyncio.gather(_warm_up_task, return_exceptions=True)
+    print(f"[Shutdown] Drained in {round((time.perf_counter() - started) * 1000, 1)} ms")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    yield
+    await shutdown()
@@ -0,0 +1,298 @@
+"""
+Resilient call layer for LLM requests.
+
+Wraps any zero-argument callable (normally a Gemini generate_content call) with:
+  1. Client-side rate limiting  → token bucket sized to our Gemini quota
+  2. Circuit breaker            → fail fast while the provider is unhealthy
+  3. Per-call timeout           → never tie up a worker on a stuck request
+  4. Retries                    → exponential backoff + jitter on retryable errors
+  5. Hedged requests (optional) → fire a second attempt if the first is slow
+
+Everything is plain Python so it can be exercised against a local fake model.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── Configuration ─────────────────────────────────────────────
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "15"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+# 0 disables hedging; otherwise a backup request is sent after this many seconds
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "16"))
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the circuit is open or the rate limiter cannot grant a slot in time."""
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an LLM call does not finish within its timeout."""
+
+
+# ── Retry classification ──────────────────────────────────────
+# HTTP status codes / gRPC names that are worth retrying
+_RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "TooManyRequests", "GatewayTimeout", "BadGateway",
+}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Return True for transient errors (timeouts, 429, 5xx) that deserve another attempt."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if type(exc).__name__ in _RETRYABLE_NAMES:
+        return True
+    code = getattr(exc, "code", None)
+    if isinstance(code, int) and code in _RETRYABLE_CODES:
+        return True
+    return False
+
+
+# ── Token bucket ──────────────────────────────────────────────
+class TokenBucket:
+    """Thread-safe token bucket. `rate` tokens per second, up to `capacity` stored."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take `tokens` tokens if they are available right now."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def retry_after(self, tokens: float = 1) -> float:
+        """Seconds until `tokens` tokens will be available (0 if they are now)."""
+        with self._lock:
+            self._refill()
+            missing = tokens - self._tokens
+            if missing <= 0:
+                return 0.0
+            return missing / self.rate if self.rate > 0 else float("inf")
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available or `timeout` seconds pass."""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_for = (1 - self._tokens) / self.rate if self.rate > 0 else 0.05
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+
+# ── Circuit breaker ───────────────────────────────────────────
+class CircuitBreaker:
+    """
+    Classic closed → open → half-open breaker.
+    Opens after `failure_threshold` consecutive failures and lets a single
+    probe through once `reset_timeout` seconds have passed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: allow exactly one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot without recording an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+# ── Call layer ────────────────────────────────────────────────
+class ResilientCaller:
+    """Runs callables through the rate limiter, breaker, timeout, retries and hedging."""
+
+    def __init__(
+        self,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+        backoff_max: float = LLM_BACKOFF_MAX_SECONDS,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        burst: int = LLM_BURST,
+        breaker_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        breaker_reset: float = LLM_BREAKER_RESET_SECONDS,
+        hedge_after: float = LLM_HEDGE_AFTER_SECONDS,
+        max_workers: int = LLM_MAX_WORKERS,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.limiter = TokenBucket(requests_per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) retry number."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _attempt(self, fn: Callable[[], Any], timeout: float, hedge: bool) -> Any:
+        """Run one (possibly hedged) attempt and return the first successful result."""
+        if not self.limiter.acquire(timeout=timeout):
+            raise LLMUnavailableError("LLM rate limit: no request slot available")
+
+        deadline = time.monotonic() + timeout
+        futures = {self._executor.submit(fn)}
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if hedge and not hedged and self.hedge_after > 0:
+                wait_for = min(remaining, self.hedge_after)
+
+            done, futures = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    for pending in futures:
+                        pending.cancel()
+                    return f.result()
+                last_error = f.exception()
+
+            # Backup request: only if the first is still running and we have quota to spare
+            if hedge and not hedged and self.hedge_after > 0 and futures and self.limiter.try_acquire():
+                futures.add(self._executor.submit(fn))
+                hedged = True
+
+        if futures:
+            for pending in futures:
+                pending.cancel()
+            raise LLMTimeoutError(f"LLM call exceeded {timeout:.1f}s timeout")
+        raise last_error
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        *,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        hedge: bool = True,
+    ) -> Any:
+        """
+        Execute `fn` with resilience policies applied.
+        Raises LLMUnavailableError when the breaker is open so callers can use their fallback.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        max_retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(max_retries + 1):
+            if not self.breaker.allow():
+                raise LLMUnavailableError("LLM circuit breaker is open")
+            try:
+                result = self._attempt(fn, timeout, hedge)
+            except LLMUnavailableError:
+                # Rate limiter refused — says nothing about provider health
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # Client-side errors (bad prompt, safety block) say nothing about provider health
+                    self.breaker.record_success()
+                if not retryable or attempt == max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+
+# Shared instance used by utils/ai_agent.py
+llm_caller = ResilientCaller()
@@ -0,0 +1,224 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+  - Counter / Histogram      → labelled, thread-safe metric types
+  - timed(name, stage)       → context manager recording a function's latency
+  - count_db_queries(engine) → SQLAlchemy hook counting/timing queries per request
+  - metrics_middleware       → request timing + Server-Timing header
+  - render_prometheus()      → text for GET /metrics
+
+Per-request stage timings (db, llm, stt, tts, ...) live in a ContextVar so
+they follow the request into the threadpool that runs sync route handlers.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds — covers fast DB reads up to slow multi-call LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {v}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[idx] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            return sum(self._counts.get(key, []))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key in sorted(self._counts):
+                counts = self._counts[key]
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    labels = _format_labels(self.labels, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                cumulative += counts[-1]
+                labels = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {self._sums[key]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+# ── Registry ──────────────────────────────────────────────────
+_metrics: List = []
+# Callables returning [(name, help, {labels}, value)] evaluated at scrape time (cache sizes, hit rates...)
+_gauge_collectors: List[Callable[[], List[Tuple[str, str, Dict[str, str], float]]]] = []
+
+
+def counter(name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+    c = Counter(name, help_text, labels)
+    _metrics.append(c)
+    return c
+
+
+def histogram(name: str, help_text: str, labels: Tuple[str, ...] = (),
+              buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    h = Histogram(name, help_text, labels, buckets)
+    _metrics.append(h)
+    return h
+
+
+def register_gauges(collector: Callable[[], List[Tuple[str, str, Dict[str, str], float]]]) -> None:
+    """Register a callable that reports point-in-time values (e.g. cache stats) on each scrape."""
+    _gauge_collectors.append(collector)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for m in _metrics:
+        lines.extend(m.render())
+    seen = set()
+    for collector in _gauge_collectors:
+        for name, help_text, labels, value in collector():
+            if name not in seen:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                seen.add(name)
+            names = tuple(labels)
+            lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ── Application metrics ───────────────────────────────────────
+HTTP_REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+FUNCTION_SECONDS = histogram(
+    "function_duration_seconds", "Latency of instrumented functions (LLM, STT, TTS, parsing)", ("function",))
+LLM_TOKENS = counter("llm_tokens_total", "LLM tokens by AI function and direction", ("function", "direction"))
+LLM_ERRORS = counter("llm_errors_total", "LLM calls that raised", ("function",))
+LLM_FALLBACKS = counter("llm_fallbacks_total", "AI functions that returned their static fallback", ("function",))
+DB_QUERIES_PER_REQUEST = histogram(
+    "db_queries_per_request", "Number of SQL statements executed per HTTP request", ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100))
+
+
+# ── Per-request stage timings ─────────────────────────────────
+# {"stage": [total_seconds, count]} — a mutable dict so threadpool copies of the context share it
+_request_stages: contextvars.ContextVar[Optional[Dict[str, List[float]]]] = contextvars.ContextVar(
+    "request_stages", default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add time spent in `stage` to the current request's Server-Timing breakdown."""
+    stages = _request_stages.get()
+    if stages is None:
+        return
+    entry = stages.setdefault(stage, [0.0, 0])
+    entry[0] += seconds
+    entry[1] += 1
+
+
+@contextmanager
+def timed(function: str, stage: Optional[str] = None):
+    """Time a block: records function_duration_seconds and the request stage (if any)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        FUNCTION_SECONDS.observe(elapsed, function=function)
+        if stage:
+            record_stage(stage, elapsed)
+
+
+def count_db_queries(engine) -> None:
+    """Attach SQLAlchemy listeners that add every statement to the request's `db` stage."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            record_stage("db", time.perf_counter() - starts.pop())
+
+
+def _server_timing(stages: Dict[str, List[float]], total: float) -> str:
+    parts = [f'{name};dur={seconds * 1000:.1f};desc="{count}x"' for name, (seconds, count) in stages.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+async def metrics_middleware(request, call_next):
+    """Time every request, count its DB queries and emit a Server-Timing header."""
+    stages: Dict[str, List[float]] = {}
+    token = _request_stages.set(stages)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        _request_stages.reset(token)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=status)
+        DB_QUERIES_PER_REQUEST.observe(stages.get("db", [0.0, 0])[1], route=route)
+    response.headers["Server-Timing"] = _server_timing(stages, elapsed)
+    return response
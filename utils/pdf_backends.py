@@ -0,0 +1,218 @@
+"""
+PDF text-extraction backends, and page-parallel extraction for long documents.
+
+PyPDF2 (pure Python) and pypdfium2 (PDFium, a C library, ~2x faster) are in
+requirements.txt. PyMuPDF (MuPDF) is about as fast but AGPL-licensed, so it is
+optional: used only when installed (`pip install pymupdf`). Each C backend is
+still skipped if its package is missing, leaving PyPDF2 as the fallback.
+PDF_BACKEND picks one by name; "auto" (default) takes the fastest installed.
+
+Documents of PDF_PARALLEL_MIN_PAGES or more are split into runs of
+PDF_PAGES_PER_TASK pages, extracted by a pool of PDF_PROCESS_WORKERS
+processes (default: one per core, so off on a single core). Pages are still
+yielded in order and only a few runs are in flight at once, so a caller that
+stops early (character budget reached) leaves the rest of the document unparsed.
+
+  - BACKENDS / @backend(name)              → name → opener(source) -> (page_count, page_text(i), close)
+  - available() / resolve(name)            → installed backends, fastest first / the one to use
+  - iter_pages(fileobj, name)              → page texts in order, serial or across processes
+  - extract_pages(source, first, last, name) → texts of pages [first, last) (process task)
+  - shutdown()                             → stop the process pool
+"""
+
+import collections
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from PyPDF2 import PdfReader
+
+from utils.metrics import counter
+
+load_dotenv()
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+PDF_PROCESS_WORKERS = int(os.getenv("PDF_PROCESS_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+Source = Union[str, BinaryIO]  # a path (process tasks) or an open binary file
+Opened = Tuple[int, Callable[[int], str], Callable[[], None]]
+
+PDF_PAGES = counter("pdf_pages_extracted_total", "PDF pages extracted, by backend and mode",
+                    ("backend", "mode"))
+
+# Registration order is preference order for "auto"
+BACKENDS: Dict[str, Callable[[Source], Opened]] = {}
+# MuPDF and PDFium must not be entered from two threads of one process at once
+_locks: Dict[str, threading.Lock] = {}
+
+
+def backend(name: str, thread_safe: bool = True):
+    """Register `fn(source) -> (page_count, page_text(i), close)` under `name`."""
+    def register(fn):
+        BACKENDS[name] = fn
+        if not thread_safe:
+            _locks[name] = threading.Lock()
+        return fn
+    return register
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+# ── Backends ──────────────────────────────────────────────────
+# The C-backed libraries are imported on first use so app startup doesn't pay
+# for them (~0.2 s for PyMuPDF).
+if _installed("pypdfium2"):
+    @backend("pdfium", thread_safe=False)
+    def _open_pdfium(source: Source) -> Opened:
+        import pypdfium2
+        doc = pypdfium2.PdfDocument(source)
+
+        def page_text(i: int) -> str:
+            page = doc[i]
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+
+        return len(doc), page_text, doc.close
+
+
+if _installed("pymupdf"):
+    @backend("pymupdf", thread_safe=False)
+    def _open_pymupdf(source: Source) -> Opened:
+        import pymupdf
+        doc = pymupdf.open(source) if isinstance(source, str) else pymupdf.open(stream=source.read(), filetype="pdf")
+        return doc.page_count, lambda i: doc[i].get_text(), doc.close
+
+
+@backend("pypdf2")
+def _open_pypdf2(source: Source) -> Opened:
+    # Only the cross-reference table is read up front; each page is parsed when asked for
+    reader = PdfReader(source)
+    return len(reader.pages), lambda i: reader.pages[i].extract_text() or "", lambda: None
+
+
+def available() -> List[str]:
+    return list(BACKENDS)
+
+
+def resolve(name: Optional[str] = None) -> str:
+    name = (name or PDF_BACKEND).lower()
+    if name in BACKENDS:
+        return name
+    if name != "auto":
+        print(f"[PDF] Backend {name!r} is not installed — using {available()[0]}")
+    return available()[0]
+
+
+def _guard(name: str):
+    return _locks.get(name) or nullcontext()
+
+
+def extract_pages(source: Source, first: int, last: int, name: str) -> List[str]:
+    """Texts of pages [first, last) — runs in a pool process, or inline for short documents."""
+    with _guard(name):
+        _, page_text, close = BACKENDS[name](source)
+        try:
+            return [page_text(i) for i in range(first, last)]
+        finally:
+            close()
+
+
+# ── Page-parallel extraction ──────────────────────────────────
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process has threads (DB pool, job workers) a fork would copy mid-lock
+            _pool = ProcessPoolExecutor(max_workers=PDF_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _spill(fileobj: BinaryIO) -> str:
+    # Pool processes open the document by path; an upload is usually an unnamed spooled file
+    fileobj.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as out:
+        shutil.copyfileobj(fileobj, out)
+    return out.name
+
+
+def _parallel_pages(fileobj: BinaryIO, name: str, count: int) -> Iterator[str]:
+    global _pool
+    path = _spill(fileobj)
+    runs = iter([(first, min(first + PDF_PAGES_PER_TASK, count)) for first in range(0, count, PDF_PAGES_PER_TASK)])
+    pending = collections.deque()
+    try:
+        pool = _process_pool()
+
+        def submit() -> None:
+            run = next(runs, None)
+            if run is not None:
+                pending.append(pool.submit(extract_pages, path, *run, name))
+
+        # One run per process plus one queued, so workers never wait on the consumer
+        for _ in range(PDF_PROCESS_WORKERS + 1):
+            submit()
+        while pending:
+            texts = pending.popleft().result()
+            submit()
+            PDF_PAGES.inc(len(texts), backend=name, mode="parallel")
+            yield from texts
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None  # a worker died; start a fresh pool next time
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+        os.unlink(path)  # runs still executing keep their open handle
+
+
+def iter_pages(fileobj: BinaryIO, name: Optional[str] = None) -> Iterator[str]:
+    """Yield each page's text in order, fanning long documents out to the process pool."""
+    name = resolve(name)
+    with _guard(name):
+        count, page_text, close = BACKENDS[name](fileobj)
+        parallel = PDF_PROCESS_WORKERS > 1 and count >= PDF_PARALLEL_MIN_PAGES
+        if parallel:
+            close()
+    if parallel:
+        yield from _parallel_pages(fileobj, name, count)
+        return
+    try:
+        for i in range(count):
+            with _guard(name):
+                text = page_text(i)
+            PDF_PAGES.inc(backend=name, mode="serial")
+            yield text
+    finally:
+        with _guard(name):
+            close()
@@ -0,0 +1,83 @@
+"""
+Speculative prefetch after a skill-gap analysis.
+
+Right after GET /analysis/skill-gap the user almost always opens the roadmap
+and then takes a test for their top missing skill. When PREFETCH_AFTER_ANALYSIS
+is enabled, a new SkillAnalysis queues background jobs that generate:
+
+  - prefetch_roadmap → the roadmap (new skills' fragments only) + mini projects
+  - prefetch_test    → a mock test for the top missing skill (kept as the job result)
+
+so the follow-up requests hit warm data. A newer analysis cancels queued
+prefetches, and running ones check `is_superseded` before saving anything.
+The job handlers live next to the routes they warm up (roadmap_routes, test_routes).
+"""
+
+import json
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from models import Job, SkillAnalysis
+from utils.job_queue import enqueue, cancel_queued, DONE
+
+load_dotenv()
+
+PREFETCH_AFTER_ANALYSIS = os.getenv("PREFETCH_AFTER_ANALYSIS", "false").lower() in ("1", "true", "yes")
+PREFETCH_KINDS = ["prefetch_roadmap", "prefetch_test"]
+# Status a prefetched test moves to once /test/generate has handed it out
+CONSUMED = "consumed"
+
+
+def schedule_prefetch(db: Session, user_id: int, analysis_id: int, missing_skills: List[str]) -> None:
+    """Cancel stale prefetches for this user and queue new ones for `analysis_id`."""
+    if not PREFETCH_AFTER_ANALYSIS:
+        return
+    cancel_queued(db, user_id, PREFETCH_KINDS)
+    payload = {"analysis_id": analysis_id}
+    enqueue(db, user_id, "prefetch_roadmap", payload)
+    if missing_skills:
+        enqueue(db, user_id, "prefetch_test", {**payload, "skill_name": missing_skills[0]})
+
+
+def is_superseded(db: Session, user_id: int, analysis_id: int) -> bool:
+    """True if the user has run a newer analysis than `analysis_id`."""
+    latest = (
+        db.query(SkillAnalysis.id)
+        .filter(SkillAnalysis.user_id == user_id)
+        .order_by(SkillAnalysis.id.desc())
+        .first()
+    )
+    return latest is None or latest.id != analysis_id
+
+
+def take_prefetched_test(db: Session, user_id: int, skill_name: str, num_questions: int) -> Optional[List[dict]]:
+    """
+    Hand out a finished prefetched test for `skill_name` (at most once), or None.
+    The conditional update makes sure two requests can't both take the same test.
+    """
+    if not PREFETCH_AFTER_ANALYSIS:
+        return None
+    wanted = skill_name.strip().casefold()
+    candidates = (
+        db.query(Job)
+        .filter(Job.user_id == user_id, Job.kind == "prefetch_test", Job.status == DONE)
+        .order_by(Job.created_at.desc())
+        .all()
+    )
+    for job in candidates:
+        payload = json.loads(job.payload or "{}")
+        questions = json.loads(job.result or "{}").get("questions") or []
+        if payload.get("skill_name", "").strip().casefold() != wanted or len(questions) < num_questions:
+            continue
+        taken = (
+            db.query(Job)
+            .filter(Job.id == job.id, Job.status == DONE)
+            .update({"status": CONSUMED}, synchronize_session=False)
+        )
+        db.commit()
+        if taken == 1:
+            return questions[:num_questions]
+    return None
@@ -0,0 +1,154 @@
+"""
+Mini-project progress stored as bitsets.
+
+Each ProjectProgress row keeps its completed steps in one integer
+(steps_mask: bit i set = step i done) and the steps that have ever earned
+XP in xp_mask, so unticking and re-ticking a step never pays out twice.
+Updates are deltas — mark / unmark — applied with bitwise UPDATEs. A step
+pays XP once: directly, its bit is claimed with a conditional UPDATE (safe
+across workers); when buffered, under xp_buffer.step_claim (one process).
+
+  - steps_to_mask(steps) / mask_to_steps(mask)
+  - update_steps(db, user_id, project_id, mark, unmark) → (completed steps, newly completed count)
+  - all_progress(db, user_id)    → {project_id: [steps]} from one indexed query
+  - steps_ever_completed(db, id) → steps that have earned XP across all projects (badges)
+
+Rows written before the bitset columns existed are read from the legacy
+completed_steps JSON and converted the first time they are updated.
+Unflushed deltas from the write-behind buffer are applied on read.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import ProjectProgress
+from utils import xp_buffer
+from utils.http_cache import touch
+
+MAX_STEPS = 63  # bits in a signed BIGINT
+
+
+def steps_to_mask(steps: Iterable[int]) -> int:
+    mask = 0
+    for step in steps:
+        if not 0 <= step < MAX_STEPS:
+            raise HTTPException(status_code=400, detail=f"Step must be between 0 and {MAX_STEPS - 1}")
+        mask |= 1 << step
+    return mask
+
+
+def mask_to_steps(mask: int) -> List[int]:
+    return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+def row_masks(row: Optional[ProjectProgress]) -> Tuple[int, int]:
+    """(steps_mask, xp_mask) of a row, converting legacy JSON rows (whose steps already earned XP)."""
+    if row is None:
+        return 0, 0
+    if row.steps_mask is None:
+        mask = steps_to_mask(json.loads(row.completed_steps or "[]"))
+        return mask, mask | (row.xp_mask or 0)
+    return row.steps_mask, row.xp_mask or 0
+
+
+def _apply_pending(masks: Tuple[int, int], delta: Optional[Tuple[int, int, int]]) -> Tuple[int, int]:
+    if delta is None:
+        return masks
+    mark, unmark, xp = delta
+    mask, xp_mask = masks
+    return (mask | mark) & ~unmark, xp_mask | xp
+
+
+def _apply_direct(db: Session, user_id: int, project_id: str, row: Optional[ProjectProgress],
+                  mark_mask: int, unmark_mask: int, candidates: int) -> int:
+    """
+    Apply a step delta with bitwise UPDATEs and return the XP bits this call claimed.
+    Each bit is claimed with `WHERE xp_mask & bit = 0`, so when two requests (or two
+    worker processes) complete the same step at once only one of them pays for it.
+    """
+    if row is None:
+        try:
+            db.add(ProjectProgress(user_id=user_id, project_id=project_id, steps_mask=0, xp_mask=0))
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # created by a concurrent request
+        row = (
+            db.query(ProjectProgress)
+            .filter(ProjectProgress.user_id == user_id, ProjectProgress.project_id == project_id)
+            .one()
+        )
+    elif row.steps_mask is None:
+        steps_mask, xp_mask = row_masks(row)
+        db.query(ProjectProgress).filter(ProjectProgress.id == row.id, ProjectProgress.steps_mask.is_(None)).update({
+            ProjectProgress.steps_mask: steps_mask,
+            ProjectProgress.xp_mask: xp_mask,
+            ProjectProgress.completed_steps: None,
+        }, synchronize_session=False)
+
+    # Bitwise delta in SQL: concurrent clicks on other steps are not overwritten
+    db.query(ProjectProgress).filter(ProjectProgress.id == row.id).update({
+        ProjectProgress.steps_mask: ProjectProgress.steps_mask.op("|")(mark_mask).op("&")(~unmark_mask),
+    }, synchronize_session=False)
+    claimed = 0
+    for step in mask_to_steps(candidates):
+        bit = 1 << step
+        if db.query(ProjectProgress).filter(
+            ProjectProgress.id == row.id, ProjectProgress.xp_mask.op("&")(bit) == 0,
+        ).update({ProjectProgress.xp_mask: ProjectProgress.xp_mask.op("|")(bit)}, synchronize_session=False):
+            claimed |= bit
+    return claimed
+
+
+def update_steps(db: Session, user_id: int, project_id: str,
+                 mark: Iterable[int] = (), unmark: Iterable[int] = ()) -> Tuple[List[int], int]:
+    """
+    Mark / unmark steps of one project (unmark wins if a step is in both).
+    Returns (completed steps, number of steps completed for the first time).
+    """
+    mark_mask, unmark_mask = steps_to_mask(mark), steps_to_mask(unmark)
+    with xp_buffer.step_claim(user_id, project_id):
+        # Pending deltas before the row: a flush committing in between is then seen
+        # in one or both, never in neither (applying a delta twice changes nothing)
+        pending = xp_buffer.pending_steps(user_id).get(project_id)
+        row = (
+            db.query(ProjectProgress)
+            .filter(ProjectProgress.user_id == user_id, ProjectProgress.project_id == project_id)
+            .first()
+        )
+        mask, xp_mask = _apply_pending(row_masks(row), pending)
+        new_mask = (mask | mark_mask) & ~unmark_mask
+        newly = new_mask & ~xp_mask
+
+        if xp_buffer.active():
+            xp_buffer.add_step_delta(user_id, project_id, mark_mask, unmark_mask, newly)
+        else:
+            newly = _apply_direct(db, user_id, project_id, row, mark_mask, unmark_mask, newly)
+            touch(db, user_id, "dashboard")  # buffered deltas are bumped by the flush
+        db.commit()
+    return mask_to_steps(new_mask), bin(newly).count("1")
+
+
+def _all_masks(db: Session, user_id: int) -> Dict[str, Tuple[int, int]]:
+    pending = xp_buffer.pending_steps(user_id)
+    rows = (
+        db.query(ProjectProgress.project_id, ProjectProgress.steps_mask,
+                 ProjectProgress.xp_mask, ProjectProgress.completed_steps)
+        .filter(ProjectProgress.user_id == user_id)
+        .all()
+    )
+    masks = {r.project_id: row_masks(r) for r in rows}
+    for project_id, delta in pending.items():
+        masks[project_id] = _apply_pending(masks.get(project_id, (0, 0)), delta)
+    return masks
+
+
+def all_progress(db: Session, user_id: int) -> Dict[str, List[int]]:
+    return {project_id: mask_to_steps(mask) for project_id, (mask, _) in _all_masks(db, user_id).items()}
+
+
+def steps_ever_completed(db: Session, user_id: int) -> int:
+    return sum(bin(mask | xp_mask).count("1") for mask, xp_mask in _all_masks(db, user_id).values())
@@ -0,0 +1,179 @@
+"""
+Prompt compaction & token budgeting.
+
+Raw resume / JD text comes straight out of PDF extraction: page headers and
+footers repeated on every page, runs of whitespace, and boilerplate legal
+paragraphs (EEO statements, privacy notices). None of it helps the model, all
+of it costs tokens and latency.
+
+  - compact_text         → normalise whitespace, drop boilerplate sentences & repeated lines
+  - estimate_tokens      → cheap, offline token count
+  - truncate_to_tokens   → cut text at a line boundary to fit a budget
+  - compact_for_prompt   → compact several documents to share one token budget
+  - trim_chat_history    → keep the coach's system turns + the most recent turns
+  - history_to_dicts     → chat history as plain dicts, for storage
+"""
+
+import math
+import os
+import re
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Total tokens we allow for documents embedded in a single prompt
+PROMPT_DOCUMENT_TOKEN_BUDGET = int(os.getenv("PROMPT_DOCUMENT_TOKEN_BUDGET", "6000"))
+# Tokens of chat history resent to the interview coach on every message
+COACH_HISTORY_TOKEN_BUDGET = int(os.getenv("COACH_HISTORY_TOKEN_BUDGET", "3000"))
+
+# Gemini / SentencePiece averages roughly 4 characters per token for English
+_CHARS_PER_TOKEN = 4
+
+_BOILERPLATE_PATTERNS = [
+    r"equal (employment )?opportunity",
+    r"without regard to (race|color|religion|sex|gender|age|national origin)",
+    r"reasonable accommodations?",
+    r"protected veteran",
+    r"e-verify",
+    r"affirmative action",
+    r"(our|this|the company's) privacy (notice|policy)",
+    r"we do not accept unsolicited resumes",
+    r"all qualified applicants will receive consideration",
+]
+_BOILERPLATE_RE = re.compile("|".join(_BOILERPLATE_PATTERNS), re.IGNORECASE)
+# Boilerplate is removed a sentence at a time: PDF text often has no blank lines,
+# so a "paragraph" can be the whole document
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Page furniture left behind by PDF extraction: "Page 2 of 3", "- 2 -", "2/3", lone numbers
+_PAGE_MARKER_RE = re.compile(
+    r"^\s*(page\s*\d+(\s*(of|/)\s*\d+)?|-?\s*\d{1,3}\s*-?|\d{1,3}\s*/\s*\d{1,3})\s*$", re.IGNORECASE
+)
+_INLINE_SPACE_RE = re.compile(r"[ \t\f\v\u00a0\u200b]+")
+
+# Lines shorter than this are allowed to repeat (bullets like "Python", "•")
+_MIN_DEDUP_LINE_LENGTH = 12
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the model token count of `text` without a network call."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def _split_paragraphs(text: str) -> List[str]:
+    return re.split(r"\n\s*\n", text)
+
+
+def _drop_boilerplate(line: str) -> str:
+    if not _BOILERPLATE_RE.search(line):
+        return line
+    return " ".join(s for s in _SENTENCE_END_RE.split(line) if not _BOILERPLATE_RE.search(s))
+
+
+def compact_text(text: str) -> str:
+    """
+    Normalise whitespace, drop boilerplate sentences and page markers,
+    and remove exact duplicate lines (repeated headers/footers).
+    Never empties non-blank text: if everything would go, only whitespace is normalised.
+    """
+    if not text:
+        return ""
+
+    kept_paragraphs = []
+    seen_lines = set()
+    for paragraph in _split_paragraphs(text):
+        lines = []
+        for raw in paragraph.splitlines():
+            line = _drop_boilerplate(_INLINE_SPACE_RE.sub(" ", raw).strip())
+            if not line or _PAGE_MARKER_RE.match(line):
+                continue
+            if len(line) >= _MIN_DEDUP_LINE_LENGTH:
+                key = line.casefold()
+                if key in seen_lines:
+                    continue
+                seen_lines.add(key)
+            lines.append(line)
+        if lines:
+            kept_paragraphs.append("\n".join(lines))
+    if not kept_paragraphs:
+        return "\n".join(filter(None, (_INLINE_SPACE_RE.sub(" ", raw).strip() for raw in text.splitlines())))
+    return "\n\n".join(kept_paragraphs)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens`, preferring to stop at a line break."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(0, max_tokens * _CHARS_PER_TOKEN)
+    cut = text[:max_chars]
+    newline = cut.rfind("\n")
+    if newline > max_chars // 2:
+        cut = cut[:newline]
+    return cut.rstrip()
+
+
+def compact_for_prompt(documents: Dict[str, str], budget: int = PROMPT_DOCUMENT_TOKEN_BUDGET) -> Dict[str, str]:
+    """
+    Compact each document, then share `budget` tokens between them.
+    Short documents keep everything; their unused share goes to the longer ones.
+    """
+    compacted = {name: compact_text(text) for name, text in documents.items()}
+    sizes = {name: estimate_tokens(text) for name, text in compacted.items()}
+    if sum(sizes.values()) <= budget:
+        return compacted
+
+    remaining = budget
+    allowance: Dict[str, int] = {}
+    pending = sorted(sizes, key=sizes.get)
+    while pending:
+        share = remaining // len(pending)
+        name = pending.pop(0)
+        allowance[name] = min(sizes[name], share)
+        remaining -= allowance[name]
+    return {name: truncate_to_tokens(text, allowance[name]) for name, text in compacted.items()}
+
+
+def _content_text(content) -> str:
+    """Text of one chat history entry (dict or Gemini Content proto)."""
+    parts = content.get("parts", []) if isinstance(content, dict) else getattr(content, "parts", [])
+    texts = []
+    for part in parts:
+        if isinstance(part, str):
+            texts.append(part)
+        else:
+            texts.append(getattr(part, "text", "") or "")
+    return " ".join(texts)
+
+
+def history_to_dicts(history: list) -> list:
+    """Plain {"role", "parts"} dicts for chat history entries (dicts or Gemini Content protos), e.g. to store them."""
+    return [
+        {"role": c.get("role") if isinstance(c, dict) else getattr(c, "role", ""), "parts": [_content_text(c)]}
+        for c in history
+    ]
+
+
+def trim_chat_history(history: list, keep_head: int = 2, budget: int = COACH_HISTORY_TOKEN_BUDGET) -> list:
+    """
+    Keep the first `keep_head` entries (system prompt + greeting) and as many of
+    the most recent entries as fit in `budget` tokens. User/model pairs are
+    dropped together so the history always alternates correctly.
+    """
+    head, tail = list(history[:keep_head]), list(history[keep_head:])
+    used = sum(estimate_tokens(_content_text(c)) for c in head)
+    kept: list = []
+    # Walk backwards in (user, model) pairs
+    i = len(tail)
+    while i >= 2:
+        pair = tail[i - 2:i]
+        cost = sum(estimate_tokens(_content_text(c)) for c in pair)
+        if used + cost > budget:
+            break
+        kept = pair + kept
+        used += cost
+        i -= 2
+    return head + kept
@@ -0,0 +1,36 @@
+"""
+Response classes backed by orjson.
+
+  - FastJSONResponse → app-wide default; orjson is several times faster than
+                       the stdlib encoder for the large roadmap/history payloads
+  - RawJSONResponse  → sends bytes that are already JSON (e.g. a stored roadmap)
+                       without decoding and re-encoding them
+  - dumps(obj)       → compact JSON text in the same format, for storing in Text columns
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+# Non-string keys (e.g. int ids) are valid in the stdlib encoder, keep them working
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(obj: Any) -> str:
+    return orjson.dumps(obj, option=_OPTIONS).decode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_OPTIONS)
+
+
+class RawJSONResponse(Response):
+    """`content` is already-serialised JSON (str or bytes) and is sent as-is."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content.encode("utf-8") if isinstance(content, str) else content
@@ -1,13 +1,180 @@
+"""
+Text extraction for uploaded resumes and job descriptions.
+
+Uploads larger than UPLOAD_MAX_BYTES are refused with 413: up front from the
+request's Content-Length (upload_limit_middleware, before the body is read),
+and otherwise from the received size. Text is extracted straight from the
+upload's own spooled file (Starlette keeps 1 MB in memory, the rest on disk),
+so a large file is never held in memory whole or copied. The format is sniffed
+from the first bytes and the filename. Its extractor is a generator yielding text piece
+by piece (PDF pages via utils/pdf_backends.py, DOCX paragraphs, text lines),
+and reading stops as soon as the character budget is filled: pages past the
+budget are never parsed.
+Extraction runs in a bounded thread pool (EXTRACT_WORKERS), off the event loop.
+
+  - EXTRACTORS / @extractor(kind)             → kind → generator of text pieces
+  - detect_kind(head, filename, content_type) → "pdf" | "docx" | "text" | None
+  - upload_limit_middleware                   → 413 for oversized uploads before the body is read
+  - check_upload_size(upload)                 → 413 past UPLOAD_MAX_BYTES (bodies without Content-Length)
+  - extract_text(fileobj, kind, max_chars)    → joined text, stopping at the budget
+  - extract_upload(upload, max_chars)         → all of the above, async
+  - extract_text_from_pdf(file_bytes)         → whole-PDF helper
+"""
+
+import asyncio
+import contextvars
 import io
-from PyPDF2 import PdfReader
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+from xml.etree import ElementTree
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+
+from utils import pdf_backends
+from utils.metrics import timed
+from utils.responses import FastJSONResponse
+
+load_dotenv()
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Multipart boundaries and part headers on top of the file itself
+UPLOAD_FORM_OVERHEAD_BYTES = 16 * 1024
+UPLOAD_PATHS = ("/resume/upload", "/analysis/jd/upload")
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "4"))
+# Character budgets; the prompt compactor trims further, so these only bound storage and parsing
+RESUME_MAX_CHARS = int(os.getenv("RESUME_MAX_CHARS", "60000"))
+JD_MAX_CHARS = int(os.getenv("JD_MAX_CHARS", "30000"))
+
+TEXT_SUFFIXES = (".txt", ".md", ".text")
+
+EXTRACTORS: Dict[str, Callable[[BinaryIO], Iterator[str]]] = {}
+
+
+def extractor(kind: str):
+    """Register a generator `fn(fileobj) -> text pieces` for one file kind."""
+    def register(fn):
+        EXTRACTORS[kind] = fn
+        return fn
+    return register
+
+
+# ── Extractors ────────────────────────────────────────────────
+@extractor("pdf")
+def pdf_pages(fileobj: BinaryIO) -> Iterator[str]:
+    # Backend choice and page-parallel extraction: utils/pdf_backends.py
+    yield from pdf_backends.iter_pages(fileobj)
+
+
+@extractor("docx")
+def docx_paragraphs(fileobj: BinaryIO) -> Iterator[str]:
+    # A .docx is a zip; word/document.xml is streamed, never decompressed whole
+    with zipfile.ZipFile(fileobj) as archive, archive.open("word/document.xml") as xml:
+        parts = []
+        for _, elem in ElementTree.iterparse(xml, events=("end",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "t":
+                parts.append(elem.text or "")
+            elif tag == "tab":
+                parts.append("\t")
+            elif tag in ("br", "cr"):
+                parts.append("\n")
+            elif tag == "p":
+                if parts:
+                    yield "".join(parts)
+                    parts = []
+                elem.clear()
+
+
+@extractor("text")
+def text_lines(fileobj: BinaryIO) -> Iterator[str]:
+    reader = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace")
+    try:
+        for line in reader:
+            yield line.rstrip("\r\n")
+    finally:
+        reader.detach()  # leave the underlying file open for its owner
+
+
+def detect_kind(head: bytes, filename: Optional[str] = None, content_type: Optional[str] = None) -> Optional[str]:
+    """File kind from its first bytes, falling back to the name / content type for plain text."""
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"
+    name = (filename or "").lower()
+    if (name.endswith(TEXT_SUFFIXES) or (content_type or "").startswith("text/")) and b"\x00" not in head:
+        return "text"
+    return None
+
+
+def extract_text(fileobj: BinaryIO, kind: str, max_chars: int = RESUME_MAX_CHARS) -> str:
+    """Join the extractor's pieces with newlines, stopping once `max_chars` are collected."""
+    with timed(f"extract_text_{kind}", stage="extract"):
+        pieces, used = [], 0
+        stream = EXTRACTORS[kind](fileobj)
+        try:
+            for piece in stream:
+                if not piece:
+                    continue
+                piece = piece[:max_chars - used]
+                pieces.append(piece)
+                used += len(piece) + 1
+                if used >= max_chars:
+                    break
+        finally:
+            stream.close()
+        return "\n".join(pieces).strip()
 
 
 def extract_text_from_pdf(file_bytes: bytes) -> str:
     """Extract text content from a PDF file's bytes."""
-    reader = PdfReader(io.BytesIO(file_bytes))
-    text_parts = []
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text_parts.append(page_text)
-    return "\n".join(text_parts).strip()
+    return extract_text(io.BytesIO(file_bytes), "pdf", max_chars=RESUME_MAX_CHARS)
+
+
+# ── Uploads ───────────────────────────────────────────────────
+_pool = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS, thread_name_prefix="extract")
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"File too large (max {max_bytes / (1024 * 1024):.1f} MB)"
+
+
+async def upload_limit_middleware(request, call_next):
+    """Refuse an upload whose Content-Length is already over the limit, before receiving it."""
+    if request.method == "POST" and request.url.path.rstrip("/") in UPLOAD_PATHS:
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES:
+            return FastJSONResponse(status_code=413, content={"detail": _too_large(UPLOAD_MAX_BYTES)})
+    return await call_next(request)
+
+
+def check_upload_size(upload: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> None:
+    """413 past `max_bytes`; catches chunked bodies, which carry no Content-Length."""
+    size = upload.size
+    if size is None:
+        size = upload.file.seek(0, os.SEEK_END)
+        upload.file.seek(0)
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail=_too_large(max_bytes))
+
+
+async def extract_upload(upload: UploadFile, max_chars: int = RESUME_MAX_CHARS) -> str:
+    """Sniff and extract an uploaded PDF / DOCX / text file in place; 400, 413 or 422 on failure."""
+    check_upload_size(upload)
+    kind = detect_kind(await upload.read(8), upload.filename, upload.content_type)
+    await upload.seek(0)
+    if kind is None:
+        raise HTTPException(status_code=400, detail="Unsupported file type — upload a PDF, DOCX or plain-text file")
+    context = contextvars.copy_context()  # keeps the request's Server-Timing stages
+    try:
+        text = await asyncio.get_running_loop().run_in_executor(
+            _pool, context.run, extract_text, upload.file, kind, max_chars)
+    except Exception as e:
+        print(f"[Extract] {kind} extraction failed: {e}")
+        raise HTTPException(status_code=422, detail=f"Could not read the {kind.upper()} file")
+    if not text:
+        raise HTTPException(status_code=422, detail="Could not extract text from the file")
+    return text
@@ -3,15 +3,64 @@ Roadmap generator — now powered by Gemini AI.
 Delegates roadmap creation to the central AI agent for personalised, detailed learning plans.
 """
 
-from typing import Dict, List
-from utils.ai_agent import ai_generate_roadmap, ai_generate_projects
+import os
+import re
+from typing import Dict, Iterator, List, Tuple
+from utils.ai_agent import (
+    ai_generate_skill_weeks,
+    ai_stream_skill_weeks,
+    ai_generate_projects,
+)
 
+# Length of the study block generated for each missing skill
+ROADMAP_WEEKS_PER_SKILL = int(os.getenv("ROADMAP_WEEKS_PER_SKILL", "1"))
 
-def generate_roadmap(missing_skills: List[str], total_weeks: int = 4) -> List[Dict]:
+_WEEK_PREFIX_RE = re.compile(r"^\s*week\s*\d+\s*[:\-–]\s*", re.IGNORECASE)
+
+
+def all_set_roadmap() -> List[Dict]:
+    """Roadmap shown when the resume already covers every JD skill."""
+    return [{
+        "week": 1,
+        "title": "You're all set!",
+        "skills": [],
+        "notes": "Your resume already covers the JD requirements. Keep practising!",
+        "resources": [],
+    }]
+
+
+def skill_key(skill: str) -> str:
+    """Normalised form of a skill name used to match stored fragments."""
+    return skill.strip().casefold()
+
+
+def skills_set_key(skills: List[str]) -> str:
+    """Order/case-insensitive identity of a missing-skill set."""
+    return "|".join(sorted({skill_key(s) for s in skills}))
+
+
+def generate_skill_fragments(skills: List[str]) -> Tuple[Dict[str, List[Dict]], List[str]]:
+    """Generate the per-skill week blocks for `skills` only; also returns the skills that fell back."""
+    return ai_generate_skill_weeks(skills, ROADMAP_WEEKS_PER_SKILL)
+
+
+def stream_skill_fragments(skills: List[str]) -> Iterator[Tuple[str, Dict, bool]]:
+    """Same as generate_skill_fragments, yielding (skill, week, is_fallback) as each week is produced."""
+    return ai_stream_skill_weeks(skills, ROADMAP_WEEKS_PER_SKILL)
+
+
+def assemble_roadmap(fragments: List[Tuple[str, List[Dict]]], start: int = 1) -> List[Dict]:
     """
-    Generate a structured weekly roadmap using AI, tailored to the missing skills.
+    Join per-skill fragments (in the given order) into one roadmap,
+    numbering weeks consecutively from `start`.
     """
-    return ai_generate_roadmap(missing_skills, total_weeks)
+    roadmap = []
+    for _, weeks in fragments:
+        for week in weeks:
+            number = start + len(roadmap)
+            title = _WEEK_PREFIX_RE.sub("", week.get("title", ""))
+            roadmap.append({**week, "week": number, "title": f"Week {number}: {title}"})
+    return roadmap
 
 
 def generate_mini_projects(missing_skills: List[str], count: int = 2) -> List[Dict]:
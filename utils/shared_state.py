@@ -0,0 +1,324 @@
+"""
+Key-value state shared by every worker process, so any request can land on
+any worker: active mock tests (test_id → questions with answers) and
+interview-coach chat histories.
+
+Backends (same interface — get / set / pop / delete on str values, optional TTL,
+plus an atomic integer incr, set-if-absent add and compare-and-delete delete_if):
+  - DatabaseStore → `shared_state` table in the app database; default, works
+                    across processes and hosts with no extra infrastructure
+  - RedisStore    → SHARED_STATE_BACKEND=redis (SHARED_STATE_REDIS_URL)
+  - MemoryStore   → SHARED_STATE_BACKEND=memory; one process only (dev, tests)
+
+  - namespace(name) → Namespace with JSON helpers and per-key leases (lock), keys prefixed "name:"
+  - set_store(store) → swap the backend (benchmarks)
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import BigInteger, String, cast
+from sqlalchemy.exc import IntegrityError
+
+from db import SessionLocal
+from models import SharedState
+from utils.single_flight import KeyedLock
+
+try:
+    import redis
+except ImportError:  # optional — only needed for SHARED_STATE_BACKEND=redis
+    redis = None
+
+load_dotenv()
+
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "database").lower()
+SHARED_STATE_REDIS_URL = os.getenv("SHARED_STATE_REDIS_URL", "")
+SHARED_STATE_REDIS_PREFIX = os.getenv("SHARED_STATE_REDIS_PREFIX", "state:")
+# Expired database rows are purged on every Nth write
+PURGE_EVERY_WRITES = 200
+
+
+# ── Backends ──────────────────────────────────────────────────
+class MemoryStore:
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def pop(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._live(key)
+            self._data.pop(key, None)
+            return value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, initial: int = 1) -> int:
+        with self._lock:
+            current = self._live(key)
+            value = int(current) + 1 if current is not None else initial
+            self._data[key] = (str(value), None)
+            return value
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def delete_if(self, key: str, value: str) -> None:
+        with self._lock:
+            if self._live(key) == value:
+                del self._data[key]
+
+
+class DatabaseStore:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            row = db.query(SharedState).filter(SharedState.key == key).first()
+            if row is None or (row.expires_at is not None and row.expires_at < datetime.utcnow()):
+                return None
+            return row.value
+        finally:
+            db.close()
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl) if ttl else None
+        db = self.session_factory()
+        try:
+            try:
+                db.merge(SharedState(key=key, value=value, expires_at=expires_at))
+                db.commit()
+            except IntegrityError:
+                # Another worker inserted the same key between our SELECT and INSERT
+                db.rollback()
+                db.merge(SharedState(key=key, value=value, expires_at=expires_at))
+                db.commit()
+            self._writes += 1
+            if self._writes % PURGE_EVERY_WRITES == 0:
+                db.query(SharedState).filter(SharedState.expires_at < datetime.utcnow()).delete(
+                    synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+    def pop(self, key: str) -> Optional[str]:
+        """Read and delete; the conditional DELETE makes sure only one worker gets the value."""
+        db = self.session_factory()
+        try:
+            row = db.query(SharedState).filter(SharedState.key == key).first()
+            if row is None:
+                return None
+            value, expires_at = row.value, row.expires_at
+            taken = db.query(SharedState).filter(SharedState.key == key).delete(synchronize_session=False)
+            db.commit()
+            if taken != 1 or (expires_at is not None and expires_at < datetime.utcnow()):
+                return None
+            return value
+        finally:
+            db.close()
+
+    def delete(self, key: str) -> None:
+        db = self.session_factory()
+        try:
+            db.query(SharedState).filter(SharedState.key == key).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def incr(self, key: str, initial: int = 1) -> int:
+        """Add one in SQL (no read-modify-write race between workers); a missing key starts at `initial`."""
+        db = self.session_factory()
+        try:
+            while True:
+                updated = db.query(SharedState).filter(SharedState.key == key).update(
+                    {SharedState.value: cast(cast(SharedState.value, BigInteger) + 1, String)},
+                    synchronize_session=False)
+                if not updated:
+                    db.add(SharedState(key=key, value=str(initial)))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another worker created the key first; increment theirs
+                    db.rollback()
+                    continue
+                return int(db.query(SharedState.value).filter(SharedState.key == key).scalar())
+        finally:
+            db.close()
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Insert unless the key holds a live value; the primary key decides between racing workers."""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            db.query(SharedState).filter(SharedState.key == key, SharedState.expires_at < now).delete(
+                synchronize_session=False)
+            db.add(SharedState(key=key, value=value, expires_at=now + timedelta(seconds=ttl) if ttl else None))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return False
+            return True
+        finally:
+            db.close()
+
+    def delete_if(self, key: str, value: str) -> None:
+        db = self.session_factory()
+        try:
+            db.query(SharedState).filter(SharedState.key == key, SharedState.value == value).delete(
+                synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+# GET and DEL in one step, so a lease that expired and was taken by another worker is left alone
+_DELETE_IF_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+
+
+class RedisStore:
+    def __init__(self, client, prefix: str = SHARED_STATE_REDIS_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    @staticmethod
+    def _decode(value) -> Optional[str]:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def get(self, key: str) -> Optional[str]:
+        return self._decode(self.client.get(self.prefix + key))
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, value, ex=int(ttl) if ttl else None)
+
+    def pop(self, key: str) -> Optional[str]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.get(self.prefix + key)
+        pipe.delete(self.prefix + key)
+        value, deleted = pipe.execute()
+        return self._decode(value) if deleted else None
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str, initial: int = 1) -> int:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(self.prefix + key, initial - 1, nx=True)
+        pipe.incr(self.prefix + key)
+        return int(pipe.execute()[1])
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, value, nx=True, ex=max(1, int(ttl)) if ttl else None))
+
+    def delete_if(self, key: str, value: str) -> None:
+        self.client.eval(_DELETE_IF_SCRIPT, 1, self.prefix + key, value)
+
+
+def _default_store():
+    if SHARED_STATE_BACKEND == "redis":
+        if redis is None:
+            raise RuntimeError("SHARED_STATE_BACKEND=redis but the redis package is not installed")
+        return RedisStore(redis.Redis.from_url(SHARED_STATE_REDIS_URL))
+    if SHARED_STATE_BACKEND == "memory":
+        return MemoryStore()
+    return DatabaseStore()
+
+
+_store = _default_store()
+
+
+def set_store(store) -> None:
+    """Swap the backend (e.g. MemoryStore or RedisStore over a fake client)."""
+    global _store
+    _store = store
+
+
+def is_process_local() -> bool:
+    """True when state lives in this process only, i.e. unsafe with several workers."""
+    return isinstance(_store, MemoryStore)
+
+
+# ── Namespaced JSON access ────────────────────────────────────
+class Namespace:
+    def __init__(self, name: str, ttl: Optional[float] = None):
+        self.name = name
+        self.ttl = ttl
+        self._local = KeyedLock()
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def get_json(self, key: str) -> Any:
+        value = _store.get(self._key(key))
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value: Any) -> None:
+        _store.set(self._key(key), json.dumps(value), self.ttl)
+
+    def pop_json(self, key: str) -> Any:
+        value = _store.pop(self._key(key))
+        return json.loads(value) if value is not None else None
+
+    def delete(self, key: str) -> None:
+        _store.delete(self._key(key))
+
+    def incr(self, key: str, initial: int = 1) -> int:
+        """Atomically add one to an integer value (no TTL); a missing key starts at `initial`."""
+        return _store.incr(self._key(key), initial)
+
+    @contextmanager
+    def lock(self, key: str, ttl: float, poll: float = 0.2):
+        """
+        Hold `key` across every worker: a lease stored with a TTL, so a worker that
+        dies holding it blocks the others for at most `ttl` seconds. Threads of one
+        process queue on a local lock first and only the head of the queue polls.
+        Not re-entrant.
+        """
+        token = uuid.uuid4().hex
+        with self._local.hold(key):
+            while not _store.add(self._key(key), token, ttl):
+                time.sleep(poll)
+            try:
+                yield
+            finally:
+                _store.delete_if(self._key(key), token)
+
+
+def namespace(name: str, ttl: Optional[float] = None) -> Namespace:
+    return Namespace(name, ttl)
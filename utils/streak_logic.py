@@ -2,9 +2,12 @@ import json
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from models import User
+from utils import leaderboard, xp_buffer
+from utils.http_cache import touch
 
 XP_PER_TEST = 10
 XP_PER_ANALYSIS = 5
+XP_PER_PROJECT_STEP = 20
 
 
 def update_streak(user: User, db: Session) -> None:
@@ -22,17 +25,15 @@ def update_streak(user: User, db: Session) -> None:
         user.streak = 1
     # If same day, do nothing
 
+    touch(db, user.id, "dashboard")
     db.commit()
     db.refresh(user)
 
 
-def add_xp(user: User, points: int, db: Session) -> None:
-    """Add XP to the user's profile and handle leveling."""
-    today = datetime.utcnow().date().isoformat()
-    
-    # Update Daily XP
+def apply_xp(user: User, points: int, day: str) -> None:
+    """Add XP earned on `day` ("YYYY-MM-DD") to the user's ledger and handle leveling (no commit)."""
     daily_xp_data = json.loads(user.daily_xp) if user.daily_xp else {}
-    daily_xp_data[today] = daily_xp_data.get(today, 0) + points
+    daily_xp_data[day] = daily_xp_data.get(day, 0) + points
     user.daily_xp = json.dumps(daily_xp_data)
 
     # Add XP and Level Up
@@ -41,16 +42,20 @@ def add_xp(user: User, points: int, db: Session) -> None:
         user.xp -= user.xp_to_next
         user.level += 1
         user.xp_to_next += 500  # Progression difficulty increase
-        
-    db.commit()
-    db.refresh(user)
 
 
-def give_badge(user: User, badge_id: int, db: Session) -> None:
-    """Award a badge to the user if they don't have it."""
-    badges = json.loads(user.earned_badges) if user.earned_badges else []
-    if badge_id not in badges:
-        badges.append(badge_id)
-        user.earned_badges = json.dumps(badges)
-        db.commit()
-        db.refresh(user)
+def add_xp(user: User, points: int, db: Session) -> None:
+    """
+    Add XP to the user's profile and handle leveling.
+    While the write-behind buffer is running the award is queued and written
+    in the next batched flush instead (see utils.xp_buffer).
+    """
+    if xp_buffer.active():
+        xp_buffer.add_xp(user.id, points)  # the flush bumps the dashboard ETag
+        return
+
+    apply_xp(user, points, datetime.utcnow().date().isoformat())
+    touch(db, user.id, "dashboard")
+    db.commit()
+    db.refresh(user)
+    leaderboard.record_xp(user.id, points)
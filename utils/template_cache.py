@@ -0,0 +1,133 @@
+"""
+Shared, cross-user cache of AI-generated templates (roadmap weeks, mini projects).
+
+Many users have the same missing skills, so generated content is pooled by a
+canonical key (sorted, case-folded skill set + generation parameters) and served
+to everyone with that key instead of calling Gemini again.
+
+  - TemplateCache(name)     → bounded LRU of keys, each holding up to N variants
+  - template_key(skills, *) → canonical cache key for a skill set
+  - lookup(key) / add(key, value)
+
+To keep roadmaps feeling personal, a key only starts serving hits once its pool
+holds TEMPLATE_CACHE_VARIANTS distinct generations; until then every request
+generates (and contributes) a new variant. Hits rotate through the pool
+round-robin, or pick at random with TEMPLATE_CACHE_SELECTION=random.
+Set TEMPLATE_CACHE_VARIANTS=0 to disable the cache.
+"""
+
+import copy
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from utils.metrics import register_gauges
+
+load_dotenv()
+
+TEMPLATE_CACHE_VARIANTS = int(os.getenv("TEMPLATE_CACHE_VARIANTS", "3"))
+TEMPLATE_CACHE_MAX_KEYS = int(os.getenv("TEMPLATE_CACHE_MAX_KEYS", "2000"))
+TEMPLATE_CACHE_SELECTION = os.getenv("TEMPLATE_CACHE_SELECTION", "round_robin")
+
+
+def template_key(skills: Iterable[str], *params) -> Tuple:
+    """Order- and case-insensitive key for a skill set plus generation parameters."""
+    return (tuple(sorted({s.strip().casefold() for s in skills})),) + params
+
+
+class _Pool:
+    __slots__ = ("variants", "next")
+
+    def __init__(self):
+        self.variants: List[Any] = []
+        self.next = 0
+
+
+class TemplateCache:
+    def __init__(self, name: str, variants: int = TEMPLATE_CACHE_VARIANTS,
+                 max_keys: int = TEMPLATE_CACHE_MAX_KEYS, selection: str = TEMPLATE_CACHE_SELECTION):
+        self.name = name
+        self.variants = variants
+        self.max_keys = max_keys
+        self.selection = selection
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pools: "OrderedDict[Tuple, _Pool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        _caches.append(self)
+
+    def lookup(self, key: Tuple) -> Optional[Any]:
+        """Return a copy of one pooled variant, or None if the pool isn't full yet."""
+        if self.variants <= 0:
+            return None
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None or len(pool.variants) < self.variants:
+                self.misses += 1
+                return None
+            self._pools.move_to_end(key)
+            if self.selection == "random":
+                value = self._rng.choice(pool.variants)
+            else:
+                value = pool.variants[pool.next % len(pool.variants)]
+                pool.next += 1
+            self.hits += 1
+        # Callers may mutate what they get back
+        return copy.deepcopy(value)
+
+    def add(self, key: Tuple, value: Any) -> None:
+        """Contribute a freshly generated variant (ignored once the pool is full)."""
+        if self.variants <= 0:
+            return
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _Pool()
+            if len(pool.variants) < self.variants:
+                pool.variants.append(copy.deepcopy(value))
+            self._pools.move_to_end(key)
+            while len(self._pools) > self.max_keys:
+                self._pools.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "keys": len(self._pools),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_caches: List[TemplateCache] = []
+
+
+def _template_gauges():
+    gauges = []
+    for cache in _caches:
+        s = cache.stats()
+        labels = {"cache": cache.name}
+        gauges += [
+            ("template_cache_hits", "Generations served from the shared template cache", labels, s["hits"]),
+            ("template_cache_misses", "Template cache lookups that had to call the model", labels, s["misses"]),
+            ("template_cache_hit_ratio", "hits / (hits + misses)", labels, round(s["hit_ratio"], 4)),
+            ("template_cache_keys", "Skill-set keys currently cached", labels, s["keys"]),
+            ("template_cache_evictions", "Keys evicted to respect TEMPLATE_CACHE_MAX_KEYS", labels, s["evictions"]),
+        ]
+    return gauges
+
+
+register_gauges(_template_gauges)
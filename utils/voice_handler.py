@@ -8,13 +8,21 @@ Voice handling utilities:
 import os
 import io
 import tempfile
-import speech_recognition as sr
-from gtts import gTTS
 from dotenv import load_dotenv
 from utils.ai_agent import ai_interview_coach
+from utils.metrics import timed
 
 load_dotenv()
 
+# speech_recognition and gTTS are imported on first use so app startup (and
+# every --reload) doesn't pay for them; warm_up() loads them ahead of time.
+
+
+def warm_up() -> None:
+    """Import the speech-to-text and text-to-speech libraries."""
+    import speech_recognition  # noqa: F401
+    import gtts  # noqa: F401
+
 
 # ── Speech-to-Text ────────────────────────────────────────────
 def speech_to_text(audio_bytes: bytes, content_type: str = "audio/wav") -> str:
@@ -23,6 +31,8 @@ def speech_to_text(audio_bytes: bytes, content_type: str = "audio/wav") -> str:
     (free, no key required — uses the SpeechRecognition library).
     Accepts WAV or WebM audio.
     """
+    import speech_recognition as sr
+
     recognizer = sr.Recognizer()
 
     # Write bytes to a temp file so SpeechRecognition can read it
@@ -32,9 +42,10 @@ def speech_to_text(audio_bytes: bytes, content_type: str = "audio/wav") -> str:
         tmp_path = tmp.name
 
     try:
-        with sr.AudioFile(tmp_path) as source:
-            audio_data = recognizer.record(source)
-        text = recognizer.recognize_google(audio_data)
+        with timed("speech_to_text", stage="stt"):
+            with sr.AudioFile(tmp_path) as source:
+                audio_data = recognizer.record(source)
+            text = recognizer.recognize_google(audio_data)
         return text
     finally:
         os.unlink(tmp_path)
@@ -43,9 +54,12 @@ def speech_to_text(audio_bytes: bytes, content_type: str = "audio/wav") -> str:
 # ── Text-to-Speech ────────────────────────────────────────────
 def text_to_speech(text: str, lang: str = "en") -> bytes:
     """Convert text → MP3 audio bytes using Google TTS."""
+    from gtts import gTTS
+
     tts = gTTS(text=text, lang=lang, slow=False)
     buf = io.BytesIO()
-    tts.write_to_fp(buf)
+    with timed("text_to_speech", stage="tts"):
+        tts.write_to_fp(buf)
     buf.seek(0)
     return buf.read()
 
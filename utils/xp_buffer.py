@@ -0,0 +1,240 @@
+"""
+Write-behind buffer for gamification writes.
+
+XP awards and project-step deltas are coalesced per user in memory and
+written in one transaction every XP_BUFFER_FLUSH_SECONDS (or sooner once
+XP_BUFFER_MAX_PENDING events are waiting), so a burst of mini-game /add-xp
+calls costs one UPDATE on the user's row instead of one commit per call.
+
+  - add_xp(user_id, points)                    → queue XP (summed per user and day)
+  - add_step_delta(user_id, project_id, ...)   → queue mark / unmark bits for a project
+  - pending_steps(user_id) / projected(user)   → overlay not-yet-committed state for reads
+  - step_claim(user_id, project_id)            → hold while reading, deciding and queueing a step delta
+  - flush()                                    → write everything queued; returns rows written
+  - start_flusher() / stop_flusher()           → app startup / shutdown; stopping flushes
+
+Buffering is only active while the flusher runs (scripts and tests without
+the app lifecycle write directly). Set XP_BUFFER_ENABLED=false to turn it off.
+Events queued since the last flush are lost if the process is killed without
+a clean shutdown — at most one flush window of XP.
+
+Step deltas taken by a running flush stay visible to pending_steps until it
+commits, so a step's XP is never paid again in between; step_claim serialises
+requests on the same project (see project_progress.update_steps).
+
+Dashboard ETags (utils/http_cache.py) are bumped once per user by the flush,
+not per event, so conditional polls may lag a buffered award by one window.
+"""
+
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from db import SessionLocal
+from models import ProjectProgress, User
+from utils import leaderboard, project_progress, streak_logic
+from utils.http_cache import touch
+from utils.metrics import counter, histogram, register_gauges
+from utils.single_flight import KeyedLock
+
+load_dotenv()
+
+XP_BUFFER_ENABLED = os.getenv("XP_BUFFER_ENABLED", "true").lower() in ("1", "true", "yes")
+XP_BUFFER_FLUSH_SECONDS = float(os.getenv("XP_BUFFER_FLUSH_SECONDS", "2"))
+XP_BUFFER_MAX_PENDING = int(os.getenv("XP_BUFFER_MAX_PENDING", "500"))
+
+BUFFERED_EVENTS = counter("xp_buffer_events_total", "Gamification events queued for write-behind", ("kind",))
+FLUSH_SECONDS = histogram("xp_buffer_flush_seconds", "Duration of one batched gamification flush")
+
+_lock = Lock()
+_flush_lock = Lock()   # one flush at a time, so two batches never race on the same user row
+_xp: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))   # user → day → points
+_steps: Dict[Tuple[int, str], Tuple[int, int, int]] = {}                 # (user, project) → (mark, unmark, xp) bits
+_inflight: Dict[Tuple[int, str], Tuple[int, int, int]] = {}              # steps the running flush has not committed yet
+_step_locks = KeyedLock()
+_pending = 0
+
+_task: Optional[asyncio.Task] = None
+_wakeup: Optional[asyncio.Event] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def active() -> bool:
+    return XP_BUFFER_ENABLED and _task is not None
+
+
+def _queued() -> None:
+    """Count one event and wake the flusher early when the buffer is full (caller holds _lock)."""
+    global _pending
+    _pending += 1
+    if _pending >= XP_BUFFER_MAX_PENDING and _loop is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def add_xp(user_id: int, points: int, day: Optional[str] = None) -> None:
+    day = day or datetime.utcnow().date().isoformat()
+    with _lock:
+        _xp[user_id][day] += points
+        _queued()
+    BUFFERED_EVENTS.inc(kind="xp")
+
+
+def _compose(first: Tuple[int, int, int], then: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    """One (mark, unmark, xp) delta equivalent to applying `first` and then `then`."""
+    mark, unmark, xp = first
+    mark2, unmark2, xp2 = then
+    return (mark & ~unmark2) | mark2, (unmark & ~mark2) | unmark2, xp | xp2
+
+
+def add_step_delta(user_id: int, project_id: str, mark: int, unmark: int, xp: int) -> None:
+    delta = (mark & ~unmark, unmark, xp)
+    with _lock:
+        key = (user_id, project_id)
+        _steps[key] = _compose(_steps[key], delta) if key in _steps else delta
+        _queued()
+    BUFFERED_EVENTS.inc(kind="project_step")
+
+
+def step_claim(user_id: int, project_id: str):
+    """Lock one project's steps in this process from reading pending deltas to queueing the new one."""
+    return _step_locks.hold((user_id, project_id))
+
+
+def pending_steps(user_id: int) -> Dict[str, Tuple[int, int, int]]:
+    """Deltas not committed yet, in-flight ones included; read them before the row."""
+    with _lock:
+        deltas = {project: delta for (uid, project), delta in _inflight.items() if uid == user_id}
+        for (uid, project), delta in _steps.items():
+            if uid == user_id:
+                deltas[project] = _compose(deltas[project], delta) if project in deltas else delta
+        return deltas
+
+
+def projected(user: User) -> dict:
+    """The user's xp / level / xp_to_next / daily_xp ledger including XP not flushed yet."""
+    with _lock:
+        days = dict(_xp.get(user.id, {}))
+    view = User(xp=user.xp, level=user.level, xp_to_next=user.xp_to_next, daily_xp=user.daily_xp)
+    for day, points in sorted(days.items()):
+        streak_logic.apply_xp(view, points, day)
+    return {"xp": view.xp, "level": view.level, "xp_to_next": view.xp_to_next, "daily_xp": view.daily_xp}
+
+
+def _requeue(xp: Dict[int, Dict[str, int]], steps: Dict[Tuple[int, str], Tuple[int, int, int]]) -> None:
+    """Put a failed flush back in front of anything queued since."""
+    global _pending, _inflight
+    with _lock:
+        _inflight = {}
+        for user_id, days in xp.items():
+            for day, points in days.items():
+                _xp[user_id][day] += points
+        for key, delta in steps.items():
+            _steps[key] = _compose(delta, _steps[key]) if key in _steps else delta
+        _pending += len(xp) + len(steps)
+
+
+def flush() -> int:
+    """Write all queued events in one transaction; returns how many users/projects were written."""
+    with _flush_lock:
+        return _flush()
+
+
+def _flush() -> int:
+    global _xp, _steps, _pending, _inflight
+    with _lock:
+        if not _xp and not _steps:
+            return 0
+        xp, steps = _xp, _steps
+        _xp, _steps, _pending = defaultdict(lambda: defaultdict(int)), {}, 0
+        _inflight = steps
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if xp:
+            users = {u.id: u for u in db.query(User).filter(User.id.in_(list(xp)))}
+            for user_id, days in xp.items():
+                if user_id in users:
+                    for day, points in sorted(days.items()):
+                        streak_logic.apply_xp(users[user_id], points, day)
+        if steps:
+            user_ids = {user_id for user_id, _ in steps}
+            existing = {
+                (p.user_id, p.project_id): p
+                for p in db.query(ProjectProgress).filter(ProjectProgress.user_id.in_(user_ids))
+            }
+            for (user_id, project_id), (mark, unmark, xp_bits) in steps.items():
+                row = existing.get((user_id, project_id))
+                if row is None:
+                    db.add(ProjectProgress(user_id=user_id, project_id=project_id,
+                                           steps_mask=mark, xp_mask=xp_bits))
+                else:
+                    mask, xp_mask = project_progress.row_masks(row)
+                    row.steps_mask = (mask | mark) & ~unmark
+                    row.xp_mask = xp_mask | xp_bits
+                    row.completed_steps = None
+        for user_id in set(xp) | {user_id for user_id, _ in steps}:
+            touch(db, user_id, "dashboard")
+        db.commit()
+        with _lock:
+            _inflight = {}
+    except Exception as e:
+        db.rollback()
+        _requeue(xp, steps)
+        print(f"[XP Buffer] Flush failed, will retry: {e}")
+        return 0
+    finally:
+        db.close()
+    FLUSH_SECONDS.observe(time.perf_counter() - started)
+
+    for user_id, days in xp.items():
+        for day, points in days.items():
+            leaderboard.record_xp(user_id, points, datetime.strptime(day, "%Y-%m-%d").date())
+    return len(xp) + len(steps)
+
+
+def _buffer_gauges():
+    with _lock:
+        return [("xp_buffer_pending_events", "Gamification events waiting for the next flush", {}, _pending)]
+
+
+register_gauges(_buffer_gauges)
+
+
+# ── Flusher task ──────────────────────────────────────────────
+async def _flusher() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=XP_BUFFER_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        await asyncio.to_thread(flush)
+
+
+async def start_flusher() -> None:
+    """Start the periodic flush on the running loop (no-op when XP_BUFFER_ENABLED is off)."""
+    global _task, _wakeup, _loop
+    if not XP_BUFFER_ENABLED or _task is not None:
+        return
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    _task = asyncio.create_task(_flusher(), name="xp-buffer-flusher")
+
+
+async def stop_flusher() -> None:
+    """Stop buffering and write out everything still queued."""
+    global _task, _wakeup, _loop
+    if _task is None:
+        return
+    task, _task = _task, None   # new events now go straight to the database
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.to_thread(flush)
+    _wakeup = _loop = None